@@ -1,4 +1,8 @@
 __all__ = [
     "engine",
+    "intrabar",
+    "monte_carlo",
+    "portfolio",
+    "sweep",
 ]
 
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime, time
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
 
 import numpy as np
 import pandas as pd
@@ -12,6 +12,9 @@ from agent_trader.session.session_filter import get_session_state
 from agent_trader.types import Side, TradeCandidate
 from agent_trader.utils import pip_value, price_to_pips, within_day_cutoff
 
+if TYPE_CHECKING:
+    from agent_trader.backtest.intrabar import IntrabarResolver
+
 
 @dataclass(frozen=True)
 class BacktestFill:
@@ -54,6 +57,12 @@ class BacktestSummary:
     by_session: dict[str, dict[str, float]]
 
 
+def _touches(*, high: float, low: float, tp: float, sl: float, side: Side) -> tuple[bool, bool]:
+    if side == Side.BUY:
+        return high >= tp, low <= sl
+    return low <= tp, high >= sl
+
+
 def _ohlc_path_first_hit(
     *,
     open_: float,
@@ -65,12 +74,7 @@ def _ohlc_path_first_hit(
     side: Side,
     policy: Literal["sl_first", "tp_first", "ohlc_path"],
 ) -> Literal["tp", "sl", "none", "both"]:
-    if side == Side.BUY:
-        hit_tp = high >= tp
-        hit_sl = low <= sl
-    else:
-        hit_tp = low <= tp
-        hit_sl = high >= sl
+    hit_tp, hit_sl = _touches(high=high, low=low, tp=tp, sl=sl, side=side)
 
     if not hit_tp and not hit_sl:
         return "none"
@@ -90,6 +94,155 @@ def _ohlc_path_first_hit(
     return "tp" if bullish else "sl"
 
 
+@dataclass(frozen=True)
+class _Bars:
+    times: list
+    idx_by_time: dict
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+    @classmethod
+    def from_frame(cls, m15: pd.DataFrame) -> "_Bars":
+        m15 = m15.reset_index(drop=True)
+        # One vectorized call; keeps the input's tz-awareness, as the per-element conversion did
+        times = list(pd.DatetimeIndex(pd.to_datetime(m15["time"]).to_numpy()).to_pydatetime())
+        return cls(
+            times=times,
+            idx_by_time={t: i for i, t in enumerate(times)},
+            open=m15["open"].to_numpy(dtype=float),
+            high=m15["high"].to_numpy(dtype=float),
+            low=m15["low"].to_numpy(dtype=float),
+            close=m15["close"].to_numpy(dtype=float),
+        )
+
+
+def _entry_session(c: TradeCandidate, i: int, bars: _Bars, *, cfg: TradingConfig, bt: BacktestConfig, cutoff_t: time) -> str | None:
+    # Session state at the entry bar, or None when the candidate cannot be entered at all
+    if str(c.meta.get("market_regime", "")) == "TRANSITION":
+        return None
+    entry_idx = i + 1
+    if entry_idx >= len(bars.times):
+        return None
+    entry_time = bars.times[entry_idx]
+    if bt.enforce_cutoff and not within_day_cutoff(entry_time, cfg.timezone, cutoff_t):
+        return None
+    ss = get_session_state(entry_time, symbol=cfg.symbol, cfg=cfg)
+    if bt.enforce_session and ss == "BLOCKED":
+        return None
+    return ss
+
+
+def _risk_multiplier(c: TradeCandidate, ss: str) -> float:
+    # Risk the selection step assigned, or the session default; <= 0 means the candidate is not traded
+    if str(c.meta.get("quality", "")) == "SKIP":
+        return 0.0
+    raw = c.meta.get("risk_multiplier")
+    if raw is None:
+        return 1.0 if ss == "PRIMARY" else (0.5 if ss == "SECONDARY" else 0.0)
+    return float(raw)
+
+
+def _fill_trade(
+    c: TradeCandidate,
+    i: int,
+    ss: str,
+    risk_mult: float,
+    bars: _Bars,
+    *,
+    cfg: TradingConfig,
+    bt: BacktestConfig,
+    cutoff_t: time,
+    intrabar: IntrabarResolver | None = None,
+    spreads: np.ndarray | None = None,
+) -> tuple[BacktestTradeResult, int] | None:
+    # Walks the bars after signal bar `i`; returns the result and the bar index the position is held until.
+    # `spreads` (pips per bar, NaN where unknown) replaces the flat bt.spread_pips bar by bar.
+    sl_pips = price_to_pips(cfg.symbol, abs(c.entry_price - c.sl_price))
+    tp_pips = price_to_pips(cfg.symbol, abs(c.tp_price - c.entry_price))
+    if sl_pips <= 0 or tp_pips <= 0:
+        return None
+
+    pv = pip_value(cfg.symbol)
+
+    def half_at(k: int) -> float:
+        s = bt.spread_pips if spreads is None or np.isnan(spreads[k]) else float(spreads[k])
+        return s * pv / 2.0
+
+    entry_idx = i + 1
+    half = half_at(entry_idx)
+    entry_time = bars.times[entry_idx]
+    mid_open = float(bars.open[entry_idx])
+    entry = mid_open + half if c.side == Side.BUY else mid_open - half
+    sl = entry - (sl_pips * pv) if c.side == Side.BUY else entry + (sl_pips * pv)
+    tp = entry + (tp_pips * pv) if c.side == Side.BUY else entry - (tp_pips * pv)
+
+    exit_price = float(bars.close[entry_idx])
+    exit_time = entry_time
+    outcome: Literal["win", "loss", "breakeven", "cutoff", "expired"] = "expired"
+
+    j = entry_idx
+    for j in range(entry_idx, min(len(bars.times), entry_idx + bt.max_hold_bars)):
+        bar_time = bars.times[j]
+        if spreads is not None:
+            half = half_at(j)
+        if bt.enforce_cutoff and not within_day_cutoff(bar_time, cfg.timezone, cutoff_t):
+            mid = float(bars.open[j])
+            exit_price = (mid - half) if c.side == Side.BUY else (mid + half)
+            exit_time = bar_time
+            outcome = "cutoff"
+            break
+
+        q = -half if c.side == Side.BUY else half
+        hit = None
+        if intrabar is not None and all(_touches(high=float(bars.high[j]) + q, low=float(bars.low[j]) + q, tp=tp, sl=sl, side=c.side)):
+            # Both levels inside one bar: ask the lower timeframe, fall back to the policy without data
+            hit = intrabar.first_hit(bar_time, tp=tp, sl=sl, side=c.side, shift=q, policy=bt.fill_policy)
+        if hit is None:
+            hit = _ohlc_path_first_hit(
+                open_=float(bars.open[j]) + q,
+                high=float(bars.high[j]) + q,
+                low=float(bars.low[j]) + q,
+                close=float(bars.close[j]) + q,
+                tp=tp,
+                sl=sl,
+                side=c.side,
+                policy=bt.fill_policy,
+            )
+        if hit == "tp":
+            exit_price = tp
+            exit_time = bar_time
+            outcome = "win"
+            break
+        if hit == "sl":
+            exit_price = sl
+            exit_time = bar_time
+            outcome = "loss"
+            break
+
+    pnl_pips = price_to_pips(cfg.symbol, (exit_price - entry) if c.side == Side.BUY else (entry - exit_price))
+    r_mult = pnl_pips / sl_pips if sl_pips else 0.0
+    if abs(pnl_pips) < 1e-6:
+        outcome = "breakeven"
+        r_mult = 0.0
+    r_scaled = float(r_mult) * float(risk_mult)
+
+    res = BacktestTradeResult(
+        candidate=c,
+        entry_fill=BacktestFill(time=entry_time, price=entry),
+        exit_fill=BacktestFill(time=exit_time, price=exit_price),
+        outcome=outcome,
+        pnl_pips=float(pnl_pips),
+        r_multiple=float(r_mult),
+        r_multiple_scaled=float(r_scaled),
+        risk_multiplier=float(risk_mult),
+        session_state=str(ss),
+        market_regime=str(c.meta.get("market_regime") or "UNKNOWN"),
+    )
+    return res, bars.idx_by_time.get(exit_time, j)
+
+
 def simulate_trades(
     m15: pd.DataFrame,
     candidates: list[TradeCandidate],
@@ -97,131 +250,43 @@ def simulate_trades(
     cfg: TradingConfig,
     bt: BacktestConfig = BacktestConfig(),
     cutoff: time | None = None,
+    intrabar: IntrabarResolver | None = None,
+    spreads: np.ndarray | None = None,
 ) -> list[BacktestTradeResult]:
-    m15 = m15.reset_index(drop=True)
-    times = pd.to_datetime(m15["time"]).to_numpy()
-    idx_by_time = {pd.to_datetime(t).to_pydatetime(): i for i, t in enumerate(times)}
+    bars = _Bars.from_frame(m15)
     out: list[BacktestTradeResult] = []
-    spread = bt.spread_pips * pip_value(cfg.symbol)
-    half = spread / 2.0
     cutoff_t = cutoff or cfg.day_end_cutoff
 
     in_position_until_idx = -1
     for c in sorted(candidates, key=lambda x: x.time):
-        i = idx_by_time.get(c.time)
+        i = bars.idx_by_time.get(c.time)
         if i is None:
             continue
         if bt.enforce_one_trade and i <= in_position_until_idx:
             continue
-        if str(c.meta.get("market_regime", "")) == "TRANSITION":
-            continue
-        entry_idx = i + 1
-        if entry_idx >= len(m15):
-            continue
-        entry_time = pd.to_datetime(times[entry_idx]).to_pydatetime()
-        if bt.enforce_cutoff and not within_day_cutoff(entry_time, cfg.timezone, cutoff_t):
-            continue
-        if bt.enforce_session:
-            ss = get_session_state(entry_time, symbol=cfg.symbol, cfg=cfg)
-            if ss == "BLOCKED":
-                continue
-        else:
-            ss = get_session_state(entry_time, symbol=cfg.symbol, cfg=cfg)
-
-        if str(c.meta.get("quality", "")) == "SKIP":
+        ss = _entry_session(c, i, bars, cfg=cfg, bt=bt, cutoff_t=cutoff_t)
+        if ss is None:
             continue
-        risk_mult_raw = c.meta.get("risk_multiplier")
-        if risk_mult_raw is None:
-            risk_mult = 1.0 if ss == "PRIMARY" else (0.5 if ss == "SECONDARY" else 0.0)
-        else:
-            risk_mult = float(risk_mult_raw)
+
+        risk_mult = _risk_multiplier(c, ss)
         if risk_mult <= 0.0:
             continue
 
-        sl_pips = price_to_pips(cfg.symbol, abs(c.entry_price - c.sl_price))
-        tp_pips = price_to_pips(cfg.symbol, abs(c.tp_price - c.entry_price))
-        if sl_pips <= 0 or tp_pips <= 0:
+        filled = _fill_trade(c, i, ss, risk_mult, bars, cfg=cfg, bt=bt, cutoff_t=cutoff_t, intrabar=intrabar, spreads=spreads)
+        if filled is None:
             continue
-
-        mid_open = float(m15.loc[entry_idx, "open"])
-        entry = mid_open + half if c.side == Side.BUY else mid_open - half
-        sl = entry - (sl_pips * pip_value(cfg.symbol)) if c.side == Side.BUY else entry + (sl_pips * pip_value(cfg.symbol))
-        tp = entry + (tp_pips * pip_value(cfg.symbol)) if c.side == Side.BUY else entry - (tp_pips * pip_value(cfg.symbol))
-
-        exit_price = float(m15.loc[entry_idx, "close"])
-        exit_time = entry_time
-        outcome: Literal["win", "loss", "breakeven", "cutoff", "expired"] = "expired"
-
-        for j in range(entry_idx, min(len(m15), entry_idx + bt.max_hold_bars)):
-            bar_time = pd.to_datetime(times[j]).to_pydatetime()
-            if bt.enforce_cutoff and not within_day_cutoff(bar_time, cfg.timezone, cutoff_t):
-                mid = float(m15.loc[j, "open"])
-                exit_price = (mid - half) if c.side == Side.BUY else (mid + half)
-                exit_time = bar_time
-                outcome = "cutoff"
-                break
-
-            o = float(m15.loc[j, "open"])
-            h = float(m15.loc[j, "high"])
-            l = float(m15.loc[j, "low"])
-            cl = float(m15.loc[j, "close"])
-            if c.side == Side.BUY:
-                open_q = o - half
-                high_q = h - half
-                low_q = l - half
-                close_q = cl - half
-            else:
-                open_q = o + half
-                high_q = h + half
-                low_q = l + half
-                close_q = cl + half
-
-            hit = _ohlc_path_first_hit(
-                open_=open_q,
-                high=high_q,
-                low=low_q,
-                close=close_q,
-                tp=tp,
-                sl=sl,
-                side=c.side,
-                policy=bt.fill_policy,
-            )
-            if hit == "tp":
-                exit_price = tp
-                exit_time = bar_time
-                outcome = "win"
-                break
-            if hit == "sl":
-                exit_price = sl
-                exit_time = bar_time
-                outcome = "loss"
-                break
-
-        pnl_pips = price_to_pips(cfg.symbol, (exit_price - entry) if c.side == Side.BUY else (entry - exit_price))
-        r_mult = pnl_pips / sl_pips if sl_pips else 0.0
-        if abs(pnl_pips) < 1e-6:
-            outcome = "breakeven"
-            r_mult = 0.0
-        r_scaled = float(r_mult) * float(risk_mult)
-
-        res = BacktestTradeResult(
-            candidate=c,
-            entry_fill=BacktestFill(time=entry_time, price=entry),
-            exit_fill=BacktestFill(time=exit_time, price=exit_price),
-            outcome=outcome,
-            pnl_pips=float(pnl_pips),
-            r_multiple=float(r_mult),
-            r_multiple_scaled=float(r_scaled),
-            risk_multiplier=float(risk_mult),
-            session_state=str(ss),
-            market_regime=str(c.meta.get("market_regime") or "UNKNOWN"),
-        )
+        res, exit_idx = filled
         out.append(res)
         if bt.enforce_one_trade:
-            in_position_until_idx = idx_by_time.get(exit_time, j)
+            in_position_until_idx = exit_idx
     return out
 
 
+def max_drawdown(eq: np.ndarray) -> np.ndarray:
+    # Largest fall from the running equity peak along the last axis (trade order)
+    return (np.maximum.accumulate(eq, axis=-1) - eq).max(axis=-1)
+
+
 def summarize(results: list[BacktestTradeResult]) -> BacktestSummary:
     if not results:
         return BacktestSummary(
@@ -239,10 +304,7 @@ def summarize(results: list[BacktestTradeResult]) -> BacktestSummary:
     denom = wins + losses if (wins + losses) else len(results)
     win_rate = wins / denom if denom else 0.0
     expectancy = float(np.mean(r)) if len(r) else 0.0
-    eq = np.cumsum(r)
-    peak = np.maximum.accumulate(eq)
-    dd = peak - eq
-    max_dd = float(np.max(dd)) if len(dd) else 0.0
+    max_dd = float(max_drawdown(np.cumsum(r))) if len(r) else 0.0
     sharpe = 0.0
     if len(r) >= 5 and float(np.std(r, ddof=1)) > 1e-12:
         sharpe = float(np.mean(r) / np.std(r, ddof=1) * np.sqrt(len(r)))
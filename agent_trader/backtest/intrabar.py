@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Literal
+
+import numpy as np
+import pandas as pd
+
+from agent_trader.backtest.engine import _ohlc_path_first_hit
+from agent_trader.data.history_store import HistoryStore
+from agent_trader.types import Side
+
+
+# (start, end) inclusive -> frame with time/open/high/low/close, times naive like HistoryStore
+SliceLoader = Callable[[datetime, datetime], pd.DataFrame]
+
+
+def _naive_utc(t: datetime) -> datetime:
+    if t.tzinfo is None:
+        return t
+    return t.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class IntrabarResolver:
+    """Settles bars that touch both TP and SL from lower-timeframe bars (M1, or ticks as 1-tick bars).
+
+    Only ambiguous bars ask for data. Lower-timeframe history is loaded one day at a time on first
+    use and kept in a bounded LRU, so a backtest never holds more than `max_days` of it.
+    """
+
+    def __init__(self, load: SliceLoader, *, bar_minutes: int = 15, max_days: int = 32) -> None:
+        if max_days <= 0:
+            raise ValueError("max_days must be > 0")
+        self._load = load
+        self.bar = timedelta(minutes=int(bar_minutes))
+        self.max_days = int(max_days)
+        self._days: OrderedDict[date, tuple[np.ndarray, ...]] = OrderedDict()
+        self.loads = 0
+        self.hits = 0
+        self.resolved = 0
+        self.unresolved = 0
+
+    @classmethod
+    def from_store(cls, store: HistoryStore, **kw) -> "IntrabarResolver":
+        return cls(lambda start, end: store.load(start=start, end=end, include_forming=False), **kw)
+
+    def _day(self, d: date) -> tuple[np.ndarray, ...]:
+        cached = self._days.get(d)
+        if cached is not None:
+            self._days.move_to_end(d)
+            self.hits += 1
+            return cached
+        self.loads += 1
+        start = datetime(d.year, d.month, d.day)
+        df = self._load(start, start + timedelta(days=1) - timedelta(microseconds=1))
+        t = pd.to_datetime(df["time"])
+        if getattr(t.dt, "tz", None) is not None:
+            t = t.dt.tz_convert("UTC").dt.tz_localize(None)
+        arrays = (
+            t.to_numpy(dtype="datetime64[ns]").view("i8"),
+            *(df[c].to_numpy(dtype=float) for c in ("open", "high", "low", "close")),
+        )
+        self._days[d] = arrays
+        while len(self._days) > self.max_days:
+            self._days.popitem(last=False)
+        return arrays
+
+    def first_hit(
+        self,
+        bar_time: datetime,
+        *,
+        tp: float,
+        sl: float,
+        side: Side,
+        shift: float = 0.0,
+        policy: Literal["sl_first", "tp_first", "ohlc_path"] = "ohlc_path",
+    ) -> Literal["tp", "sl"] | None:
+        """Which level the bar opening at `bar_time` reached first, or None without usable data.
+
+        `shift` moves mid prices to the side's exit quote, as `_fill_trade` does for the bar itself.
+        """
+        t0 = _naive_utc(bar_time)
+        times, o, h, l, c = self._day(t0.date())
+        lo = int(np.searchsorted(times, pd.Timestamp(t0).value, side="left"))
+        hi = int(np.searchsorted(times, pd.Timestamp(t0 + self.bar).value, side="left"))
+        for k in range(lo, hi):
+            hit = _ohlc_path_first_hit(
+                open_=float(o[k]) + shift,
+                high=float(h[k]) + shift,
+                low=float(l[k]) + shift,
+                close=float(c[k]) + shift,
+                tp=tp,
+                sl=sl,
+                side=side,
+                policy=policy,
+            )
+            if hit in ("tp", "sl"):
+                self.resolved += 1
+                return hit
+        self.unresolved += 1
+        return None
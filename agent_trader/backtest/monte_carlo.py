@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Literal, Sequence
+
+import numpy as np
+
+from agent_trader.backtest.engine import BacktestTradeResult, max_drawdown
+
+
+@dataclass(frozen=True)
+class MonteCarloThresholds:
+    paths: int = 10_000
+    # "bootstrap" draws trades with replacement, "shuffle" reorders the same trades
+    method: Literal["bootstrap", "shuffle"] = "bootstrap"
+    # A path is ruined once its drawdown from peak reaches this many R
+    ruin_drawdown_r: float = 10.0
+    quantiles: tuple[float, ...] = (0.05, 0.25, 0.5, 0.75, 0.95)
+    seed: int = 42
+    # Paths simulated per array; bounds memory at block_paths x trades floats
+    block_paths: int = 5_000
+
+
+DEFAULT_MONTE_CARLO = MonteCarloThresholds()
+
+
+@dataclass(frozen=True)
+class MonteCarloReport:
+    paths: int
+    trades: int
+    method: str
+    final_r: dict[str, float]
+    max_drawdown_r: dict[str, float]
+    mean_max_drawdown_r: float
+    prob_negative: float
+    risk_of_ruin: float
+    ruin_drawdown_r: float
+
+
+def r_multiples(results: Sequence[BacktestTradeResult]) -> np.ndarray:
+    return np.array([t.r_multiple_scaled for t in results], dtype=float)
+
+
+def _simulate_block(task: tuple[np.ndarray, int, str, np.random.SeedSequence]) -> tuple[np.ndarray, np.ndarray]:
+    r, n_paths, method, seed = task
+    rng = np.random.default_rng(seed)
+    if method == "shuffle":
+        paths = rng.permuted(np.broadcast_to(r, (n_paths, len(r))), axis=1)
+    else:
+        paths = r[rng.integers(0, len(r), size=(n_paths, len(r)))]
+    eq = np.cumsum(paths, axis=1)
+    # Same drawdown definition as the backtest summary printed next to it
+    return eq[:, -1], max_drawdown(eq)
+
+
+def run_monte_carlo(
+    r: Sequence[float] | np.ndarray,
+    *,
+    th: MonteCarloThresholds = DEFAULT_MONTE_CARLO,
+    jobs: int = 1,
+) -> MonteCarloReport:
+    """Final-R and max-drawdown distributions over `th.paths` resampled trade sequences.
+
+    Blocks get their own child seeds, so results depend on `th`, not on `jobs`.
+    """
+    r = np.asarray(r, dtype=float)
+    if th.method not in ("bootstrap", "shuffle"):
+        raise ValueError(f"Unknown Monte Carlo method: {th.method}")
+    keys = [f"p{round(q * 100):g}" for q in th.quantiles]
+    if not len(r) or th.paths <= 0:
+        zeros = dict.fromkeys(keys, 0.0)
+        return MonteCarloReport(0, len(r), th.method, zeros, dict(zeros), 0.0, 0.0, 0.0, float(th.ruin_drawdown_r))
+
+    sizes = [min(th.block_paths, th.paths - lo) for lo in range(0, th.paths, max(1, th.block_paths))]
+    seeds = np.random.SeedSequence(th.seed).spawn(len(sizes))
+    tasks = [(r, n, th.method, s) for n, s in zip(sizes, seeds)]
+    workers = max(1, min(int(jobs) if jobs > 0 else (os.cpu_count() or 1), len(tasks)))
+    if workers == 1:
+        parts = [_simulate_block(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            parts = list(ex.map(_simulate_block, tasks))
+    final = np.concatenate([p[0] for p in parts])
+    max_dd = np.concatenate([p[1] for p in parts])
+
+    return MonteCarloReport(
+        paths=int(len(final)),
+        trades=int(len(r)),
+        method=th.method,
+        final_r=dict(zip(keys, np.quantile(final, th.quantiles).tolist())),
+        max_drawdown_r=dict(zip(keys, np.quantile(max_dd, th.quantiles).tolist())),
+        mean_max_drawdown_r=float(max_dd.mean()),
+        prob_negative=float((final < 0).mean()),
+        risk_of_ruin=float((max_dd >= th.ruin_drawdown_r).mean()),
+        ruin_drawdown_r=float(th.ruin_drawdown_r),
+    )
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass, field, replace
+from datetime import time
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from agent_trader.backtest.engine import (
+    BacktestConfig,
+    BacktestSummary,
+    BacktestTradeResult,
+    _Bars,
+    _entry_session,
+    _fill_trade,
+    _risk_multiplier,
+    summarize,
+)
+from agent_trader.config import TradingConfig
+from agent_trader.types import TradeCandidate
+
+_DAY_NS = 86_400 * 1_000_000_000
+
+
+@dataclass(frozen=True)
+class PortfolioThresholds:
+    max_open_positions: int = 3
+    # None takes the TradingConfig limits; days and weeks are UTC, weeks start on Monday
+    max_trades_per_day: int | None = None
+    max_trades_per_week: int | None = None
+
+
+DEFAULT_PORTFOLIO = PortfolioThresholds()
+
+
+@dataclass(frozen=True)
+class SymbolBook:
+    symbol: str
+    m15: pd.DataFrame
+    # Selected candidates, e.g. from `select_candidates`
+    candidates: list[TradeCandidate]
+    spreads: np.ndarray | None = None
+
+
+@dataclass(frozen=True)
+class PortfolioResult:
+    trades: list[BacktestTradeResult]
+    equity: pd.DataFrame
+    summary: BacktestSummary
+    rejected: dict[str, int] = field(default_factory=dict)
+
+
+def _ns(t) -> int:
+    return int(pd.Timestamp(t).value)
+
+
+def simulate_portfolio(
+    books: Sequence[SymbolBook],
+    *,
+    cfg: TradingConfig,
+    bt: BacktestConfig = BacktestConfig(),
+    th: PortfolioThresholds = DEFAULT_PORTFOLIO,
+    cutoff: time | None = None,
+) -> PortfolioResult:
+    """Trades every symbol's candidates on one clock under shared position and trade-count limits.
+
+    Each candidate is filled on its own symbol's bars exactly as `simulate_trades` would; the event
+    loop then admits them in entry order. One position per symbol when `bt.enforce_one_trade`.
+    """
+    cutoff_t = cutoff or cfg.day_end_cutoff
+    per_day = int(cfg.max_signals_per_day if th.max_trades_per_day is None else th.max_trades_per_day)
+    per_week = int(cfg.max_trades_per_week if th.max_trades_per_week is None else th.max_trades_per_week)
+    rejected = {"not_tradable": 0, "symbol_busy": 0, "max_open": 0, "daily_cap": 0, "weekly_cap": 0}
+
+    # Fill every tradable candidate up front; columns of the event table below
+    fills: list[BacktestTradeResult] = []
+    sym_col: list[int] = []
+    signal_ns: list[int] = []
+    entry_ns: list[int] = []
+    exit_ns: list[int] = []
+    prob: list[float] = []
+    for s, book in enumerate(books):
+        sym_cfg = replace(cfg, symbol=book.symbol)
+        bars = _Bars.from_frame(book.m15)
+        for c in sorted(book.candidates, key=lambda x: x.time):
+            i = bars.idx_by_time.get(c.time)
+            ss = None if i is None else _entry_session(c, i, bars, cfg=sym_cfg, bt=bt, cutoff_t=cutoff_t)
+            risk = 0.0 if ss is None else _risk_multiplier(c, ss)
+            filled = None
+            if risk > 0.0:
+                filled = _fill_trade(c, i, ss, risk, bars, cfg=sym_cfg, bt=bt, cutoff_t=cutoff_t, spreads=book.spreads)
+            if filled is None:
+                rejected["not_tradable"] += 1
+                continue
+            res, exit_idx = filled
+            fills.append(res)
+            sym_col.append(s)
+            signal_ns.append(_ns(bars.times[i]))
+            entry_ns.append(_ns(res.entry_fill.time))
+            exit_ns.append(_ns(bars.times[exit_idx]))
+            prob.append(float(c.meta.get("model_probability", 0.0)))
+
+    sym = np.asarray(sym_col, dtype=np.int64)
+    sig = np.asarray(signal_ns, dtype=np.int64)
+    ent = np.asarray(entry_ns, dtype=np.int64)
+    ext = np.asarray(exit_ns, dtype=np.int64)
+    # Entry time, then higher probability, then book order
+    order = np.lexsort((sym, -np.asarray(prob, dtype=float), ent))
+
+    busy_until = np.full(len(books), np.iinfo(np.int64).min, dtype=np.int64)
+    open_heap: list[int] = []
+    day = week = -1
+    day_count = week_count = 0
+    taken: list[int] = []
+    for k in order:
+        s, t_sig, t_ent = int(sym[k]), int(sig[k]), int(ent[k])
+        # Positions whose exit bar closed before this signal bar are flat again
+        while open_heap and open_heap[0] < t_sig:
+            heapq.heappop(open_heap)
+        if bt.enforce_one_trade and t_sig <= busy_until[s]:
+            rejected["symbol_busy"] += 1
+            continue
+        if len(open_heap) >= int(th.max_open_positions):
+            rejected["max_open"] += 1
+            continue
+        d = t_ent // _DAY_NS
+        w = (d + 3) // 7  # 1970-01-01 was a Thursday
+        if d != day:
+            day, day_count = d, 0
+        if w != week:
+            week, week_count = w, 0
+        if day_count >= per_day:
+            rejected["daily_cap"] += 1
+            continue
+        if week_count >= per_week:
+            rejected["weekly_cap"] += 1
+            continue
+        day_count += 1
+        week_count += 1
+        busy_until[s] = ext[k]
+        heapq.heappush(open_heap, int(ext[k]))
+        taken.append(int(k))
+
+    trades = [fills[k] for k in taken]
+    by_exit = sorted(trades, key=lambda r: _ns(r.exit_fill.time))
+    r = np.array([t.r_multiple_scaled for t in by_exit], dtype=float)
+    equity = pd.DataFrame(
+        {
+            "time": [t.exit_fill.time for t in by_exit],
+            "symbol": [t.candidate.symbol for t in by_exit],
+            "r_multiple_scaled": r,
+            "equity_r": np.cumsum(r),
+        }
+    )
+    return PortfolioResult(trades=trades, equity=equity, summary=summarize(by_exit), rejected=rejected)
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import itertools
+import math
+from dataclasses import dataclass, replace
+from datetime import time
+from typing import TYPE_CHECKING, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from agent_trader.backtest.engine import (
+    BacktestConfig,
+    BacktestTradeResult,
+    _Bars,
+    _entry_session,
+    _fill_trade,
+    summarize,
+)
+from agent_trader.config import TradingConfig
+from agent_trader.policy.quality import DEFAULT_QUALITY, QualityThresholds, decide_quality, decide_quality_array
+from agent_trader.types import TradeCandidate
+
+if TYPE_CHECKING:
+    from agent_trader.backtest.intrabar import IntrabarResolver
+
+
+def select_candidates(
+    candidates: list[TradeCandidate],
+    probs: Sequence[float],
+    *,
+    min_prob: float,
+    th: QualityThresholds = DEFAULT_QUALITY,
+) -> list[TradeCandidate]:
+    """Best candidate per bar above `min_prob`, tagged with its quality decision for `simulate_trades`."""
+    best_by_time: dict = {}
+    for idx, (cand, p) in enumerate(zip(candidates, probs)):
+        p = float(p)
+        if p < float(min_prob):
+            continue
+        prev = best_by_time.get(cand.time)
+        if prev is None or p > prev[1]:
+            best_by_time[cand.time] = (idx, p)
+
+    selected: list[TradeCandidate] = []
+    for idx, p in best_by_time.values():
+        cand = candidates[idx]
+        regime = str(cand.meta.get("market_regime") or "TRANSITION")
+        session_state = str(cand.meta.get("session_state") or "BLOCKED")
+        decision = decide_quality(
+            probability=float(p),
+            confluence_score=float(cand.confluence_score),
+            market_regime=regime,  # type: ignore[arg-type]
+            session_state=session_state,  # type: ignore[arg-type]
+            atr_percentile=cand.meta.get("atr_percentile"),
+            th=th,
+        )
+        cand.meta["model_probability"] = float(p)
+        cand.meta["quality"] = decision.quality
+        cand.meta["risk_multiplier"] = float(decision.risk_multiplier)
+        selected.append(cand)
+    return selected
+
+
+@dataclass(frozen=True)
+class SweepInputs:
+    """Per-candidate data that does not depend on the thresholds, computed once per sweep."""
+
+    prob: np.ndarray
+    confluence: np.ndarray
+    regime: np.ndarray
+    session: np.ndarray
+    atr_percentile: np.ndarray
+    # Bar-time group of each candidate (one trade per bar), signal bar index, and
+    # the index the position would be held until (-1 when it cannot be traded)
+    group: np.ndarray
+    signal_idx: np.ndarray
+    exit_idx: np.ndarray
+    # Unscaled result (risk multiplier 1.0) per tradable candidate
+    results: tuple[BacktestTradeResult | None, ...]
+    one_trade: bool
+
+
+@dataclass(frozen=True)
+class SweepPoint:
+    min_prob: float
+    params: dict[str, float]
+    trades: int
+    win_rate: float
+    expectancy_r: float
+    total_r: float
+    max_drawdown_r: float
+    sharpe_proxy: float
+
+
+def prepare_sweep(
+    m15: pd.DataFrame,
+    candidates: list[TradeCandidate],
+    probs: Sequence[float],
+    *,
+    cfg: TradingConfig,
+    bt: BacktestConfig = BacktestConfig(),
+    cutoff: time | None = None,
+    intrabar: IntrabarResolver | None = None,
+    spreads: np.ndarray | None = None,
+) -> SweepInputs:
+    bars = _Bars.from_frame(m15)
+    cutoff_t = cutoff or cfg.day_end_cutoff
+    groups: dict = {}
+    n = len(candidates)
+    signal_idx = np.full(n, -1, dtype=np.int64)
+    exit_idx = np.full(n, -1, dtype=np.int64)
+    results: list[BacktestTradeResult | None] = [None] * n
+    for k, c in enumerate(candidates):
+        i = bars.idx_by_time.get(c.time)
+        if i is None:
+            continue
+        signal_idx[k] = i
+        ss = _entry_session(c, i, bars, cfg=cfg, bt=bt, cutoff_t=cutoff_t)
+        if ss is None:
+            continue
+        filled = _fill_trade(c, i, ss, 1.0, bars, cfg=cfg, bt=bt, cutoff_t=cutoff_t, intrabar=intrabar, spreads=spreads)
+        if filled is not None:
+            results[k], exit_idx[k] = filled
+    atr = [c.meta.get("atr_percentile") for c in candidates]
+    return SweepInputs(
+        prob=np.asarray(probs, dtype=float),
+        confluence=np.array([float(c.confluence_score) for c in candidates], dtype=float),
+        regime=np.array([str(c.meta.get("market_regime") or "TRANSITION") for c in candidates], dtype=str),
+        session=np.array([str(c.meta.get("session_state") or "BLOCKED") for c in candidates], dtype=str),
+        atr_percentile=np.array([math.nan if a is None else float(a) for a in atr], dtype=float),
+        group=np.array([groups.setdefault(c.time, len(groups)) for c in candidates], dtype=np.int64),
+        signal_idx=signal_idx,
+        exit_idx=exit_idx,
+        results=tuple(results),
+        one_trade=bool(bt.enforce_one_trade),
+    )
+
+
+def evaluate(inputs: SweepInputs, *, min_prob: float, th: QualityThresholds = DEFAULT_QUALITY) -> list[BacktestTradeResult]:
+    """Same trades as `select_candidates` + `simulate_trades`, without walking any bars again."""
+    sel = np.nonzero(inputs.prob >= float(min_prob))[0]
+    if not len(sel):
+        return []
+    # Highest probability per bar; ties keep the earliest candidate
+    order = np.lexsort((sel, -inputs.prob[sel], inputs.group[sel]))
+    s = sel[order]
+    best = s[np.r_[True, inputs.group[s][1:] != inputs.group[s][:-1]]]
+
+    decision = decide_quality_array(
+        probability=inputs.prob[best],
+        confluence_score=inputs.confluence[best],
+        market_regime=inputs.regime[best],
+        session_state=inputs.session[best],
+        atr_percentile=inputs.atr_percentile[best],
+        th=th,
+    )
+    ok = (decision.risk_multiplier > 0.0) & (inputs.exit_idx[best] >= 0)
+    pool = best[ok]
+    risk = decision.risk_multiplier[ok]
+    by_time = np.argsort(inputs.signal_idx[pool], kind="stable")
+    pool, risk = pool[by_time], risk[by_time]
+    sig = inputs.signal_idx[pool]
+
+    out: list[BacktestTradeResult] = []
+    k = 0
+    while k < len(pool):
+        base = inputs.results[pool[k]]
+        rm = float(risk[k])
+        out.append(replace(base, r_multiple_scaled=float(base.r_multiple) * rm, risk_multiplier=rm))
+        if not inputs.one_trade:
+            k += 1
+            continue
+        # Next candidate whose signal bar is after the position closed
+        k = int(np.searchsorted(sig, inputs.exit_idx[pool[k]], side="right"))
+    return out
+
+
+def sweep(
+    inputs: SweepInputs,
+    *,
+    min_probs: Sequence[float],
+    grid: Mapping[str, Sequence[float]] | None = None,
+    base: QualityThresholds = DEFAULT_QUALITY,
+) -> list[SweepPoint]:
+    """Expectancy / drawdown surface over `min_probs` x every combination of `grid` threshold values."""
+    grid = dict(grid or {})
+    names = list(grid)
+    points: list[SweepPoint] = []
+    for combo in itertools.product(*(grid[n] for n in names)):
+        params = {n: float(v) for n, v in zip(names, combo)}
+        th = replace(base, **params)
+        for mp in min_probs:
+            results = evaluate(inputs, min_prob=float(mp), th=th)
+            summ = summarize(results)
+            points.append(
+                SweepPoint(
+                    min_prob=float(mp),
+                    params=params,
+                    trades=summ.trades,
+                    win_rate=summ.win_rate,
+                    expectancy_r=summ.expectancy_r,
+                    total_r=float(sum(r.r_multiple_scaled for r in results)),
+                    max_drawdown_r=summ.max_drawdown_r,
+                    sharpe_proxy=summ.sharpe_proxy,
+                )
+            )
+    return points
+
+
+def surface_frame(points: Sequence[SweepPoint]) -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            {
+                "min_prob": p.min_prob,
+                **p.params,
+                "trades": p.trades,
+                "win_rate": p.win_rate,
+                "expectancy_r": p.expectancy_r,
+                "total_r": p.total_r,
+                "max_drawdown_r": p.max_drawdown_r,
+                "sharpe_proxy": p.sharpe_proxy,
+            }
+            for p in points
+        ]
+    )
@@ -1,5 +1,14 @@
 __all__ = [
     "csv_loader",
     "mt5_loader",
+    "history_store",
+    "incremental_csv",
+    "snapshot",
+    "delta_log",
+    "fake_mt5",
+    "mt5_cache",
+    "mt5_history",
+    "resample",
+    "tick_store",
 ]
 
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from datetime import datetime
 from pathlib import Path
 from typing import Literal, Optional
 
@@ -7,6 +8,20 @@ import pandas as pd
 import time
 
 
+# MT4 TimeToStr(TIME_DATE|TIME_MINUTES|TIME_SECONDS) first, then the ISO forms pandas writes
+_TIME_FORMATS = ("%Y.%m.%d %H:%M:%S", "%Y.%m.%d %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M")
+
+
+def parse_bar_time(text: str) -> datetime:
+    s = text.strip().strip('"')
+    for fmt in _TIME_FORMATS:
+        try:
+            return datetime.strptime(s, fmt)
+        except ValueError:
+            continue
+    return pd.Timestamp(s).to_pydatetime()
+
+
 def load_ohlcv_csv(
     path: str | Path,
     *,
@@ -26,6 +41,18 @@ def load_ohlcv_csv(
             if retries == 0:
                 raise
             time.sleep(0.5)
+    return normalize_ohlcv(df, source=p, time_col=time_col, tz=tz, schema=schema)
+
+
+def normalize_ohlcv(
+    df: pd.DataFrame,
+    *,
+    source: str | Path = "<frame>",
+    time_col: str = "time",
+    tz: Optional[str] = "UTC",
+    schema: Literal["mt5", "generic"] = "generic",
+) -> pd.DataFrame:
+    p = source
     if time_col not in df.columns:
         raise ValueError(f"Missing '{time_col}' column in {p}")
     # interpretation as naive (Broker Time)
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import os
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+
+from agent_trader.data.csv_loader import normalize_ohlcv
+from agent_trader.data.incremental_csv import complete_lines
+
+
+# Delta export shared with AgentTrader_Master (ExportMode = EXPORT_DELTA):
+#   SYMBOL.bars.log     append-only, one line per newly closed bar: tf,time,open,high,low,close,tick_volume
+#   SYMBOL.forming.csv  rewritten (temp + rename) every cycle with the forming bar of each timeframe
+# A cycle therefore writes one line per timeframe whose bar closed, plus a ~200 byte side file.
+DELTA_COLUMNS = ["tf", "time", "open", "high", "low", "close", "tick_volume"]
+_HEADER = (",".join(DELTA_COLUMNS) + "\r\n").encode("utf-8")
+
+
+def log_path(root: str | Path, symbol: str) -> Path:
+    return Path(root) / f"{symbol}.bars.log"
+
+
+def forming_path(root: str | Path, symbol: str) -> Path:
+    return Path(root) / f"{symbol}.forming.csv"
+
+
+def _parse(lines: list[bytes]) -> pd.DataFrame:
+    df = pd.read_csv(BytesIO(_HEADER + b"".join(lines)))
+    df = df[df["tf"] != "tf"]
+    df["tf"] = df["tf"].astype(str).str.upper()
+    return df
+
+
+class DeltaLogReader:
+    """Consumes the delta log from the last byte offset and keeps one frame per timeframe."""
+
+    def __init__(self, root: str | Path, symbol: str, *, max_bars: dict[str, int] | None = None) -> None:
+        self.root = Path(root)
+        self.symbol = symbol
+        self.max_bars = dict(max_bars or {})
+        self.offset = 0
+        self.last_bytes_read = 0
+        self._closed: dict[str, pd.DataFrame] = {}
+        self._forming: dict[str, pd.DataFrame] = {}
+        self._forming_stamp: tuple[int, int] | None = None
+
+    def _reset(self) -> None:
+        self.offset = 0
+        self._closed = {}
+
+    def _consume_log(self) -> None:
+        p = log_path(self.root, self.symbol)
+        if not p.exists():
+            return
+        if p.stat().st_size < self.offset:
+            # Log was truncated or rotated: rebuild from the start
+            self._reset()
+        with open(p, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        self.last_bytes_read += len(data)
+        lines = complete_lines(data)
+        if not lines:
+            return
+        self.offset += sum(len(ln) for ln in lines)
+        new = _parse(lines)
+        for tf, chunk in new.groupby("tf", sort=False):
+            fresh = normalize_ohlcv(chunk.drop(columns=["tf"]).reset_index(drop=True), source=p, schema="mt5")
+            prev = self._closed.get(tf)
+            if prev is not None and len(prev):
+                # A restarted EA may re-append bars the log already holds
+                fresh = fresh[fresh["time"] > prev["time"].iloc[-1]]
+                fresh = pd.concat([prev, fresh], ignore_index=True)
+            cap = self.max_bars.get(tf)
+            if cap and len(fresh) > cap:
+                fresh = fresh.iloc[len(fresh) - cap :].reset_index(drop=True)
+            self._closed[tf] = fresh
+
+    def _consume_forming(self) -> None:
+        p = forming_path(self.root, self.symbol)
+        try:
+            st = p.stat()
+            stamp = (st.st_size, st.st_mtime_ns)
+            if stamp == self._forming_stamp:
+                return
+            data = p.read_bytes()
+        except OSError:
+            return
+        self.last_bytes_read += len(data)
+        lines = [ln for ln in complete_lines(data) if not ln.startswith(b"tf,")]
+        if not lines:
+            return
+        new = _parse(lines)
+        self._forming = {
+            tf: normalize_ohlcv(chunk.drop(columns=["tf"]).reset_index(drop=True), source=p, schema="mt5")
+            for tf, chunk in new.groupby("tf", sort=False)
+        }
+        self._forming_stamp = stamp
+
+    def read(self) -> dict[str, pd.DataFrame]:
+        self.last_bytes_read = 0
+        self._consume_log()
+        self._consume_forming()
+        out: dict[str, pd.DataFrame] = {}
+        for tf, closed in self._closed.items():
+            forming = self._forming.get(tf)
+            if forming is not None and len(forming) and (not len(closed) or forming["time"].iloc[-1] > closed["time"].iloc[-1]):
+                frame = pd.concat([closed, forming.iloc[-1:]], ignore_index=True)
+                cap = self.max_bars.get(tf)
+                if cap and len(frame) > cap:
+                    frame = frame.iloc[len(frame) - cap :].reset_index(drop=True)
+                out[tf] = frame
+            else:
+                out[tf] = closed
+        return out
+
+
+def _row_bytes(tf: str, row) -> bytes:
+    t = pd.Timestamp(row["time"]).strftime("%Y.%m.%d %H:%M:%S")
+    vol = int(row["volume"]) if "volume" in row and pd.notna(row["volume"]) else 0
+    return f"{tf},{t},{row['open']},{row['high']},{row['low']},{row['close']},{vol}\r\n".encode("utf-8")
+
+
+class DeltaLogWriter:
+    """Python stand-in for the EA's delta export (tests and replays)."""
+
+    def __init__(self, root: str | Path, symbol: str) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.symbol = symbol
+        self.last_closed: dict[str, pd.Timestamp] = {}
+        self.bytes_written = 0
+
+    def export(self, frames: dict[str, pd.DataFrame]) -> None:
+        # Same rule as the EA: the last row of each frame is the forming bar
+        appended: list[bytes] = []
+        forming: list[bytes] = []
+        for tf, df in frames.items():
+            if not len(df):
+                continue
+            times = pd.to_datetime(df["time"])
+            last = self.last_closed.get(tf)
+            closed = df.iloc[:-1]
+            if last is not None:
+                closed = closed[times.iloc[:-1] > last]
+            appended.extend(_row_bytes(tf, r) for _, r in closed.iterrows())
+            if len(closed):
+                self.last_closed[tf] = pd.Timestamp(closed["time"].iloc[-1])
+            forming.append(_row_bytes(tf, df.iloc[-1]))
+
+        p = log_path(self.root, self.symbol)
+        if appended:
+            with open(p, "ab") as f:
+                data = b"".join(appended)
+                f.write(data)
+                self.bytes_written += len(data)
+
+        side = forming_path(self.root, self.symbol)
+        tmp = side.with_suffix(side.suffix + ".tmp")
+        data = _HEADER + b"".join(forming)
+        tmp.write_bytes(data)
+        os.replace(tmp, side)
+        self.bytes_written += len(data)
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import sys
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+
+# Same numbering the MetaTrader5 package uses (minutes below H1, 0x4000 | hours above)
+TIMEFRAME_M1 = 1
+TIMEFRAME_M5 = 5
+TIMEFRAME_M15 = 15
+TIMEFRAME_M30 = 30
+TIMEFRAME_H1 = 0x4000 | 1
+TIMEFRAME_H4 = 0x4000 | 4
+TIMEFRAME_D1 = 0x4000 | 24
+COPY_TICKS_ALL = -1
+
+RATES_DTYPE = np.dtype(
+    [
+        ("time", "<i8"),
+        ("open", "<f8"),
+        ("high", "<f8"),
+        ("low", "<f8"),
+        ("close", "<f8"),
+        ("tick_volume", "<u8"),
+        ("spread", "<i4"),
+        ("real_volume", "<u8"),
+    ]
+)
+
+TICKS_DTYPE = np.dtype(
+    [
+        ("time", "<i8"),
+        ("bid", "<f8"),
+        ("ask", "<f8"),
+        ("last", "<f8"),
+        ("volume", "<u8"),
+        ("time_msc", "<i8"),
+        ("flags", "<u4"),
+        ("volume_real", "<f8"),
+    ]
+)
+
+
+def _epoch(value) -> int:
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return int(ts.timestamp())
+
+
+def rates_from_frame(df: pd.DataFrame) -> np.ndarray:
+    out = np.zeros(len(df), dtype=RATES_DTYPE)
+    times = pd.to_datetime(df["time"])
+    if times.dt.tz is None:
+        times = times.dt.tz_localize("UTC")
+    out["time"] = (times - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+    for c in ("open", "high", "low", "close"):
+        out[c] = df[c].to_numpy(dtype=float)
+    if "volume" in df.columns:
+        out["tick_volume"] = df["volume"].to_numpy(dtype=np.uint64)
+    return out
+
+
+def ticks_from_frame(df: pd.DataFrame) -> np.ndarray:
+    out = np.zeros(len(df), dtype=TICKS_DTYPE)
+    times = pd.to_datetime(df["time"])
+    if times.dt.tz is None:
+        times = times.dt.tz_localize("UTC")
+    out["time_msc"] = (times - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(milliseconds=1)
+    out["time"] = out["time_msc"] // 1000
+    out["bid"] = df["bid"].to_numpy(dtype=float)
+    out["ask"] = df["ask"].to_numpy(dtype=float)
+    return out
+
+
+class FakeMT5:
+    """In-process stand-in for the MetaTrader5 module (Linux tests, replays).
+
+    Serves rates set with `set_rates`, counts every call and can be told to refuse
+    connections or drop the terminal to exercise reconnect paths.
+    """
+
+    TIMEFRAME_M1 = TIMEFRAME_M1
+    TIMEFRAME_M5 = TIMEFRAME_M5
+    TIMEFRAME_M15 = TIMEFRAME_M15
+    TIMEFRAME_M30 = TIMEFRAME_M30
+    TIMEFRAME_H1 = TIMEFRAME_H1
+    TIMEFRAME_H4 = TIMEFRAME_H4
+    TIMEFRAME_D1 = TIMEFRAME_D1
+    COPY_TICKS_ALL = COPY_TICKS_ALL
+
+    def __init__(self) -> None:
+        self.calls: Counter[str] = Counter()
+        self.fail_initialize = 0
+        self.connected = False
+        self._rates: dict[tuple[str, int], np.ndarray] = {}
+        self._ticks: dict[str, tuple[float, float]] = {}
+        self._tick_history: dict[str, np.ndarray] = {}
+        self._error = (1, "Success")
+        self._guard = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def _enter(self, name: str) -> bool:
+        with self._guard:
+            self.calls[name] += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        return self.connected
+
+    def _leave(self) -> None:
+        with self._guard:
+            self.active -= 1
+
+    def set_rates(self, symbol: str, timeframe: int, rates: np.ndarray | pd.DataFrame) -> None:
+        arr = rates_from_frame(rates) if isinstance(rates, pd.DataFrame) else np.asarray(rates, dtype=RATES_DTYPE)
+        self._rates[(symbol, int(timeframe))] = arr
+
+    def set_tick(self, symbol: str, *, bid: float, ask: float) -> None:
+        self._ticks[symbol] = (float(bid), float(ask))
+
+    def set_tick_history(self, symbol: str, ticks: np.ndarray | pd.DataFrame) -> None:
+        self._tick_history[symbol] = ticks_from_frame(ticks) if isinstance(ticks, pd.DataFrame) else np.asarray(ticks, dtype=TICKS_DTYPE)
+
+    def drop_terminal(self) -> None:
+        self.connected = False
+        self._error = (-10004, "No IPC connection")
+
+    def initialize(self, *args, **kwargs) -> bool:
+        self.calls["initialize"] += 1
+        if self.fail_initialize > 0:
+            self.fail_initialize -= 1
+            self._error = (-10003, "IPC initialize failed")
+            return False
+        self.connected = True
+        self._error = (1, "Success")
+        return True
+
+    def shutdown(self) -> None:
+        self.calls["shutdown"] += 1
+        self.connected = False
+
+    def last_error(self) -> tuple[int, str]:
+        return self._error
+
+    def terminal_info(self):
+        self.calls["terminal_info"] += 1
+        return SimpleNamespace(connected=True) if self.connected else None
+
+    def copy_rates_from_pos(self, symbol: str, timeframe: int, start_pos: int, count: int):
+        try:
+            if not self._enter("copy_rates_from_pos"):
+                return None
+            arr = self._rates.get((symbol, int(timeframe)))
+            if arr is None:
+                return None
+            end = len(arr) - int(start_pos)
+            return arr[max(0, end - int(count)) : max(0, end)].copy()
+        finally:
+            self._leave()
+
+    def copy_rates_range(self, symbol: str, timeframe: int, date_from: datetime, date_to: datetime):
+        try:
+            if not self._enter("copy_rates_range"):
+                return None
+            arr = self._rates.get((symbol, int(timeframe)))
+            if arr is None:
+                return None
+            lo = np.searchsorted(arr["time"], _epoch(date_from), side="left")
+            hi = np.searchsorted(arr["time"], _epoch(date_to), side="right")
+            return arr[lo:hi].copy()
+        finally:
+            self._leave()
+
+    def copy_ticks_range(self, symbol: str, date_from: datetime, date_to: datetime, flags: int):
+        try:
+            if not self._enter("copy_ticks_range"):
+                return None
+            arr = self._tick_history.get(symbol)
+            if arr is None:
+                return None
+            lo = np.searchsorted(arr["time_msc"], _epoch(date_from) * 1000, side="left")
+            hi = np.searchsorted(arr["time_msc"], _epoch(date_to) * 1000, side="right")
+            return arr[lo:hi].copy()
+        finally:
+            self._leave()
+
+    def symbol_info_tick(self, symbol: str):
+        try:
+            if not self._enter("symbol_info_tick"):
+                return None
+            if symbol not in self._ticks:
+                return None
+            bid, ask = self._ticks[symbol]
+            return SimpleNamespace(bid=bid, ask=ask, time=int(datetime.now(timezone.utc).timestamp()))
+        finally:
+            self._leave()
+
+
+def install(fake: FakeMT5 | None = None) -> FakeMT5:
+    # Makes `import MetaTrader5` resolve to the fake for code that imports it lazily
+    fake = fake or FakeMT5()
+    sys.modules["MetaTrader5"] = fake  # type: ignore[assignment]
+    return fake
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+
+from agent_trader.data.csv_loader import parse_bar_time
+
+
+HISTORY_COLUMNS = ["time", "open", "high", "low", "close", "volume"]
+_TIME_FMT = "%Y-%m-%d %H:%M:%S"
+_TAIL_CHUNK = 4096
+
+
+@dataclass(frozen=True)
+class IngestResult:
+    appended: int
+    forming_updated: bool
+    last_closed_time: datetime | None
+    bytes_read: int
+
+
+def read_tail_rows(
+    path: str | Path,
+    *,
+    stop_after: datetime | None,
+    chunk_size: int = _TAIL_CHUNK,
+) -> tuple[list[tuple[datetime, list[str]]], int]:
+    # Walk the file backwards from EOF and collect rows newer than `stop_after`,
+    # so the cost follows the number of new rows rather than the file size.
+    rows: list[tuple[datetime, list[str]]] = []
+    bytes_read = 0
+    with open(path, "rb") as f:
+        f.seek(0, 2)
+        pos = f.tell()
+        buf = b""
+        pending_tail = True
+        done = False
+        while pos > 0 and not done:
+            step = min(chunk_size, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+            bytes_read += step
+            if pending_tail:
+                # Drop whatever follows the last newline: it is still being written
+                cut = buf.rfind(b"\n")
+                if cut < 0:
+                    continue
+                buf = buf[:cut]
+                pending_tail = False
+            lines = buf.split(b"\n")
+            buf = lines[0] if pos > 0 else b""
+            complete = lines[1:] if pos > 0 else lines
+            for raw in reversed(complete):
+                text = raw.decode("utf-8", "replace").strip()
+                if not text:
+                    continue
+                fields = [x.strip().strip('"') for x in text.split(",")]
+                try:
+                    t = parse_bar_time(fields[0])
+                except (ValueError, TypeError):
+                    # Header row: start of the file
+                    done = True
+                    break
+                if stop_after is not None and t <= stop_after:
+                    done = True
+                    break
+                rows.append((t, fields))
+    rows.reverse()
+    return rows, bytes_read
+
+
+class HistoryStore:
+    """Append-only, day-indexed history for one symbol/timeframe."""
+
+    def __init__(self, root: str | Path, symbol: str, timeframe: str) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.symbol = symbol
+        self.timeframe = timeframe.upper()
+        stem = f"{symbol}_{self.timeframe}"
+        self.data_path = self.root / f"{stem}.history.csv"
+        self.index_path = self.root / f"{stem}.history.json"
+        self._index = self._load_index()
+
+    def _load_index(self) -> dict:
+        if not self.data_path.exists():
+            self.data_path.write_bytes((",".join(HISTORY_COLUMNS) + "\n").encode("utf-8"))
+        empty = {
+            "rows": 0,
+            "size": self.data_path.stat().st_size,
+            "last_closed": None,
+            "forming": None,
+            "days": {},
+        }
+        if not self.index_path.exists():
+            return self._rebuild_index(empty)
+        try:
+            raw = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except Exception:
+            return self._rebuild_index(empty)
+        # Roll back rows appended after the last index write (crash mid-ingest)
+        if self.data_path.stat().st_size > int(raw.get("size", 0)):
+            with open(self.data_path, "r+b") as f:
+                f.truncate(int(raw["size"]))
+        return raw
+
+    def _rebuild_index(self, index: dict) -> dict:
+        # Lost or corrupt index: recover rows, day offsets and last_closed from the data file,
+        # so the next ingest appends only bars that are newer than what is already stored.
+        # The forming bar is not in the data file; the next snapshot restores it.
+        with open(self.data_path, "rb") as f:
+            header = f.readline()
+            offset = len(header)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                t = datetime.strptime(raw.split(b",", 1)[0].decode("utf-8"), _TIME_FMT)
+                index["days"].setdefault(t.date().isoformat(), offset)
+                index["last_closed"] = t.strftime(_TIME_FMT)
+                index["rows"] += 1
+                offset += len(raw)
+        # A partial last line is the remains of an interrupted append
+        if self.data_path.stat().st_size > offset:
+            with open(self.data_path, "r+b") as f:
+                f.truncate(offset)
+        index["size"] = offset
+        if index["rows"]:
+            self._index = index
+            self._write_index()
+        return index
+
+    def _write_index(self) -> None:
+        tmp = self.index_path.with_suffix(self.index_path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self._index, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(self.index_path)
+
+    @property
+    def rows(self) -> int:
+        return int(self._index["rows"])
+
+    @property
+    def last_closed_time(self) -> datetime | None:
+        s = self._index.get("last_closed")
+        return None if s is None else datetime.strptime(s, _TIME_FMT)
+
+    def _append(self, rows: list[tuple[datetime, list[str]]]) -> int:
+        days: dict[str, int] = self._index["days"]
+        written = 0
+        with open(self.data_path, "ab") as f:
+            offset = int(self._index["size"])
+            for t, fields in rows:
+                if len(fields) < 5:
+                    continue
+                day = t.date().isoformat()
+                if day not in days:
+                    days[day] = offset
+                vol = fields[5] if len(fields) > 5 and fields[5] else "0"
+                line = f"{t.strftime(_TIME_FMT)},{fields[1]},{fields[2]},{fields[3]},{fields[4]},{vol}\n".encode("utf-8")
+                f.write(line)
+                offset += len(line)
+                written += 1
+                self._index["last_closed"] = t.strftime(_TIME_FMT)
+        self._index["size"] = offset
+        self._index["rows"] = int(self._index["rows"]) + written
+        return written
+
+    def ingest_snapshot(self, path: str | Path, *, last_row_forming: bool = True) -> IngestResult:
+        last = self.last_closed_time
+        rows, nread = read_tail_rows(path, stop_after=last)
+        if not rows:
+            return IngestResult(appended=0, forming_updated=False, last_closed_time=last, bytes_read=nread)
+
+        forming = rows[-1] if last_row_forming else None
+        closed = rows[:-1] if last_row_forming else rows
+        appended = self._append(closed)
+
+        forming_updated = False
+        if forming is not None:
+            t, fields = forming
+            new = {"time": t.strftime(_TIME_FMT), "fields": fields[1:6]}
+            forming_updated = new != self._index.get("forming")
+            self._index["forming"] = new
+        elif appended:
+            self._index["forming"] = None
+
+        if appended or forming_updated:
+            self._write_index()
+        return IngestResult(
+            appended=appended,
+            forming_updated=forming_updated,
+            last_closed_time=self.last_closed_time,
+            bytes_read=nread,
+        )
+
+    def load(
+        self,
+        *,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        include_forming: bool = True,
+    ) -> pd.DataFrame:
+        offset = len(",".join(HISTORY_COLUMNS)) + 1
+        stop = int(self._index["size"])
+        days: dict[str, int] = self._index["days"]
+        if start is not None:
+            key = start.date().isoformat()
+            later = [off for d, off in days.items() if d >= key]
+            offset = min(later) if later else stop
+        if end is not None:
+            # Days after `end` are never read
+            key = end.date().isoformat()
+            after = [off for d, off in days.items() if d > key]
+            stop = min(after) if after else stop
+        with open(self.data_path, "rb") as f:
+            f.seek(offset)
+            data = f.read(max(0, stop - offset))
+
+        if data:
+            df = pd.read_csv(BytesIO(data), header=None, names=HISTORY_COLUMNS)
+        else:
+            df = pd.DataFrame(columns=HISTORY_COLUMNS)
+        forming = self._index.get("forming")
+        if include_forming and forming is not None:
+            vals = list(forming["fields"]) + ["0"] * (5 - len(forming["fields"]))
+            df = pd.concat([df, pd.DataFrame([[forming["time"], *vals]], columns=HISTORY_COLUMNS)], ignore_index=True)
+
+        df["time"] = pd.to_datetime(df["time"], format=_TIME_FMT)
+        for c in HISTORY_COLUMNS[1:]:
+            df[c] = pd.to_numeric(df[c])
+        if start is not None:
+            df = df[df["time"] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df["time"] <= pd.Timestamp(end)]
+        return df.reset_index(drop=True)
+
+
+def store_for_snapshot(root: str | Path, snapshot_path: str | Path) -> HistoryStore:
+    # Snapshots are named SYMBOL_TF.csv by the exporter EAs
+    stem = Path(snapshot_path).stem
+    symbol, _, timeframe = stem.rpartition("_")
+    if not symbol or not timeframe:
+        raise ValueError(f"Cannot infer symbol/timeframe from {snapshot_path}")
+    return HistoryStore(root, symbol, timeframe)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--root", required=True)
+    ap.add_argument("snapshots", nargs="+")
+    args = ap.parse_args()
+
+    for snap in args.snapshots:
+        store = store_for_snapshot(args.root, snap)
+        res = store.ingest_snapshot(snap)
+        print(f"{store.symbol}_{store.timeframe}: +{res.appended} bars, rows={store.rows}, last_closed={res.last_closed_time}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
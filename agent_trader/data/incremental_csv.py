@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Literal, Optional
+
+import pandas as pd
+
+from agent_trader.data.csv_loader import normalize_ohlcv
+
+
+ReadMode = Literal["unchanged", "append", "resync", "full", "stale"]
+
+
+@dataclass(frozen=True)
+class ReadStats:
+    mode: ReadMode
+    bytes_read: int
+    rows_parsed: int
+
+
+@dataclass
+class _FileState:
+    size: int
+    mtime_ns: int
+    header: bytes
+    # Last closed row (bytes incl. newline) and where it starts; the row after it is the forming bar
+    anchor: bytes
+    anchor_offset: int
+    frame: pd.DataFrame
+
+
+def complete_lines(data: bytes) -> list[bytes]:
+    # Everything after the last newline is a row the writer has not finished yet
+    cut = data.rfind(b"\n")
+    if cut < 0:
+        return []
+    return [ln + b"\n" for ln in data[:cut].split(b"\n") if ln.strip()]
+
+
+class IncrementalCSVReader:
+    """Keeps one parsed frame per OHLCV CSV and only parses rows that changed since the last call.
+
+    The returned frame is shared with the reader's cache; copy it before mutating.
+    """
+
+    def __init__(
+        self,
+        *,
+        time_col: str = "time",
+        tz: Optional[str] = "UTC",
+        schema: Literal["mt5", "generic"] = "generic",
+        max_resync_bytes: int = 64 * 1024,
+    ) -> None:
+        self.time_col = time_col
+        self.tz = tz
+        self.schema = schema
+        self.max_resync_bytes = int(max_resync_bytes)
+        self._states: dict[str, _FileState] = {}
+        self.last_stats: dict[str, ReadStats] = {}
+
+    def _parse(self, header: bytes, lines: list[bytes], source: Path) -> pd.DataFrame:
+        df = pd.read_csv(BytesIO(header + b"".join(lines)))
+        return normalize_ohlcv(df, source=source, time_col=self.time_col, tz=self.tz, schema=self.schema)
+
+    def _full_load(self, p: Path, st: os.stat_result) -> tuple[_FileState, ReadStats]:
+        data = p.read_bytes()
+        nl = data.find(b"\n")
+        if nl < 0:
+            raise pd.errors.EmptyDataError(f"No complete header in {p}")
+        header = data[: nl + 1]
+        rows = complete_lines(data[nl + 1 :])
+        if not rows:
+            raise pd.errors.EmptyDataError(f"No rows in {p}")
+        frame = self._parse(header, rows, p)
+        anchor = rows[-2] if len(rows) >= 2 else b""
+        anchor_offset = len(header) + sum(len(r) for r in rows[:-2]) if anchor else -1
+        state = _FileState(
+            size=st.st_size,
+            mtime_ns=st.st_mtime_ns,
+            header=header,
+            anchor=anchor,
+            anchor_offset=anchor_offset,
+            frame=frame,
+        )
+        return state, ReadStats(mode="full", bytes_read=len(data), rows_parsed=len(rows))
+
+    def _splice(self, state: _FileState, new_rows: list[bytes], p: Path) -> pd.DataFrame | None:
+        # new_rows[0] is the previous forming bar (maybe closed now); the rest are newer bars
+        if not new_rows:
+            return None
+        fresh = self._parse(state.header, new_rows, p)
+        return pd.concat([state.frame.iloc[:-1], fresh], ignore_index=True)
+
+    def _window_start(self, f, p: Path, state: _FileState) -> tuple[pd.Timestamp | None, int]:
+        # Time of the rewritten file's first row; it sets the window whether it slid, grew or shrank
+        span = 256
+        while True:
+            f.seek(0)
+            head = f.read(len(state.header) + span)
+            rows = complete_lines(head[len(state.header) :])
+            if rows or len(head) < len(state.header) + span:
+                break
+            span *= 4
+        if not rows or not head.startswith(state.header):
+            return None, len(head)
+        return self._parse(state.header, rows[:1], p)["time"].iloc[0], len(head)
+
+    def _advance(self, state: _FileState, new_rows: list[bytes], new_rows_offset: int) -> None:
+        if len(new_rows) >= 2:
+            state.anchor = new_rows[-2]
+            state.anchor_offset = new_rows_offset + sum(len(r) for r in new_rows[:-2])
+
+    def _incremental(self, p: Path, st: os.stat_result, state: _FileState) -> ReadStats | None:
+        if not state.anchor:
+            return None
+        with open(p, "rb") as f:
+            # 1. Rows were appended (or the forming bar rewritten) behind an unchanged prefix
+            if st.st_size >= state.anchor_offset + len(state.anchor):
+                f.seek(state.anchor_offset)
+                tail = f.read()
+                if tail.startswith(state.anchor):
+                    new_rows = complete_lines(tail[len(state.anchor) :])
+                    frame = self._splice(state, new_rows, p)
+                    if frame is None:
+                        return ReadStats(mode="stale", bytes_read=len(tail), rows_parsed=0)
+                    self._advance(state, new_rows, state.anchor_offset + len(state.anchor))
+                    state.frame = frame
+                    return ReadStats(mode="append", bytes_read=len(tail), rows_parsed=len(new_rows))
+
+            # 2. File rewritten with a shifted window: find the anchor row near the end
+            read = 0
+            span = 1024
+            while span <= max(1024, self.max_resync_bytes):
+                start = max(0, st.st_size - span)
+                f.seek(start)
+                tail = f.read(st.st_size - start)
+                read += len(tail)
+                pos = tail.rfind(b"\n" + state.anchor)
+                if pos >= 0:
+                    after = pos + 1 + len(state.anchor)
+                    new_rows = complete_lines(tail[after:])
+                    frame = self._splice(state, new_rows, p)
+                    if frame is None:
+                        # The forming bar always follows the anchor: the writer is not done yet
+                        return ReadStats(mode="stale", bytes_read=read, rows_parsed=0)
+                    first, nhead = self._window_start(f, p, state)
+                    read += nhead
+                    k = int(frame["time"].searchsorted(first)) if first is not None else len(frame)
+                    if k >= len(frame) or frame["time"].iloc[k] != first:
+                        # The window grew past the cached rows (or the head changed): start over
+                        return None
+                    frame = frame.iloc[k:].reset_index(drop=True)
+                    self._advance(state, new_rows, start + after)
+                    state.frame = frame
+                    return ReadStats(mode="resync", bytes_read=read, rows_parsed=len(new_rows))
+                if start == 0:
+                    break
+                span *= 2
+        return None
+
+    def read(self, path: str | Path) -> pd.DataFrame:
+        p = Path(path)
+        key = str(p)
+        state = self._states.get(key)
+        try:
+            st = p.stat()
+            if state is not None and st.st_size == state.size and st.st_mtime_ns == state.mtime_ns:
+                self.last_stats[key] = ReadStats(mode="unchanged", bytes_read=0, rows_parsed=0)
+                return state.frame
+
+            stats = self._incremental(p, st, state) if state is not None else None
+            if stats is None:
+                # Anchor lost or window grown (history edited, new file): start over
+                state, stats = self._full_load(p, st)
+                self._states[key] = state
+            if stats.mode != "stale":
+                state.size = st.st_size
+                state.mtime_ns = st.st_mtime_ns
+        except (PermissionError, pd.errors.EmptyDataError, pd.errors.ParserError):
+            # The EA holds the file or is mid-write: serve the last good frame instead of waiting
+            if state is None:
+                raise
+            self.last_stats[key] = ReadStats(mode="stale", bytes_read=0, rows_parsed=0)
+            return state.frame
+
+        self.last_stats[key] = stats
+        return state.frame
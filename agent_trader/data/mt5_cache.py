@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from agent_trader.data.mt5_loader import MT5Connection, _timeframe_from_str, default_connection
+
+
+_FIELDS = ("open", "high", "low", "close", "tick_volume")
+
+
+class BarRing:
+    """Last `capacity` bars of one (symbol, timeframe), one array per field.
+
+    Every row is written twice, at i and i + capacity, so the current window is always the
+    contiguous slice [head - size + capacity, head + capacity) and can be handed out as a view.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be > 0")
+        self.capacity = int(capacity)
+        self.head = 0
+        self.size = 0
+        self.time = np.zeros(2 * self.capacity, dtype="<i8")
+        self.cols = {
+            f: np.zeros(2 * self.capacity, dtype=np.float64 if f != "tick_volume" else np.int64) for f in _FIELDS
+        }
+
+    def _put(self, idx: np.ndarray, rates: np.ndarray) -> None:
+        for arr, src in [(self.time, rates["time"])] + [(self.cols[f], rates[f]) for f in _FIELDS]:
+            arr[idx] = src
+            arr[idx + self.capacity] = src
+
+    def extend(self, rates: np.ndarray) -> None:
+        if len(rates) == 0:
+            return
+        if len(rates) > self.capacity:
+            rates = rates[len(rates) - self.capacity :]
+        idx = (self.head + np.arange(len(rates))) % self.capacity
+        self._put(idx, rates)
+        self.head = int((self.head + len(rates)) % self.capacity)
+        self.size = min(self.capacity, self.size + len(rates))
+
+    def replace_last(self, rates: np.ndarray) -> None:
+        if self.size == 0:
+            raise IndexError("ring is empty")
+        self._put(np.array([(self.head - 1) % self.capacity]), rates[:1])
+
+    @property
+    def last_time(self) -> int:
+        return int(self.time[(self.head - 1) % self.capacity])
+
+    def window(self) -> slice:
+        end = self.head + self.capacity
+        return slice(end - self.size, end)
+
+
+def ring_frame(ring: BarRing, timezone: Optional[str] = "UTC") -> pd.DataFrame:
+    # Price/volume columns are views into the ring and stay valid until its next update;
+    # only the tz-aware time column is materialized
+    w = ring.window()
+    times = pd.DatetimeIndex(ring.time[w].view("M8[s]")).tz_localize("UTC")
+    if timezone and timezone != "UTC":
+        times = times.tz_convert(timezone)
+    data = {"time": times}
+    for f in _FIELDS:
+        data["volume" if f == "tick_volume" else f] = ring.cols[f][w]
+    return pd.DataFrame(data, copy=False)
+
+
+class CachedRatesFetcher:
+    """Per-cycle MT5 bar fetcher that only asks the terminal for bars since the last known one.
+
+    The first call (or a changed `bars` size) seeds the ring with `copy_rates_from_pos`.
+    Later calls request `copy_rates_range` from the cached forming bar's open time, which
+    refreshes the forming bar and appends anything that closed since.
+    Returned frames share memory with the cache: treat them as read-only, valid until the next fetch.
+    """
+
+    def __init__(self, *, conn: MT5Connection | None = None, timezone: Optional[str] = "UTC") -> None:
+        self.conn = conn
+        self.timezone = timezone
+        self._rings: dict[tuple[str, str], BarRing] = {}
+        self.last_rows_fetched: dict[tuple[str, str], int] = {}
+
+    def _seed(self, mt5, symbol: str, tf: int, bars: int) -> BarRing:
+        rates = mt5.copy_rates_from_pos(symbol, tf, 0, int(bars))
+        if rates is None:
+            raise RuntimeError("mt5.copy_rates_from_pos returned None")
+        ring = BarRing(int(bars))
+        ring.extend(rates)
+        return ring
+
+    def _fetch_ring(self, mt5, symbol: str, name: str, bars: int) -> BarRing:
+        key = (symbol, name.upper())
+        tf = _timeframe_from_str(mt5, name)
+        ring = self._rings.get(key)
+        if ring is None or ring.capacity != int(bars) or ring.size == 0:
+            ring = self._seed(mt5, symbol, tf, bars)
+            self.last_rows_fetched[key] = ring.size
+        else:
+            start = datetime.fromtimestamp(ring.last_time, tz=timezone.utc)
+            # Server time runs ahead of UTC on most brokers; the upper bound only has to be in the future
+            rates = mt5.copy_rates_range(symbol, tf, start, datetime.now(timezone.utc) + timedelta(days=2))
+            if rates is None or len(rates) == 0 or int(rates["time"][0]) != ring.last_time:
+                # Forming bar no longer in the terminal's history (reload, symbol switch): start over
+                ring = self._seed(mt5, symbol, tf, bars)
+                self.last_rows_fetched[key] = ring.size
+            else:
+                ring.replace_last(rates[:1])
+                ring.extend(rates[1:])
+                self.last_rows_fetched[key] = len(rates)
+        self._rings[key] = ring
+        return ring
+
+    def fetch(self, *, symbol: str, timeframe: str, bars: int) -> pd.DataFrame:
+        conn = self.conn or default_connection()
+        with conn.session() as mt5:
+            ring = self._fetch_ring(mt5, symbol, timeframe, bars)
+        return ring_frame(ring, self.timezone)
+
+    def fetch_multi(self, *, symbol: str, bars_by_tf: dict[str, int]) -> dict[str, pd.DataFrame]:
+        conn = self.conn or default_connection()
+        with conn.session() as mt5:
+            rings = {name: self._fetch_ring(mt5, symbol, name, bars) for name, bars in bars_by_tf.items()}
+        return {name: ring_frame(ring, self.timezone) for name, ring in rings.items()}
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from agent_trader.data.mt5_loader import MT5Connection, _rates_frame, _timeframe_from_str, default_connection
+
+
+def _utc(dt: datetime) -> datetime:
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+_PERIOD_MINUTES = {"M1": 1, "M5": 5, "M15": 15, "M30": 30, "H1": 60, "H4": 240, "D1": 1440}
+# FX closes around Friday 21:00-22:00 UTC (DST) and reopens Sunday evening; lenient on both sides
+_WEEKEND_CLOSE = timedelta(hours=20)
+# From Friday 20:00 to Sunday 22:00
+_WEEKEND_LENGTH = timedelta(days=2, hours=2)
+
+
+def month_complete(rates: np.ndarray, timeframe: str, month_end: datetime) -> bool:
+    """True when the last bar reaches the month's final bar period, allowing for the weekend close.
+
+    A terminal that is still syncing history returns a short or empty range; that must not be cached.
+    """
+    if not len(rates):
+        return False
+    period = timedelta(minutes=_PERIOD_MINUTES[timeframe.upper()])
+    due = _utc(month_end) - period
+    day = due.replace(hour=0, minute=0, second=0, microsecond=0)
+    friday_close = day - timedelta(days=(day.weekday() - 4) % 7) + _WEEKEND_CLOSE
+    if friday_close <= due < friday_close + _WEEKEND_LENGTH:
+        due = friday_close - period
+    return int(rates["time"][-1]) >= int(due.timestamp())
+
+
+def month_chunks(start: datetime, end: datetime) -> list[tuple[datetime, datetime]]:
+    # Whole calendar months [month_start, next_month_start) covering [start, end]
+    start, end = _utc(start), _utc(end)
+    cur = start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    out: list[tuple[datetime, datetime]] = []
+    while cur <= end:
+        nxt = cur.replace(year=cur.year + 1, month=1) if cur.month == 12 else cur.replace(month=cur.month + 1)
+        out.append((cur, nxt))
+        cur = nxt
+    return out
+
+
+class MT5HistoryDownloader:
+    """Downloads long MT5 ranges month by month and keeps finished months on disk.
+
+    A month is cached once it has fully elapsed and its bars reach the month end (`month_complete`),
+    as `<cache_dir>/<SYMBOL>/<TF>/YYYY-MM.npy` holding the raw rates records. Later runs load those files and only fetch the current month.
+    Terminal calls still go through the connection lock; the workers overlap them with cache I/O
+    and array conversion.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | Path | None = None,
+        *,
+        conn: MT5Connection | None = None,
+        max_workers: int = 4,
+        now: Callable[[], datetime] | None = None,
+    ) -> None:
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.conn = conn
+        self.max_workers = max(1, int(max_workers))
+        self._now = now or (lambda: datetime.now(timezone.utc))
+        self.fetched = 0
+        self.cache_hits = 0
+
+    def chunk_path(self, symbol: str, timeframe: str, month_start: datetime) -> Path | None:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / symbol / timeframe.upper() / f"{month_start:%Y-%m}.npy"
+
+    def _fetch(self, symbol: str, timeframe: str, lo: datetime, hi: datetime) -> np.ndarray:
+        conn = self.conn or default_connection()
+        with conn.session() as mt5:
+            tf = _timeframe_from_str(mt5, timeframe)
+            rates = mt5.copy_rates_range(symbol, tf, lo, hi - timedelta(seconds=1))
+            if rates is None:
+                raise RuntimeError(f"mt5.copy_rates_range returned None for {symbol} {timeframe} {lo:%Y-%m}")
+        return np.asarray(rates)
+
+    def _chunk(self, symbol: str, timeframe: str, lo: datetime, hi: datetime) -> tuple[np.ndarray, bool]:
+        path = self.chunk_path(symbol, timeframe, lo)
+        if path is not None and path.exists():
+            return np.load(path, allow_pickle=False), True
+        rates = self._fetch(symbol, timeframe, lo, hi)
+        if path is not None and hi <= self._now() and month_complete(rates, timeframe, hi):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, rates, allow_pickle=False)
+            os.replace(tmp, path)
+        return rates, False
+
+    def load(
+        self,
+        *,
+        symbol: str,
+        timeframe: str,
+        start: datetime,
+        end: datetime,
+        timezone: Optional[str] = "UTC",
+    ) -> pd.DataFrame:
+        start, end = _utc(start), _utc(end)
+        now = self._now()
+        chunks = [(lo, hi) for lo, hi in month_chunks(start, end) if lo <= now]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as ex:
+            results = list(ex.map(lambda c: self._chunk(symbol, timeframe, c[0], c[1]), chunks))
+        hits = sum(1 for _, hit in results if hit)
+        self.cache_hits += hits
+        self.fetched += len(results) - hits
+        parts = [r for r, _ in results if len(r)]
+        if not parts:
+            raise RuntimeError(f"no {timeframe} rates for {symbol} between {start:%Y-%m-%d} and {end:%Y-%m-%d}")
+        rates = np.concatenate(parts)
+        lo = np.searchsorted(rates["time"], int(start.timestamp()), side="left")
+        hi = np.searchsorted(rates["time"], int(end.timestamp()), side="right")
+        return _rates_frame(rates[lo:hi], timezone)
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional
+from typing import Any, Callable, Iterator, Optional
 
 import pandas as pd
 
@@ -18,6 +21,122 @@ def _require_mt5():
     return mt5
 
 
+class MT5Connection:
+    """One long-lived terminal session shared by every loader call.
+
+    The MetaTrader5 package talks to a single terminal over one IPC channel, so calls are
+    serialized through a lock; concurrent symbol fetches queue up instead of racing.
+    A failed call marks the session stale and the next `session()` reconnects with backoff.
+    """
+
+    def __init__(
+        self,
+        *,
+        module: Any = None,
+        max_attempts: int = 5,
+        backoff_seconds: float = 0.5,
+        max_backoff_seconds: float = 30.0,
+        sleep: Callable[[float], None] = time.sleep,
+        initialize_kwargs: dict[str, Any] | None = None,
+    ) -> None:
+        self._module = module
+        self.max_attempts = max(1, int(max_attempts))
+        self.backoff_seconds = float(backoff_seconds)
+        self.max_backoff_seconds = float(max_backoff_seconds)
+        self._sleep = sleep
+        self.initialize_kwargs = dict(initialize_kwargs or {})
+        self._lock = threading.RLock()
+        self._connected = False
+        self.connects = 0
+
+    @property
+    def mt5(self):
+        if self._module is None:
+            self._module = _require_mt5()
+        return self._module
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    def _connect(self):
+        mt5 = self.mt5
+        delay = self.backoff_seconds
+        for attempt in range(1, self.max_attempts + 1):
+            if mt5.initialize(**self.initialize_kwargs):
+                self._connected = True
+                self.connects += 1
+                return mt5
+            if attempt < self.max_attempts:
+                self._sleep(delay)
+                delay = min(delay * 2.0, self.max_backoff_seconds)
+        raise RuntimeError(f"mt5.initialize() failed after {self.max_attempts} attempts: {mt5.last_error()}")
+
+    def ensure(self):
+        with self._lock:
+            if self._connected:
+                return self.mt5
+            return self._connect()
+
+    def _check_health(self) -> None:
+        try:
+            alive = self.mt5.terminal_info() is not None
+        except Exception:  # noqa: BLE001
+            alive = False
+        if not alive:
+            self._connected = False
+            try:
+                self.mt5.shutdown()
+            except Exception:  # noqa: BLE001
+                pass
+
+    @contextmanager
+    def session(self) -> Iterator[Any]:
+        with self._lock:
+            mt5 = self.ensure()
+            try:
+                yield mt5
+            except Exception:
+                # Only probe the terminal when something went wrong; healthy cycles pay nothing extra
+                self._check_health()
+                raise
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._connected:
+                self._connected = False
+                self.mt5.shutdown()
+
+
+_DEFAULT_CONNECTION: MT5Connection | None = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_connection() -> MT5Connection:
+    global _DEFAULT_CONNECTION
+    with _DEFAULT_LOCK:
+        if _DEFAULT_CONNECTION is None:
+            _DEFAULT_CONNECTION = MT5Connection()
+        return _DEFAULT_CONNECTION
+
+
+def shutdown() -> None:
+    global _DEFAULT_CONNECTION
+    with _DEFAULT_LOCK:
+        conn, _DEFAULT_CONNECTION = _DEFAULT_CONNECTION, None
+    if conn is not None:
+        conn.shutdown()
+
+
+def _rates_frame(rates, timezone: Optional[str]) -> pd.DataFrame:
+    df = pd.DataFrame(rates)
+    df["time"] = pd.to_datetime(df["time"], unit="s", utc=True)
+    if timezone and timezone != "UTC":
+        df["time"] = df["time"].dt.tz_convert(timezone)
+    df = df.rename(columns={"tick_volume": "volume"})
+    return df[["time", "open", "high", "low", "close", "volume"]].copy()
+
+
 def _timeframe_from_str(mt5, timeframe: str) -> int:
     tf = timeframe.upper()
     m = {
@@ -46,22 +165,14 @@ def load_rates(
     start: datetime,
     end: datetime,
     timezone: Optional[str] = "UTC",
+    conn: MT5Connection | None = None,
 ) -> pd.DataFrame:
-    mt5 = _require_mt5()
-    if not mt5.initialize():
-        raise RuntimeError("mt5.initialize() failed")
-    try:
+    conn = conn or default_connection()
+    with conn.session() as mt5:
         rates = mt5.copy_rates_range(symbol, timeframe, start, end)
         if rates is None:
             raise RuntimeError("mt5.copy_rates_range returned None")
-        df = pd.DataFrame(rates)
-        df["time"] = pd.to_datetime(df["time"], unit="s", utc=True)
-        if timezone and timezone != "UTC":
-            df["time"] = df["time"].dt.tz_convert(timezone)
-        df = df.rename(columns={"tick_volume": "volume"})
-        return df[["time", "open", "high", "low", "close", "volume"]].copy()
-    finally:
-        mt5.shutdown()
+    return _rates_frame(rates, timezone)
 
 
 def load_rates_recent(
@@ -70,24 +181,16 @@ def load_rates_recent(
     timeframe: int,
     bars: int,
     timezone: Optional[str] = "UTC",
+    conn: MT5Connection | None = None,
 ) -> pd.DataFrame:
-    mt5 = _require_mt5()
     if bars <= 0:
         raise ValueError("bars must be > 0")
-    if not mt5.initialize():
-        raise RuntimeError("mt5.initialize() failed")
-    try:
+    conn = conn or default_connection()
+    with conn.session() as mt5:
         rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, int(bars))
         if rates is None:
             raise RuntimeError("mt5.copy_rates_from_pos returned None")
-        df = pd.DataFrame(rates)
-        df["time"] = pd.to_datetime(df["time"], unit="s", utc=True)
-        if timezone and timezone != "UTC":
-            df["time"] = df["time"].dt.tz_convert(timezone)
-        df = df.rename(columns={"tick_volume": "volume"})
-        return df[["time", "open", "high", "low", "close", "volume"]].copy()
-    finally:
-        mt5.shutdown()
+    return _rates_frame(rates, timezone)
 
 
 def load_recent_multi_timeframe(
@@ -96,43 +199,46 @@ def load_recent_multi_timeframe(
     timeframes: dict[str, int] | None = None,
     bars_by_tf: dict[str, int] | None = None,
     timezone: Optional[str] = "UTC",
+    conn: MT5Connection | None = None,
 ) -> dict[str, pd.DataFrame]:
-    mt5 = _require_mt5()
-    tfs = timeframes or {
-        "M15": _timeframe_from_str(mt5, "M15"),
-        "H1": _timeframe_from_str(mt5, "H1"),
-        "H4": _timeframe_from_str(mt5, "H4"),
-    }
+    conn = conn or default_connection()
     bars_map = bars_by_tf or {"M15": 1500, "H1": 800, "H4": 500}
-    if not mt5.initialize():
-        raise RuntimeError("mt5.initialize() failed")
-    try:
-        out: dict[str, pd.DataFrame] = {}
+    raw: dict[str, Any] = {}
+    with conn.session() as mt5:
+        tfs = timeframes or {
+            "M15": _timeframe_from_str(mt5, "M15"),
+            "H1": _timeframe_from_str(mt5, "H1"),
+            "H4": _timeframe_from_str(mt5, "H4"),
+        }
         for name, tf in tfs.items():
             bars = int(bars_map.get(name, 500))
             rates = mt5.copy_rates_from_pos(symbol, tf, 0, bars)
             if rates is None:
                 raise RuntimeError(f"mt5.copy_rates_from_pos returned None for {name}")
-            df = pd.DataFrame(rates)
-            df["time"] = pd.to_datetime(df["time"], unit="s", utc=True)
-            if timezone and timezone != "UTC":
-                df["time"] = df["time"].dt.tz_convert(timezone)
-            df = df.rename(columns={"tick_volume": "volume"})
-            out[name] = df[["time", "open", "high", "low", "close", "volume"]].copy()
-        return out
-    finally:
-        mt5.shutdown()
-
-
-def get_spread_pips(*, symbol: str, pip_size: float) -> float:
-    mt5 = _require_mt5()
-    if not mt5.initialize():
-        raise RuntimeError("mt5.initialize() failed")
-    try:
+            raw[name] = rates
+    # Frames are built outside the lock so other symbols can fetch meanwhile
+    return {name: _rates_frame(rates, timezone) for name, rates in raw.items()}
+
+
+def download_ticks(*, symbol: str, start: datetime, end: datetime, conn: MT5Connection | None = None) -> pd.DataFrame:
+    # time (UTC, millisecond resolution) / bid / ask, ready for TickStore.ingest_frame
+    conn = conn or default_connection()
+    with conn.session() as mt5:
+        ticks = mt5.copy_ticks_range(symbol, start, end, mt5.COPY_TICKS_ALL)
+        if ticks is None:
+            raise RuntimeError("mt5.copy_ticks_range returned None")
+    df = pd.DataFrame(ticks)
+    if df.empty:
+        return pd.DataFrame(columns=["time", "bid", "ask"])
+    df["time"] = pd.to_datetime(df["time_msc"], unit="ms", utc=True)
+    return df[["time", "bid", "ask"]].copy()
+
+
+def get_spread_pips(*, symbol: str, pip_size: float, conn: MT5Connection | None = None) -> float:
+    conn = conn or default_connection()
+    with conn.session() as mt5:
         tick = mt5.symbol_info_tick(symbol)
         if tick is None:
             raise RuntimeError("mt5.symbol_info_tick returned None")
-        spread = float(tick.ask) - float(tick.bid)
-        return float(spread / float(pip_size))
-    finally:
-        mt5.shutdown()
+    spread = float(tick.ask) - float(tick.bid)
+    return float(spread / float(pip_size))
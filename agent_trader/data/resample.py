@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import pandas as pd
+
+
+_PERIODS = {
+    "M5": pd.Timedelta(minutes=5),
+    "M15": pd.Timedelta(minutes=15),
+    "M30": pd.Timedelta(minutes=30),
+    "H1": pd.Timedelta(hours=1),
+    "H4": pd.Timedelta(hours=4),
+    "D1": pd.Timedelta(days=1),
+}
+
+
+def timeframe_period(timeframe: str) -> pd.Timedelta:
+    tf = timeframe.upper()
+    if tf not in _PERIODS:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    return _PERIODS[tf]
+
+
+def bucket_start(times: pd.Series, timeframe: str, *, offset_minutes: int = 0) -> pd.Series:
+    # MT4 opens H4/D1 bars on broker-server midnight. Times already in broker time need no offset;
+    # for UTC data pass the broker's UTC offset (e.g. 120 for GMT+2) to reproduce its buckets.
+    period = timeframe_period(timeframe)
+    off = pd.Timedelta(minutes=int(offset_minutes))
+    t = pd.to_datetime(times)
+    return (t + off).dt.floor(period) - off
+
+
+def resample_ohlcv(df: pd.DataFrame, timeframe: str, *, offset_minutes: int = 0) -> pd.DataFrame:
+    """Aggregates a lower-timeframe OHLCV frame into `timeframe` bars.
+
+    The last bucket is built from whatever lower bars exist, so it behaves like the EA's forming bar.
+    """
+    if not len(df):
+        return df[["time", "open", "high", "low", "close", "volume"]].iloc[:0].copy()
+    keys = bucket_start(df["time"], timeframe, offset_minutes=offset_minutes)
+    g = df.groupby(keys.rename("time"), sort=True)
+    out = pd.DataFrame(
+        {
+            "open": g["open"].first(),
+            "high": g["high"].max(),
+            "low": g["low"].min(),
+            "close": g["close"].last(),
+            "volume": g["volume"].sum(),
+        }
+    )
+    return out.reset_index()
+
+
+class IncrementalResampler:
+    """Keeps H1/H4 frames derived from a live M15 (or M1) feed.
+
+    Each update re-aggregates only the source rows from the current higher-timeframe bar onward,
+    replaces that bar and appends any newer ones. Output keeps up to `max_bars` per timeframe, so it
+    can hold more history than the source window it is fed.
+    """
+
+    def __init__(
+        self,
+        timeframes: tuple[str, ...] = ("H1", "H4"),
+        *,
+        offset_minutes: int = 0,
+        max_bars: dict[str, int] | None = None,
+    ) -> None:
+        self.timeframes = tuple(tf.upper() for tf in timeframes)
+        self.offset_minutes = int(offset_minutes)
+        self.max_bars = dict(max_bars or {})
+        self._frames: dict[str, pd.DataFrame] = {}
+
+    def _cap(self, tf: str, df: pd.DataFrame) -> pd.DataFrame:
+        cap = self.max_bars.get(tf)
+        if cap and len(df) > cap:
+            df = df.iloc[len(df) - cap :].reset_index(drop=True)
+        return df
+
+    def update(self, src: pd.DataFrame) -> dict[str, pd.DataFrame]:
+        times = pd.to_datetime(src["time"])
+        for tf in self.timeframes:
+            prev = self._frames.get(tf)
+            if prev is None or not len(prev) or not len(src) or times.iloc[0] > prev["time"].iloc[-1]:
+                # First call, or the source jumped past our forming bar: rebuild from the window
+                self._frames[tf] = self._cap(tf, resample_ohlcv(src, tf, offset_minutes=self.offset_minutes))
+                continue
+            last = prev["time"].iloc[-1]
+            tail = src[times >= last]
+            if not len(tail):
+                continue
+            fresh = resample_ohlcv(tail, tf, offset_minutes=self.offset_minutes)
+            self._frames[tf] = self._cap(tf, pd.concat([prev.iloc[:-1], fresh], ignore_index=True))
+        return dict(self._frames)
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+
+from agent_trader.data.csv_loader import normalize_ohlcv
+
+
+# Handoff protocol shared with AgentTrader_Master (ExportMode = EXPORT_MANIFEST):
+#   1. seq += 1, slot = seq % 2
+#   2. every timeframe is written to SYMBOL_TF.<slot>.csv.tmp, then renamed to SYMBOL_TF.<slot>.csv
+#   3. SYMBOL.manifest.json.tmp is written and renamed over SYMBOL.manifest.json
+# The manifest is the only file a reader trusts: it names one slot for all timeframes, with the
+# byte size of each file. The writer only touches the other slot until the next manifest is out.
+MANIFEST_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    seq: int
+    written: str
+    frames: dict[str, pd.DataFrame]
+
+
+def manifest_path(root: str | Path, symbol: str) -> Path:
+    return Path(root) / f"{symbol}.manifest.json"
+
+
+def slot_path(root: str | Path, symbol: str, timeframe: str, slot: int) -> Path:
+    return Path(root) / f"{symbol}_{timeframe}.{int(slot)}.csv"
+
+
+class SnapshotReader:
+    """Reads the latest coherent multi-timeframe snapshot without blocking or retrying.
+
+    If the published snapshot cannot be verified (sizes differ, the writer lapped the reader,
+    a file is locked) the previous coherent snapshot is returned instead.
+    """
+
+    def __init__(self, root: str | Path, symbol: str) -> None:
+        self.root = Path(root)
+        self.symbol = symbol
+        self._current: Snapshot | None = None
+        self.rejected = 0
+
+    def _read_manifest(self) -> dict | None:
+        try:
+            raw = json.loads(manifest_path(self.root, self.symbol).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if int(raw.get("version", 0)) != MANIFEST_VERSION:
+            return None
+        return raw
+
+    def _load(self, manifest: dict) -> Snapshot | None:
+        frames: dict[str, pd.DataFrame] = {}
+        for tf, meta in manifest["files"].items():
+            p = self.root / str(meta["name"])
+            try:
+                data = p.read_bytes()
+            except OSError:
+                return None
+            if len(data) != int(meta["bytes"]):
+                return None
+            df = pd.read_csv(BytesIO(data))
+            if "rows" in meta and len(df) != int(meta["rows"]):
+                return None
+            frames[tf] = normalize_ohlcv(df, source=p, schema="mt5")
+        return Snapshot(seq=int(manifest["seq"]), written=str(manifest.get("written", "")), frames=frames)
+
+    def read(self) -> Snapshot | None:
+        manifest = self._read_manifest()
+        if manifest is None:
+            return self._current
+        seq = int(manifest["seq"])
+        if self._current is not None and seq == self._current.seq:
+            return self._current
+
+        try:
+            snap = self._load(manifest)
+        except (pd.errors.ParserError, pd.errors.EmptyDataError, ValueError, KeyError):
+            snap = None
+        after = self._read_manifest()
+        # seq + 1 went to the other slot; seq + 2 may have overwritten the one we just read
+        if snap is not None and after is not None and int(after["seq"]) >= seq + 2:
+            snap = None
+        if snap is None:
+            self.rejected += 1
+            return self._current
+        self._current = snap
+        return snap
+
+
+class SnapshotWriter:
+    """Python stand-in for the EA side of the protocol (tests, replays, MT5 bridges)."""
+
+    def __init__(self, root: str | Path, symbol: str, *, seq: int = 0) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.symbol = symbol
+        self.seq = int(seq)
+
+    def write_slot(self, frames: dict[str, pd.DataFrame], seq: int) -> dict[str, dict]:
+        slot = seq % 2
+        files: dict[str, dict] = {}
+        for tf, df in frames.items():
+            out = df.copy()
+            # Same layout the EA writes: MT4 time format, tick_volume column, CRLF
+            out["time"] = pd.to_datetime(out["time"]).dt.strftime("%Y.%m.%d %H:%M:%S")
+            out = out.rename(columns={"volume": "tick_volume"})[["time", "open", "high", "low", "close", "tick_volume"]]
+            data = out.to_csv(index=False, lineterminator="\r\n").encode("utf-8")
+            final = slot_path(self.root, self.symbol, tf, slot)
+            tmp = final.with_suffix(final.suffix + ".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, final)
+            files[tf] = {"name": final.name, "rows": int(len(out)), "bytes": len(data)}
+        return files
+
+    def publish_manifest(self, files: dict[str, dict], seq: int, written: str = "") -> None:
+        payload = {
+            "version": MANIFEST_VERSION,
+            "symbol": self.symbol,
+            "seq": int(seq),
+            "slot": int(seq % 2),
+            "written": written,
+            "files": files,
+        }
+        final = manifest_path(self.root, self.symbol)
+        tmp = final.with_suffix(final.suffix + ".tmp")
+        tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, final)
+
+    def publish(self, frames: dict[str, pd.DataFrame], *, written: str = "") -> int:
+        seq = self.seq + 1
+        files = self.write_slot(frames, seq)
+        self.publish_manifest(files, seq, written)
+        self.seq = seq
+        return seq
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import argparse
+import os
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from agent_trader.utils import pip_value
+
+
+TICK_DTYPE = np.dtype([("time", "<i8"), ("bid", "<f4"), ("ask", "<f4")])
+_DAY_NS = 86_400 * 1_000_000_000
+
+
+@dataclass(frozen=True)
+class TickIngestResult:
+    ticks: int
+    days: int
+
+
+def _to_ns(times) -> np.ndarray:
+    # Naive nanoseconds; aware times are taken in UTC, naive ones as they are (like HistoryStore)
+    t = pd.to_datetime(pd.Series(times))
+    if getattr(t.dt, "tz", None) is not None:
+        t = t.dt.tz_convert("UTC").dt.tz_localize(None)
+    return t.to_numpy(dtype="datetime64[ns]").view("i8")
+
+
+def read_tick_csv(path: str | Path) -> pd.DataFrame:
+    """Exported ticks: `time` (text or epoch milliseconds), `bid`, `ask`; extra columns are ignored."""
+    df = pd.read_csv(path)
+    if pd.api.types.is_numeric_dtype(df["time"]):
+        df["time"] = pd.to_datetime(df["time"], unit="ms")
+    return df[["time", "bid", "ask"]]
+
+
+class TickStore:
+    """Bid/ask ticks for one symbol, one memory-mapped `.npy` partition per day.
+
+    Each partition is a sorted structured array of (int64 ns time, float32 bid, float32 ask),
+    so as-of lookups are a `searchsorted` on the mapped time column.
+    """
+
+    def __init__(self, root: str | Path, symbol: str) -> None:
+        self.symbol = symbol
+        self.dir = Path(root) / symbol
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._maps: dict[date, np.ndarray] = {}
+
+    def _path(self, d: date) -> Path:
+        return self.dir / f"{d.isoformat()}.ticks.npy"
+
+    def days(self) -> list[date]:
+        return sorted(date.fromisoformat(p.name.split(".")[0]) for p in self.dir.glob("*.ticks.npy"))
+
+    def day(self, d: date) -> np.ndarray:
+        arr = self._maps.get(d)
+        if arr is None:
+            path = self._path(d)
+            arr = np.load(path, mmap_mode="r") if path.exists() else np.zeros(0, dtype=TICK_DTYPE)
+            self._maps[d] = arr
+        return arr
+
+    def ingest_frame(self, df: pd.DataFrame) -> TickIngestResult:
+        if df.empty:
+            return TickIngestResult(ticks=0, days=0)
+        new = np.zeros(len(df), dtype=TICK_DTYPE)
+        new["time"] = _to_ns(df["time"])
+        new["bid"] = df["bid"].to_numpy(dtype=np.float32)
+        new["ask"] = df["ask"].to_numpy(dtype=np.float32)
+        day_no = new["time"] // _DAY_NS
+        touched = 0
+        for dn in np.unique(day_no):
+            d = date.fromordinal(date(1970, 1, 1).toordinal() + int(dn))
+            self._maps.pop(d, None)
+            path = self._path(d)
+            merged = np.concatenate([np.load(path), new[day_no == dn]]) if path.exists() else new[day_no == dn]
+            # Re-exported ranges overlap: keep one tick per timestamp, the latest ingested
+            merged = merged[::-1]
+            _, first = np.unique(merged["time"], return_index=True)
+            merged = merged[first]
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, merged)
+            os.replace(tmp, path)
+            touched += 1
+        return TickIngestResult(ticks=len(new), days=touched)
+
+    def ingest_csv(self, path: str | Path) -> TickIngestResult:
+        return self.ingest_frame(read_tick_csv(path))
+
+    def quotes_asof(self, times, *, max_age_seconds: float | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Bid and ask of the last tick at or before each time; NaN without one (or when too old)."""
+        q = _to_ns(times)
+        bid = np.full(len(q), np.nan)
+        ask = np.full(len(q), np.nan)
+        tick_t = np.full(len(q), np.iinfo(np.int64).min)
+        stored = self.days()
+        if not stored or not len(q):
+            return bid, ask
+        q_day = q // _DAY_NS
+        epoch = date(1970, 1, 1).toordinal()
+        stored_no = np.array([d.toordinal() - epoch for d in stored], dtype=np.int64)
+        for dn in np.unique(q_day):
+            sel = np.nonzero(q_day == dn)[0]
+            # Partition that holds the query day, or the last one before it
+            k = int(np.searchsorted(stored_no, dn, side="right")) - 1
+            while k >= 0 and len(sel):
+                arr = self.day(stored[k])
+                pos = np.searchsorted(arr["time"], q[sel], side="right") - 1
+                ok = pos >= 0
+                idx = sel[ok]
+                bid[idx] = arr["bid"][pos[ok]]
+                ask[idx] = arr["ask"][pos[ok]]
+                tick_t[idx] = arr["time"][pos[ok]]
+                # Queries earlier than the day's first tick look one partition further back
+                sel = sel[~ok]
+                k -= 1
+        if max_age_seconds is not None:
+            stale = (q - tick_t) > int(max_age_seconds * 1e9)
+            bid[stale] = np.nan
+            ask[stale] = np.nan
+        return bid, ask
+
+    def spread_pips(self, times, *, max_age_seconds: float | None = None) -> np.ndarray:
+        bid, ask = self.quotes_asof(times, max_age_seconds=max_age_seconds)
+        return (ask - bid) / pip_value(self.symbol)
+
+
+def bar_spread_pips(store: TickStore, bars: pd.DataFrame, *, max_age_seconds: float | None = 3600.0) -> np.ndarray:
+    # Spread quoted at each bar's open, which is when `simulate_trades` fills entries and cutoff exits
+    return store.spread_pips(bars["time"], max_age_seconds=max_age_seconds)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--root", required=True)
+    ap.add_argument("--symbol", required=True)
+    ap.add_argument("--from-mt5", action="store_true")
+    ap.add_argument("--start", default="")
+    ap.add_argument("--end", default="")
+    ap.add_argument("csv", nargs="*")
+    args = ap.parse_args()
+
+    store = TickStore(args.root, args.symbol)
+    if args.from_mt5:
+        from agent_trader.data.mt5_loader import download_ticks
+
+        if not args.start or not args.end:
+            raise SystemExit("--start/--end are required with --from-mt5")
+        df = download_ticks(symbol=args.symbol, start=datetime.fromisoformat(args.start), end=datetime.fromisoformat(args.end))
+        res = store.ingest_frame(df)
+        print(f"{args.symbol}: +{res.ticks} ticks from MT5 over {res.days} days")
+    for path in args.csv:
+        res = store.ingest_csv(path)
+        print(f"{args.symbol}: +{res.ticks} ticks from {path} over {res.days} days")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,6 +5,7 @@ from dataclasses import dataclass
 import pandas as pd
 
 from agent_trader.config import TradingConfig
+from agent_trader.data.resample import resample_ohlcv
 from agent_trader.strategy.trend import compute_trend_context
 from agent_trader.types import TradeCandidate
 from agent_trader.utils import infer_session, price_to_pips
@@ -14,16 +15,27 @@ from agent_trader.utils import infer_session, price_to_pips
 class FeatureRow:
     time: object
     features: dict[str, float | int | str | None]
+    candidate_id: str = ""
+
+
+def candidates_for_rows(candidates: list[TradeCandidate], rows: list[FeatureRow]) -> list[TradeCandidate]:
+    """The candidate behind each feature row, in row order (`build_feature_rows` skips some candidates)."""
+    by_id = {c.candidate_id: c for c in candidates}
+    return [by_id[r.candidate_id] for r in rows]
 
 
 def build_feature_rows(
     *,
     cfg: TradingConfig,
-    h4: pd.DataFrame,
-    h1: pd.DataFrame,
+    h4: pd.DataFrame | None,
+    h1: pd.DataFrame | None,
     m15: pd.DataFrame,
     candidates: list[TradeCandidate],
 ) -> list[FeatureRow]:
+    if h4 is None:
+        h4 = resample_ohlcv(m15, "H4")
+    if h1 is None:
+        h1 = resample_ohlcv(m15, "H1")
     h4_ctx = compute_trend_context(h4)
     h1_ctx = compute_trend_context(h1)
     m15 = m15.reset_index(drop=True)
@@ -88,5 +100,5 @@ def build_feature_rows(
             "prev_close": float(prev["close"]),
             "cur_close": float(row["close"]),
         }
-        rows.append(FeatureRow(time=c.time, features=f))
+        rows.append(FeatureRow(time=c.time, features=f, candidate_id=c.candidate_id))
     return rows
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from agent_trader.config import TradingConfig
+from agent_trader.types import Side, TradeCandidate
+from agent_trader.utils import pip_value, within_day_cutoff
+
+
+@dataclass(frozen=True)
+class BarrierConfig:
+    """One exit setting to label under. `sl_pips` / `tp_pips` of None keep the candidate's own levels."""
+
+    name: str
+    sl_pips: float | None = None
+    tp_pips: float | None = None
+    max_lookahead_bars: int = 48
+    break_even_after_rr: float = 1.0
+
+
+DEFAULT_BARRIER = BarrierConfig(name="base")
+_SPEC_FIELDS = {"sl": "sl_pips", "tp": "tp_pips", "bars": "max_lookahead_bars", "be": "break_even_after_rr"}
+
+
+def parse_barrier(spec: str) -> BarrierConfig:
+    """`NAME:sl=8,tp=12,bars=16,be=0.5`; omitted fields keep their defaults."""
+    name, _, rest = spec.partition(":")
+    kw: dict = {}
+    for part in filter(None, rest.split(",")):
+        key, _, value = part.partition("=")
+        field = _SPEC_FIELDS.get(key.strip())
+        if field is None or not value:
+            raise ValueError(f"Bad barrier field {part!r} in {spec!r}; expected one of {sorted(_SPEC_FIELDS)}")
+        kw[field] = int(value) if field == "max_lookahead_bars" else float(value)
+    if not name.strip():
+        raise ValueError(f"Barrier spec needs a name: {spec!r}")
+    return BarrierConfig(name=name.strip(), **kw)
+
+
+def _first(mask: np.ndarray) -> np.ndarray:
+    # Column of the first True per row, mask.shape[1] when there is none
+    hit = mask.any(axis=1)
+    return np.where(hit, mask.argmax(axis=1), mask.shape[1])
+
+
+def _label_block(
+    *,
+    b: BarrierConfig,
+    pip: float,
+    buy: np.ndarray,
+    entry: np.ndarray,
+    sl: np.ndarray,
+    tp: np.ndarray,
+    start: np.ndarray,
+    start_ns: np.ndarray,
+    avail: np.ndarray,
+    day_k: np.ndarray,
+    hi: np.ndarray,
+    lo: np.ndarray,
+    times_ns: np.ndarray,
+    break_even_label: str,
+) -> dict[str, np.ndarray]:
+    L = int(b.max_lookahead_bars)
+    hi, lo = hi[:, :L], lo[:, :L]
+    n = len(entry)
+    sgn = np.where(buy, 1.0, -1.0)
+    if b.sl_pips is not None:
+        sl = entry - sgn * (float(b.sl_pips) * pip)
+    if b.tp_pips is not None:
+        tp = entry + sgn * (float(b.tp_pips) * pip)
+    sl_pips = np.abs(entry - sl) / pip
+    tp_pips = np.abs(tp - entry) / pip
+    with np.errstate(divide="ignore", invalid="ignore"):
+        be_trigger = np.where(tp_pips != 0, entry + (tp - entry) * (float(b.break_even_after_rr) * (sl_pips / tp_pips)), np.nan)
+
+    k = np.arange(L)
+    # Bars that can resolve the trade: inside the data and before the day changes
+    live = k[None, :] < np.minimum(avail, day_k)[:, None]
+    e, s, t, be = entry[:, None], sl[:, None], tp[:, None], be_trigger[:, None]
+    fav = np.where(buy[:, None], hi - e, e - lo) / pip
+    adv = np.where(buy[:, None], lo - e, e - hi) / pip
+    hit_sl = np.where(buy[:, None], lo <= s, hi >= s) & live
+    hit_tp = np.where(buy[:, None], hi >= t, lo <= t) & live
+    be_hit = np.where(buy[:, None], hi >= be, lo <= be) & live
+
+    first_hit = _first(hit_sl | hit_tp)
+    rows = np.arange(n)
+    resolved = first_hit < L
+    fk = np.minimum(first_hit, L - 1)
+    both = hit_sl[rows, fk] & hit_tp[rows, fk] & resolved
+    only_tp = hit_tp[rows, fk] & ~both & resolved
+    only_sl = hit_sl[rows, fk] & ~both & resolved
+    armed = _first(be_hit) <= first_hit
+    overnight = ~resolved & (day_k < np.minimum(avail, L))
+
+    # Bars counted in MFE / MAE: up to and including the resolving bar, else everything live
+    last = np.where(resolved, first_hit, np.minimum(np.minimum(avail, day_k), L) - 1)
+    seen = k[None, :] <= last[:, None]
+    mfe = np.maximum(0.0, np.where(seen, fav, -np.inf).max(axis=1, initial=-np.inf))
+    mae = np.minimum(0.0, np.where(seen, adv, np.inf).min(axis=1, initial=np.inf))
+
+    label = np.full(n, break_even_label, dtype=object)
+    label[both | (only_sl & ~armed)] = "loss"
+    label[only_tp] = "win"
+    price = entry.copy()
+    price[both | (only_sl & ~armed)] = sl[both | (only_sl & ~armed)]
+    price[only_tp] = tp[only_tp]
+
+    end_bar = np.where(resolved, start + 1 + first_hit, np.where(overnight, start + 1 + day_k, np.minimum(len(times_ns) - 1, start + L)))
+    minutes = (times_ns[end_bar] - start_ns) // 60_000_000_000
+    return {
+        f"{b.name}_label": label,
+        f"{b.name}_mfe_pips": mfe,
+        f"{b.name}_mae_pips": mae,
+        f"{b.name}_minutes_to_outcome": minutes.astype(np.int64),
+        f"{b.name}_outcome_price": price,
+    }
+
+
+def label_candidates_batch(
+    *,
+    cfg: TradingConfig,
+    m15: pd.DataFrame,
+    candidates: list[TradeCandidate],
+    barriers: Sequence[BarrierConfig] = (DEFAULT_BARRIER,),
+    break_even_label: str = "breakeven",
+    block_rows: int = 20000,
+) -> pd.DataFrame:
+    """Wide label table: one row per labelable candidate, five columns per barrier.
+
+    Every barrier gives the same results as `label_candidates` with the matching levels, lookahead
+    and break-even, but the high/low windows are gathered once and each barrier is a few array ops.
+    """
+    names = [b.name for b in barriers]
+    if len(set(names)) != len(names):
+        raise ValueError("barrier names must be unique")
+    if any(int(b.max_lookahead_bars) < 1 for b in barriers):
+        raise ValueError("max_lookahead_bars must be >= 1")
+    m15 = m15.reset_index(drop=True)
+    time_index = pd.to_datetime(m15["time"])
+    idx_by_time = {t.to_pydatetime(): i for i, t in enumerate(time_index)}
+    times_ns = time_index.to_numpy(dtype="datetime64[ns]").view("i8")
+    day = np.array([d.toordinal() for d in time_index.dt.date], dtype=np.int64)
+    highs = m15["high"].to_numpy(dtype=float)
+    lows = m15["low"].to_numpy(dtype=float)
+
+    kept = [
+        (c, i)
+        for c in candidates
+        if (i := idx_by_time.get(c.time)) is not None and within_day_cutoff(c.time, cfg.timezone, cfg.day_end_cutoff)
+    ]
+    cols: dict[str, list[np.ndarray]] = {"candidate_id": [], "time": []}
+    L_max = max((int(b.max_lookahead_bars) for b in barriers), default=0)
+    pip = pip_value(cfg.symbol)
+    for lo_row in range(0, len(kept), max(1, int(block_rows))):
+        block = kept[lo_row : lo_row + int(block_rows)]
+        start = np.array([i for _, i in block], dtype=np.int64)
+        # Window column k is bar start + 1 + k, clipped at the end of the data (masked by `avail`)
+        win = np.minimum(start[:, None] + 1 + np.arange(L_max)[None, :], len(m15) - 1)
+        avail = (len(m15) - 1 - start).astype(np.int64)
+        if cfg.allow_overnight:
+            day_k = np.full(len(block), L_max, dtype=np.int64)
+        else:
+            day_k = _first(day[win] != day[start][:, None])
+        common = dict(
+            pip=pip,
+            buy=np.array([c.side == Side.BUY for c, _ in block]),
+            entry=np.array([c.entry_price for c, _ in block], dtype=float),
+            sl=np.array([c.sl_price for c, _ in block], dtype=float),
+            tp=np.array([c.tp_price for c, _ in block], dtype=float),
+            start=start,
+            start_ns=np.array([pd.Timestamp(c.time).value for c, _ in block], dtype=np.int64),
+            avail=avail,
+            day_k=day_k,
+            hi=highs[win],
+            lo=lows[win],
+            times_ns=times_ns,
+            break_even_label=break_even_label,
+        )
+        cols["candidate_id"].append(np.array([c.candidate_id for c, _ in block], dtype=object))
+        cols["time"].append(np.array([c.time for c, _ in block], dtype=object))
+        for b in barriers:
+            for name, values in _label_block(b=b, **common).items():
+                cols.setdefault(name, []).append(values)
+    return pd.DataFrame({name: np.concatenate(parts) if parts else [] for name, parts in cols.items()})
@@ -1,4 +1,7 @@
 __all__ = [
     "model",
+    "compiled",
+    "budget",
+    "memo",
 ]
 
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import brier_score_loss, roc_auc_score
+from sklearn.model_selection import TimeSeriesSplit
+
+from agent_trader.ml.model import CalibrationSource, _make_pipeline, _training_frame
+
+
+@dataclass(frozen=True)
+class BudgetThresholds:
+    sample_fractions: tuple[float, ...] = (0.25, 0.5, 1.0)
+    tree_counts: tuple[int, ...] = (25, 50, 100, 250, 500)
+    max_depths: tuple[int, ...] = (4, 6)
+    # The dataset is cut into this many contiguous time blocks before subsampling
+    time_blocks: int = 20
+    n_splits: int = 5
+    # A cheaper configuration is kept when it stays this close to the best one at full sample size
+    auc_tolerance: float = 0.005
+    brier_tolerance: float = 0.002
+
+
+DEFAULT_BUDGET = BudgetThresholds()
+
+
+@dataclass(frozen=True)
+class CurvePoint:
+    fraction: float
+    samples: int
+    n_estimators: int
+    max_depth: int
+    roc_auc: float
+    brier: float
+    # Wall time of the fold fits, scaled to this tree count
+    fit_seconds: float
+
+
+@dataclass(frozen=True)
+class BudgetReport:
+    points: list[CurvePoint]
+    recommended: CurvePoint
+    full_samples: int
+    # Seconds per tree per (m * log2 m) training rows, by max_depth
+    cost_coef: dict[int, float]
+    estimated_full_seconds: dict[str, float] = field(default_factory=dict)
+
+
+def time_block_subsample(df: pd.DataFrame, fraction: float, blocks: int) -> pd.DataFrame:
+    """Keeps round(fraction * blocks) contiguous time blocks spread evenly over the history.
+
+    Whole blocks keep the bar-to-bar structure the time-series folds rely on; spreading them
+    keeps every market period in the sample instead of only the most recent one.
+    """
+    n = len(df)
+    blocks = max(1, min(int(blocks), n))
+    k = max(1, min(blocks, int(round(float(fraction) * blocks))))
+    if k == blocks:
+        return df.reset_index(drop=True)
+    edges = np.linspace(0, n, blocks + 1).astype(int)
+    chosen = np.unique(np.round(np.linspace(0, blocks - 1, k)).astype(int))
+    idx = np.concatenate([np.arange(edges[b], edges[b + 1]) for b in chosen])
+    return df.iloc[idx].reset_index(drop=True)
+
+
+def _size_term(rows: float) -> float:
+    return float(rows) * math.log2(max(float(rows), 2.0))
+
+
+def _prefix_oof(
+    X: pd.DataFrame,
+    y: pd.Series,
+    cat_cols: list[str],
+    num_cols: list[str],
+    *,
+    n_splits: int,
+    tree_counts: tuple[int, ...],
+    max_depth: int,
+    n_jobs: int = -1,
+) -> tuple[dict[int, np.ndarray], np.ndarray, float, list[tuple[int, float]]]:
+    # One forest with the largest tree count per fold; its first k trees are a k-tree forest
+    # with the same seed, so every tree count is scored from the same fits
+    total = max(tree_counts)
+    oof = {k: np.zeros(len(X), dtype=float) for k in tree_counts}
+    covered = np.zeros(len(X), dtype=bool)
+    fit_seconds = 0.0
+    timings: list[tuple[int, float]] = []
+    for tr, te in TimeSeriesSplit(n_splits=n_splits).split(X):
+        pipe = _make_pipeline(cat_cols, num_cols, n_estimators=total, max_depth=max_depth, n_jobs=n_jobs)
+        t0 = time.perf_counter()
+        pipe.fit(X.iloc[tr], y.iloc[tr])
+        dt = time.perf_counter() - t0
+        fit_seconds += dt
+        timings.append((len(tr), dt / total))
+        covered[te] = True
+
+        clf = pipe.named_steps["clf"]
+        if len(clf.classes_) < 2:
+            val = 1.0 if clf.classes_[0] == 1 else 0.0
+            for k in tree_counts:
+                oof[k][te] = val
+            continue
+        Xt = pipe.named_steps["pre"].transform(X.iloc[te])
+        per_tree = np.column_stack([t.predict_proba(Xt)[:, 1] for t in clf.estimators_])
+        csum = np.cumsum(per_tree, axis=1)
+        for k in tree_counts:
+            oof[k][te] = csum[:, k - 1] / float(k)
+    return oof, covered, fit_seconds, timings
+
+
+def estimate_train_seconds(
+    coef: float, rows: int, *, n_estimators: int, calibration_source: CalibrationSource = "cv", n_splits: int = 5
+) -> float:
+    """Extrapolated wall time of `train_probability_model` on `rows` samples."""
+    # OOF folds train on growing prefixes, then the full forest
+    step = rows // (n_splits + 1)
+    sizes = [rows - (n_splits - i) * step for i in range(n_splits)] + [rows]
+    if calibration_source == "cv":
+        # CalibratedClassifierCV(cv=5) refits on four fifths of the data per fold
+        sizes += [int(rows * 0.8)] * 5
+    return float(coef) * float(n_estimators) * sum(_size_term(m) for m in sizes)
+
+
+def run_budget(
+    df: pd.DataFrame,
+    *,
+    target_col: str = "label",
+    positive_label: str = "win",
+    drop_labels: Iterable[str] = ("breakeven",),
+    th: BudgetThresholds = DEFAULT_BUDGET,
+    baseline: tuple[int, int] = (500, 6),
+    calibration_source: CalibrationSource = "cv",
+    n_jobs: int = -1,
+) -> BudgetReport:
+    """Learning curve of OOF ROC AUC / Brier over sample size, tree count and depth.
+
+    Subsamples are whole time blocks (see `time_block_subsample`). The recommended point is the
+    cheapest configuration at full sample size within `auc_tolerance` / `brier_tolerance` of the best.
+    """
+    X_all, y_all, cat_cols, num_cols = _training_frame(df, target_col, positive_label, drop_labels)
+    frame = X_all.assign(_y=y_all.to_numpy())
+    tree_counts = tuple(sorted({int(k) for k in th.tree_counts}))
+    full_fraction = max(th.sample_fractions)
+
+    points: list[CurvePoint] = []
+    timings: dict[int, list[tuple[int, float]]] = {}
+    for fraction in sorted(th.sample_fractions):
+        sub = time_block_subsample(frame, fraction, th.time_blocks)
+        X, y = sub.drop(columns=["_y"]), sub["_y"]
+        n_splits = min(int(th.n_splits), len(X) - 1)
+        if n_splits < 2:
+            continue
+        for depth in th.max_depths:
+            oof, covered, fit_seconds, fold_timings = _prefix_oof(
+                X, y, cat_cols, num_cols, n_splits=n_splits, tree_counts=tree_counts, max_depth=int(depth), n_jobs=int(n_jobs)
+            )
+            timings.setdefault(int(depth), []).extend(fold_timings)
+            yc = y.to_numpy()[covered]
+            for k in tree_counts:
+                p = oof[k][covered]
+                points.append(
+                    CurvePoint(
+                        fraction=float(fraction),
+                        samples=int(len(X)),
+                        n_estimators=k,
+                        max_depth=int(depth),
+                        roc_auc=float(roc_auc_score(yc, p)) if len(np.unique(yc)) > 1 else float("nan"),
+                        brier=float(brier_score_loss(yc, p)),
+                        fit_seconds=fit_seconds * k / float(max(tree_counts)),
+                    )
+                )
+    if not points:
+        raise ValueError("too few samples for a learning curve")
+
+    # Least-squares fit of seconds_per_tree = coef * m * log2(m)
+    coef: dict[int, float] = {}
+    for depth, ts in timings.items():
+        f = np.array([_size_term(m) for m, _ in ts])
+        s = np.array([sec for _, sec in ts])
+        coef[depth] = float(np.dot(f, s) / max(float(np.dot(f, f)), 1e-12))
+
+    full = [p for p in points if p.fraction == full_fraction] or points
+    scored = [p for p in full if not math.isnan(p.roc_auc)]
+    if scored:
+        best_auc = max(p.roc_auc for p in scored)
+        best_brier = min(p.brier for p in scored)
+        ok = [p for p in scored if p.roc_auc >= best_auc - th.auc_tolerance and p.brier <= best_brier + th.brier_tolerance]
+    else:
+        ok = []
+    recommended = min(ok or full, key=lambda p: (p.fit_seconds, p.n_estimators, p.max_depth))
+
+    n_full = len(X_all)
+    estimates = {
+        "recommended": estimate_train_seconds(
+            coef[recommended.max_depth], n_full, n_estimators=recommended.n_estimators, calibration_source=calibration_source
+        )
+    }
+    base_trees, base_depth = int(baseline[0]), int(baseline[1])
+    base_coef = coef.get(base_depth, coef[max(coef)])
+    estimates["baseline"] = estimate_train_seconds(base_coef, n_full, n_estimators=base_trees, calibration_source=calibration_source)
+    return BudgetReport(
+        points=points,
+        recommended=recommended,
+        full_samples=int(n_full),
+        cost_coef=coef,
+        estimated_full_seconds=estimates,
+    )
@@ -0,0 +1,416 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Mapping, Sequence
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder
+
+from agent_trader.ml.model import ModelArtifacts, OOFCalibratedModel, load_model, predict_proba
+
+
+def _is_missing(v: Any) -> bool:
+    return v is None or (isinstance(v, float) and math.isnan(v))
+
+
+@dataclass(frozen=True)
+class CompiledEncoder:
+    """ColumnTransformer(OneHotEncoder + passthrough) flattened into per-column output positions."""
+
+    n_out: int
+    num: tuple[tuple[str, int], ...]
+    # Missing categories (None / NaN) are stored under the key None
+    cat: tuple[tuple[str, dict[Any, int]], ...]
+
+    def transform(self, rows: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        X = np.zeros((len(rows), self.n_out), dtype=np.float64)
+        for r, row in enumerate(rows):
+            for name, pos in self.num:
+                v = row.get(name)
+                X[r, pos] = np.nan if v is None else float(v)
+            for name, mapping in self.cat:
+                v = row.get(name)
+                pos = mapping.get(None if _is_missing(v) else v)
+                if pos is not None:
+                    X[r, pos] = 1.0
+        # The forest compares float32 features against float64 thresholds, like sklearn
+        return X.astype(np.float32)
+
+
+@dataclass(frozen=True)
+class CompiledForest:
+    """All trees of a fitted forest in flat node arrays; leaves carry the positive-class probability."""
+
+    left: np.ndarray
+    right: np.ndarray
+    feature: np.ndarray
+    threshold: np.ndarray
+    missing_left: np.ndarray
+    value: np.ndarray
+    roots: np.ndarray
+    depth: int
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        n = X.shape[0]
+        nodes = np.broadcast_to(self.roots, (n, len(self.roots))).copy()
+        rows = np.arange(n)[:, None]
+        for _ in range(self.depth):
+            leaf = self.left[nodes] < 0
+            if leaf.all():
+                break
+            x = X[rows, self.feature[nodes]]
+            go_left = np.where(np.isnan(x), self.missing_left[nodes], x <= self.threshold[nodes])
+            nxt = np.where(go_left, self.left[nodes], self.right[nodes])
+            nodes = np.where(leaf, nodes, nxt)
+        return self.value[nodes].sum(axis=1) / float(len(self.roots))
+
+
+@dataclass(frozen=True)
+class CompiledCalibrator:
+    method: str
+    a: float = 0.0
+    b: float = 0.0
+    x: np.ndarray | None = None
+    y: np.ndarray | None = None
+
+    def apply(self, p: np.ndarray) -> np.ndarray:
+        if self.method == "sigmoid":
+            return 1.0 / (1.0 + np.exp(self.a * p + self.b))
+        return np.interp(np.clip(p, self.x[0], self.x[-1]), self.x, self.y)
+
+
+@dataclass(frozen=True)
+class CompiledMember:
+    encoder: CompiledEncoder
+    forest: CompiledForest
+    calibrator: CompiledCalibrator | None
+
+    def predict(self, rows: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        p = self.forest.predict(self.encoder.transform(rows))
+        if self.calibrator is None:
+            return p
+        p = self.calibrator.apply(p)
+        p[(1.0 < p) & (p <= 1.0 + 1e-5)] = 1.0
+        return p
+
+
+@dataclass(frozen=True)
+class CompiledModel:
+    feature_columns: tuple[str, ...]
+    calibration_method: str
+    members: tuple[CompiledMember, ...]
+
+    def predict_rows(self, rows: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        out = np.zeros(len(rows), dtype=np.float64)
+        if not rows:
+            return out
+        for m in self.members:
+            out += m.predict(rows)
+        return out / float(len(self.members))
+
+    def predict_one(self, row: Mapping[str, Any]) -> float:
+        return float(self.predict_rows([row])[0])
+
+
+@dataclass(frozen=True)
+class PipelineScorer:
+    """Same scoring interface over the sklearn model, for backends that are not compiled (hgb)."""
+
+    artifacts: ModelArtifacts
+
+    def predict_rows(self, rows: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        if not rows:
+            return np.zeros(0, dtype=np.float64)
+        X = pd.DataFrame(list(rows), columns=self.artifacts.feature_columns)
+        # A few all-missing rows would otherwise infer float64 for a categorical column
+        pre = self.artifacts.raw_pipeline.named_steps["pre"]
+        cat_cols = [c for name, _, cols in pre.transformers_ if name == "cat" for c in cols]
+        X[cat_cols] = X[cat_cols].astype(object)
+        return np.asarray(predict_proba(self.artifacts, X), dtype=np.float64)
+
+    def predict_one(self, row: Mapping[str, Any]) -> float:
+        return float(self.predict_rows([row])[0])
+
+
+def _compile_encoder(pre: ColumnTransformer) -> CompiledEncoder:
+    num: list[tuple[str, int]] = []
+    cat: list[tuple[str, dict[Any, int]]] = []
+    n_out = 0
+    for name, trans, cols in pre.transformers_:
+        sl = pre.output_indices_.get(name)
+        if sl is None or sl.stop == sl.start:
+            continue
+        n_out = max(n_out, sl.stop)
+        if (isinstance(trans, str) and trans == "passthrough") or (isinstance(trans, FunctionTransformer) and trans.func is None):
+            # Fitted "passthrough" shows up as an identity FunctionTransformer
+            num.extend((str(c), sl.start + k) for k, c in enumerate(cols))
+        elif isinstance(trans, OneHotEncoder):
+            pos = sl.start
+            for c, cats in zip(cols, trans.categories_):
+                mapping: dict[Any, int] = {}
+                for v in cats:
+                    mapping[None if _is_missing(v) else v] = pos
+                    pos += 1
+                cat.append((str(c), mapping))
+        else:
+            raise TypeError(f"Cannot compile transformer {name!r} ({type(trans).__name__})")
+    return CompiledEncoder(n_out=n_out, num=tuple(num), cat=tuple(cat))
+
+
+def _compile_forest(clf: RandomForestClassifier) -> CompiledForest:
+    classes = list(clf.classes_)
+    lefts, rights, feats, thrs, miss, vals, roots = [], [], [], [], [], [], []
+    offset = 0
+    depth = 0
+    for est in clf.estimators_:
+        t = est.tree_
+        leaf = t.children_left < 0
+        lefts.append(np.where(leaf, -1, t.children_left + offset))
+        rights.append(np.where(leaf, -1, t.children_right + offset))
+        feats.append(np.where(leaf, 0, t.feature))
+        thrs.append(np.where(leaf, 0.0, t.threshold))
+        mgl = getattr(t, "missing_go_to_left", None)
+        miss.append(np.zeros(t.node_count, dtype=bool) if mgl is None else np.asarray(mgl, dtype=bool))
+        v = t.value[:, 0, :]
+        if len(classes) == 2:
+            total = v.sum(axis=1)
+            total[total == 0.0] = 1.0
+            vals.append(v[:, 1] / total)
+        else:
+            vals.append(np.full(t.node_count, 1.0 if classes[0] == 1 else 0.0))
+        roots.append(offset)
+        offset += t.node_count
+        depth = max(depth, int(t.max_depth))
+    return CompiledForest(
+        left=np.concatenate(lefts).astype(np.int32),
+        right=np.concatenate(rights).astype(np.int32),
+        feature=np.concatenate(feats).astype(np.int32),
+        threshold=np.concatenate(thrs).astype(np.float64),
+        missing_left=np.concatenate(miss),
+        value=np.concatenate(vals).astype(np.float64),
+        roots=np.asarray(roots, dtype=np.int32),
+        depth=depth + 1,
+    )
+
+
+def _compile_pipeline(pipe: Pipeline) -> tuple[CompiledEncoder, CompiledForest]:
+    clf = pipe.named_steps["clf"]
+    if not isinstance(clf, RandomForestClassifier):
+        raise TypeError(f"Cannot compile classifier {type(clf).__name__}")
+    return _compile_encoder(pipe.named_steps["pre"]), _compile_forest(pipe.named_steps["clf"])
+
+
+def _compile_calibrator(cal: Any, method: str) -> CompiledCalibrator:
+    if method == "sigmoid":
+        return CompiledCalibrator(method="sigmoid", a=float(cal.a_), b=float(cal.b_))
+    return CompiledCalibrator(
+        method="isotonic",
+        x=np.asarray(cal.X_thresholds_, dtype=np.float64),
+        y=np.asarray(cal.y_thresholds_, dtype=np.float64),
+    )
+
+
+def compile_model(artifacts: ModelArtifacts) -> CompiledModel:
+    members: list[CompiledMember] = []
+    cal = artifacts.calibrated_model
+    if isinstance(cal, OOFCalibratedModel):
+        enc, forest = _compile_pipeline(cal.estimator)
+        if cal.method == "sigmoid":
+            calibrator = CompiledCalibrator(method="sigmoid", a=cal.a, b=cal.b)
+        else:
+            calibrator = _compile_calibrator(cal.isotonic, "isotonic")
+        members.append(CompiledMember(enc, forest, calibrator))
+    elif cal is not None:
+        for cc in cal.calibrated_classifiers_:
+            enc, forest = _compile_pipeline(cc.estimator)
+            members.append(CompiledMember(enc, forest, _compile_calibrator(cc.calibrators[0], artifacts.calibration_method)))
+    else:
+        enc, forest = _compile_pipeline(artifacts.raw_pipeline)
+        members.append(CompiledMember(enc, forest, None))
+    return CompiledModel(
+        feature_columns=tuple(artifacts.feature_columns),
+        calibration_method=artifacts.calibration_method,
+        members=tuple(members),
+    )
+
+
+def save_compiled(model: CompiledModel, path: str) -> None:
+    joblib.dump(model, path)
+
+
+def load_compiled(path: str) -> CompiledModel:
+    return joblib.load(path)
+
+
+LEAN_FORMAT = "agent_trader.compiled"
+LEAN_VERSION = 1
+LEAN_MANIFEST = "manifest.json"
+_FOREST_ARRAYS = ("left", "right", "feature", "threshold", "missing_left", "value", "roots")
+
+
+def _json_value(v: Any) -> Any:
+    return v.item() if isinstance(v, np.generic) else v
+
+
+def _lean_files(members: list[dict]) -> set[str]:
+    files = {f for mem in members for f in mem["forest"]["arrays"].values()}
+    files |= {mem["calibrator"][k] for mem in members if mem["calibrator"] for k in ("x", "y") if k in mem["calibrator"]}
+    return files
+
+
+def save_lean(model: CompiledModel, out_dir: str | Path, *, metadata: Mapping[str, Any] | None = None) -> Path:
+    """Writes `model` as raw .npy node arrays plus a JSON manifest (format `LEAN_VERSION`).
+
+    Array files carry a per-save token and the manifest is replaced last. The arrays of the manifest
+    being replaced are kept until the next save, so a reader that already parsed it can still map them.
+    """
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    token = f"{time.time_ns():x}"
+    members = []
+    for i, m in enumerate(model.members):
+        arrays: dict[str, str] = {}
+        for name in _FOREST_ARRAYS:
+            fname = f"m{i}.{name}.{token}.npy"
+            np.save(out / fname, np.ascontiguousarray(getattr(m.forest, name)), allow_pickle=False)
+            arrays[name] = fname
+        cal = None
+        if m.calibrator is not None:
+            cal = {"method": m.calibrator.method, "a": float(m.calibrator.a), "b": float(m.calibrator.b)}
+            if m.calibrator.method != "sigmoid":
+                for name in ("x", "y"):
+                    fname = f"m{i}.cal_{name}.{token}.npy"
+                    np.save(out / fname, np.asarray(getattr(m.calibrator, name), dtype=np.float64), allow_pickle=False)
+                    cal[name] = fname
+        members.append(
+            {
+                "encoder": {
+                    "n_out": int(m.encoder.n_out),
+                    "num": [[name, int(pos)] for name, pos in m.encoder.num],
+                    "cat": [[name, [[_json_value(v), int(pos)] for v, pos in mapping.items()]] for name, mapping in m.encoder.cat],
+                },
+                "forest": {"depth": int(m.forest.depth), "arrays": arrays},
+                "calibrator": cal,
+            }
+        )
+    manifest = {
+        "format": LEAN_FORMAT,
+        "version": LEAN_VERSION,
+        "feature_columns": list(model.feature_columns),
+        "calibration_method": model.calibration_method,
+        "members": members,
+        "metadata": dict(metadata or {}),
+    }
+    # A reader may have parsed the manifest being replaced and not mapped its arrays yet,
+    # so the previous generation survives this save and is only removed by the next one
+    keep = _lean_files(members)
+    try:
+        keep |= _lean_files(json.loads((out / LEAN_MANIFEST).read_text(encoding="utf-8")).get("members", []))
+    except (OSError, ValueError):
+        pass
+    tmp = out / (LEAN_MANIFEST + ".tmp")
+    tmp.write_text(json.dumps(manifest, default=str, indent=1), encoding="utf-8")
+    os.replace(tmp, out / LEAN_MANIFEST)
+
+    for f in out.glob("m*.npy"):
+        if f.name not in keep:
+            try:
+                f.unlink()
+            except OSError:
+                # Still mapped by a reader on Windows; the next save retries
+                pass
+    return out
+
+
+def read_lean_manifest(path: str | Path) -> dict:
+    manifest = json.loads((Path(path) / LEAN_MANIFEST).read_text(encoding="utf-8"))
+    if manifest.get("format") != LEAN_FORMAT or int(manifest.get("version", 0)) != LEAN_VERSION:
+        raise ValueError(f"Unsupported model format {manifest.get('format')!r} v{manifest.get('version')}")
+    return manifest
+
+
+def load_lean(path: str | Path, *, mmap: bool = True) -> CompiledModel:
+    """Loads a `save_lean` directory; with `mmap` the node arrays are read-only file mappings
+    shared by every process that loads the same files."""
+    root = Path(path)
+    manifest = read_lean_manifest(root)
+    mode = "r" if mmap else None
+    members = []
+    for mem in manifest["members"]:
+        arrays = {k: np.load(root / f, mmap_mode=mode, allow_pickle=False) for k, f in mem["forest"]["arrays"].items()}
+        forest = CompiledForest(depth=int(mem["forest"]["depth"]), **arrays)
+        cal = mem["calibrator"]
+        calibrator = None
+        if cal is not None:
+            calibrator = CompiledCalibrator(
+                method=cal["method"],
+                a=float(cal["a"]),
+                b=float(cal["b"]),
+                x=np.load(root / cal["x"], mmap_mode=mode) if "x" in cal else None,
+                y=np.load(root / cal["y"], mmap_mode=mode) if "y" in cal else None,
+            )
+        enc = mem["encoder"]
+        encoder = CompiledEncoder(
+            n_out=int(enc["n_out"]),
+            num=tuple((name, int(pos)) for name, pos in enc["num"]),
+            cat=tuple((name, {v: int(pos) for v, pos in pairs}) for name, pairs in enc["cat"]),
+        )
+        members.append(CompiledMember(encoder, forest, calibrator))
+    return CompiledModel(
+        feature_columns=tuple(manifest["feature_columns"]),
+        calibration_method=str(manifest["calibration_method"]),
+        members=tuple(members),
+    )
+
+
+_CACHE: dict[str, tuple[int, CompiledModel | PipelineScorer]] = {}
+
+
+def load_compiled_cached(model_path: str) -> CompiledModel | PipelineScorer:
+    # Recompiles only when the model file is replaced (retrain), keyed by mtime;
+    # a lean directory is keyed by its manifest, which every save replaces last
+    lean = os.path.isdir(model_path)
+    mtime = os.stat(os.path.join(model_path, LEAN_MANIFEST) if lean else model_path).st_mtime_ns
+    hit = _CACHE.get(model_path)
+    if hit is not None and hit[0] == mtime:
+        return hit[1]
+    obj = load_lean(model_path) if lean else joblib.load(model_path)
+    if isinstance(obj, CompiledModel):
+        model = obj
+    elif getattr(obj, "backend", "rf") == "rf":
+        model = compile_model(obj)
+    else:
+        model = PipelineScorer(obj)
+    _CACHE[model_path] = (mtime, model)
+    return model
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", required=True)
+    ap.add_argument("--out", default="")
+    ap.add_argument("--lean-dir", default="")
+    args = ap.parse_args()
+    if not args.out and not args.lean_dir:
+        raise SystemExit("--out or --lean-dir is required")
+    model = compile_model(load_model(args.model))
+    if args.out:
+        save_compiled(model, args.out)
+    if args.lean_dir:
+        save_lean(model, args.lean_dir, metadata={"source_model": os.path.abspath(args.model)})
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
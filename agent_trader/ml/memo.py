@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import hashlib
+import math
+from collections import OrderedDict
+from typing import Any, Mapping, Protocol, Sequence
+
+import numpy as np
+
+
+class RowScorer(Protocol):
+    def predict_rows(self, rows: Sequence[Mapping[str, Any]]) -> np.ndarray: ...
+
+
+def _plain(v: Any) -> Any:
+    if isinstance(v, np.generic):
+        v = v.item()
+    if isinstance(v, float) and math.isnan(v):
+        return None
+    return v
+
+
+def row_key(row: Mapping[str, Any]) -> bytes:
+    # NaN and None hash alike, as both are "missing" to the encoder
+    items = sorted((str(k), _plain(v)) for k, v in row.items())
+    return hashlib.blake2b(repr(items).encode("utf-8"), digest_size=16).digest()
+
+
+class PredictionCache:
+    """Bounded LRU of probabilities keyed by (model, feature-row hash).
+
+    Rows scored in an earlier cycle are answered from memory; only new rows reach the model.
+    A different model object (hot reload) invalidates every entry.
+    """
+
+    def __init__(self, max_entries: int = 4096) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be > 0")
+        self.max_entries = int(max_entries)
+        self._model: RowScorer | None = None
+        self._store: OrderedDict[bytes, float] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def invalidate(self) -> None:
+        self._store.clear()
+        self.invalidations += 1
+
+    def predict_rows(self, model: RowScorer, rows: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        if model is not self._model:
+            if self._model is not None:
+                self.invalidate()
+            self._model = model
+        keys = [row_key(r) for r in rows]
+        out = np.zeros(len(rows), dtype=np.float64)
+        todo: dict[bytes, list[int]] = {}
+        for i, k in enumerate(keys):
+            p = self._store.get(k)
+            if p is None:
+                todo.setdefault(k, []).append(i)
+                continue
+            self._store.move_to_end(k)
+            out[i] = p
+            self.hits += 1
+        if todo:
+            self.misses += sum(len(ix) for ix in todo.values())
+            probs = model.predict_rows([rows[ix[0]] for ix in todo.values()])
+            for (k, ix), p in zip(todo.items(), probs):
+                out[ix] = float(p)
+                self._store[k] = float(p)
+            while len(self._store) > self.max_entries:
+                self._store.popitem(last=False)
+                self.evictions += 1
+        return out
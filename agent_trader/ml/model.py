@@ -1,30 +1,134 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Iterable
+from typing import Iterable, Literal
 
 import joblib
 import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed
 from sklearn.calibration import CalibratedClassifierCV
 from sklearn.compose import ColumnTransformer
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.isotonic import IsotonicRegression
 from sklearn.metrics import brier_score_loss, classification_report, roc_auc_score
 from sklearn.model_selection import TimeSeriesSplit
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder
+
+
+CalibrationSource = Literal["cv", "oof"]
+ModelBackend = Literal["rf", "hgb"]
+
+
+def _fit_platt(p: np.ndarray, y: np.ndarray, max_iter: int = 100) -> tuple[float, float]:
+    # Platt (1999) with the smoothed targets sklearn uses: P(y=1|p) = 1 / (1 + exp(a * p + b))
+    n_pos = float(np.sum(y == 1))
+    n_neg = float(len(y) - n_pos)
+    t = np.where(y == 1, (n_pos + 1.0) / (n_pos + 2.0), 1.0 / (n_neg + 2.0))
+    a, b = 0.0, float(np.log((n_neg + 1.0) / (n_pos + 1.0)))
+    for _ in range(max_iter):
+        q = 1.0 / (1.0 + np.exp(a * p + b))
+        # Gradient / Hessian of the log loss with respect to (a, b)
+        d = t - q
+        ga, gb = float(np.sum(d * p)), float(np.sum(d))
+        w = q * (1.0 - q)
+        haa, hab, hbb = float(np.sum(w * p * p)) + 1e-12, float(np.sum(w * p)), float(np.sum(w)) + 1e-12
+        det = haa * hbb - hab * hab
+        if det <= 0:
+            break
+        da = (hbb * ga - hab * gb) / det
+        db = (haa * gb - hab * ga) / det
+        a, b = a - da, b - db
+        if abs(da) < 1e-10 and abs(db) < 1e-10:
+            break
+    return a, b
+
+
+class OOFCalibratedModel:
+    """Full-data pipeline plus a calibrator fitted on its out-of-fold probabilities.
+
+    Stands in for CalibratedClassifierCV (same predict_proba contract) without refitting
+    one forest per calibration fold.
+    """
+
+    def __init__(self, estimator: Pipeline, method: str, *, a: float = 0.0, b: float = 0.0, isotonic: IsotonicRegression | None = None) -> None:
+        self.estimator = estimator
+        self.method = method
+        self.a = float(a)
+        self.b = float(b)
+        self.isotonic = isotonic
+        self.classes_ = np.array([0, 1])
+
+    @classmethod
+    def fit(cls, estimator: Pipeline, oof: np.ndarray, y: np.ndarray, method: str) -> "OOFCalibratedModel":
+        if method == "sigmoid":
+            a, b = _fit_platt(np.asarray(oof, dtype=float), np.asarray(y))
+            return cls(estimator, method, a=a, b=b)
+        iso = IsotonicRegression(out_of_bounds="clip", y_min=0.0, y_max=1.0).fit(oof, y)
+        return cls(estimator, method, isotonic=iso)
+
+    def calibrate(self, p: np.ndarray) -> np.ndarray:
+        if self.method == "sigmoid":
+            return 1.0 / (1.0 + np.exp(self.a * p + self.b))
+        return self.isotonic.predict(p)
+
+    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        raw = self.estimator.predict_proba(X)
+        p = raw[:, 1] if raw.shape[1] == 2 else np.full(len(X), 1.0 if self.estimator.classes_[0] == 1 else 0.0)
+        p1 = self.calibrate(p)
+        return np.column_stack([1.0 - p1, p1])
 
 
 @dataclass(frozen=True)
 class ModelArtifacts:
     raw_pipeline: Pipeline
-    calibrated_model: CalibratedClassifierCV | None
+    calibrated_model: CalibratedClassifierCV | OOFCalibratedModel | None
     calibration_method: str
     feature_columns: list[str]
     target_positive: str
+    backend: str = "rf"
+
+
+def _make_hgb_pipeline(cat_cols: list[str], num_cols: list[str], *, max_iter: int, max_depth: int | None) -> Pipeline:
+    # Categories become ordinal codes the booster splits on natively; unseen / missing map to NaN
+    pre = ColumnTransformer(
+        transformers=[
+            ("cat", OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=np.nan), cat_cols),
+            ("num", "passthrough", num_cols),
+        ],
+        remainder="drop",
+    )
+    clf = HistGradientBoostingClassifier(
+        learning_rate=0.05,
+        max_iter=int(max_iter),
+        max_depth=max_depth,
+        min_samples_leaf=10,
+        l2_regularization=1.0,
+        categorical_features=[True] * len(cat_cols) + [False] * len(num_cols),
+        early_stopping=True,
+        validation_fraction=0.15,
+        n_iter_no_change=20,
+        class_weight="balanced",
+        random_state=42,
+    )
+    return Pipeline([("pre", pre), ("clf", clf)])
 
 
-def _make_pipeline(cat_cols: list[str], num_cols: list[str]) -> Pipeline:
+def _make_pipeline(
+    cat_cols: list[str],
+    num_cols: list[str],
+    *,
+    backend: ModelBackend = "rf",
+    n_estimators: int = 500,
+    max_depth: int | None = 6,
+    n_jobs: int = -1,
+) -> Pipeline:
+    if backend == "hgb":
+        # n_estimators caps boosting iterations; early stopping usually ends well before it
+        return _make_hgb_pipeline(cat_cols, num_cols, max_iter=n_estimators, max_depth=max_depth)
+    if backend != "rf":
+        raise ValueError(f"Unknown model backend: {backend}")
     pre = ColumnTransformer(
         transformers=[
             ("cat", OneHotEncoder(handle_unknown="ignore"), cat_cols),
@@ -33,16 +137,70 @@ def _make_pipeline(cat_cols: list[str], num_cols: list[str]) -> Pipeline:
         remainder="drop",
     )
     clf = RandomForestClassifier(
-        n_estimators=500,
-        max_depth=6,
+        n_estimators=int(n_estimators),
+        max_depth=max_depth,
         min_samples_leaf=10,
         random_state=42,
         class_weight="balanced_subsample",
-        n_jobs=-1,
+        n_jobs=int(n_jobs),
     )
     return Pipeline([("pre", pre), ("clf", clf)])
 
 
+def _fit_fold(
+    X: pd.DataFrame, y: pd.Series, train_idx, test_idx, cat_cols: list[str], num_cols: list[str], forest_jobs: int, params: dict
+) -> np.ndarray:
+    pipe_fold = _make_pipeline(cat_cols, num_cols, n_jobs=forest_jobs, **params)
+    y_fold = y.iloc[train_idx]
+    pipe_fold.fit(X.iloc[train_idx], y_fold)
+
+    # Handle case where fold only has one class
+    p = pipe_fold.predict_proba(X.iloc[test_idx])
+    if p.shape[1] == 2:
+        return p[:, 1]
+    # If only one class seen, predict 1.0 if it was the positive class, else 0.0
+    val = 1.0 if y_fold.iloc[0] == 1 else 0.0
+    return np.full(len(test_idx), val)
+
+
+def _oof_predictions(
+    X: pd.DataFrame,
+    y: pd.Series,
+    cat_cols: list[str],
+    num_cols: list[str],
+    n_splits: int,
+    fold_jobs: int,
+    params: dict,
+    n_jobs: int = -1,
+) -> tuple[np.ndarray, np.ndarray]:
+    splits = list(TimeSeriesSplit(n_splits=n_splits).split(X))
+    # Parallel folds each get one core for their forest instead of all of them
+    forest_jobs = n_jobs if fold_jobs == 1 else 1
+    preds = Parallel(n_jobs=fold_jobs)(
+        delayed(_fit_fold)(X, y, tr, te, cat_cols, num_cols, forest_jobs, params) for tr, te in splits
+    )
+    oof = np.zeros(len(X), dtype=float)
+    covered = np.zeros(len(X), dtype=bool)
+    for (_, te), p in zip(splits, preds):
+        oof[te] = p
+        covered[te] = True
+    return oof, covered
+
+
+def _training_frame(
+    df: pd.DataFrame, target_col: str, positive_label: str, drop_labels: Iterable[str]
+) -> tuple[pd.DataFrame, pd.Series, list[str], list[str]]:
+    work = df.copy()
+    work = work[~work[target_col].isin(drop_labels)].reset_index(drop=True)
+    y = (work[target_col] == positive_label).astype(int)
+    X = work.drop(columns=[target_col])
+
+    # pandas 3 infers "str" instead of object for text columns
+    cat_cols = [c for c in X.columns if X[c].dtype == "object" or isinstance(X[c].dtype, pd.StringDtype)]
+    num_cols = [c for c in X.columns if c not in cat_cols]
+    return X, y, cat_cols, num_cols
+
+
 def train_probability_model(
     df: pd.DataFrame,
     *,
@@ -51,36 +209,24 @@ def train_probability_model(
     drop_labels: Iterable[str] = ("breakeven",),
     calibration: str = "sigmoid",
     calibration_fraction: float = 0.2,
+    calibration_source: CalibrationSource = "cv",
+    fold_jobs: int = 1,
+    n_estimators: int = 500,
+    max_depth: int | None = 6,
+    backend: ModelBackend = "rf",
+    n_jobs: int = -1,
 ) -> tuple[ModelArtifacts, dict]:
-    work = df.copy()
-    work = work[~work[target_col].isin(drop_labels)].reset_index(drop=True)
-    y = (work[target_col] == positive_label).astype(int)
-    X = work.drop(columns=[target_col])
-
-    cat_cols = [c for c in X.columns if X[c].dtype == "object"]
-    num_cols = [c for c in X.columns if c not in cat_cols]
-    raw_pipe = _make_pipeline(cat_cols, num_cols)
+    X, y, cat_cols, num_cols = _training_frame(df, target_col, positive_label, drop_labels)
+    params = {"backend": backend, "n_estimators": int(n_estimators), "max_depth": max_depth}
 
     # Dynamically adjust splits based on data size
     n_samples = len(X)
     n_splits = min(5, n_samples - 1) if n_samples > 1 else 0
-    
+    oof = np.zeros(len(X), dtype=float)
+    covered = np.zeros(len(X), dtype=bool)
+
     if n_splits >= 2:
-        tscv = TimeSeriesSplit(n_splits=n_splits)
-        oof = np.zeros(len(X), dtype=float)
-        for train_idx, test_idx in tscv.split(X):
-            pipe_fold = _make_pipeline(cat_cols, num_cols)
-            y_fold = y.iloc[train_idx]
-            pipe_fold.fit(X.iloc[train_idx], y_fold)
-            
-            # Handle case where fold only has one class
-            p = pipe_fold.predict_proba(X.iloc[test_idx])
-            if p.shape[1] == 2:
-                oof[test_idx] = p[:, 1]
-            else:
-                # If only one class seen, predict 1.0 if it was the positive class, else 0.0
-                val = 1.0 if y_fold.iloc[0] == 1 else 0.0
-                oof[test_idx] = val
+        oof, covered = _oof_predictions(X, y, cat_cols, num_cols, n_splits, int(fold_jobs), params, n_jobs=int(n_jobs))
 
         metrics = {
             "roc_auc_oof": float(roc_auc_score(y, oof)) if len(np.unique(y)) > 1 else float("nan"),
@@ -94,14 +240,30 @@ def train_probability_model(
     calib_n = int(max(0, min(n, round(n * calibration_fraction))))
     train_n = n - calib_n
 
-    raw_pipe_full = _make_pipeline(cat_cols, num_cols)
+    raw_pipe_full = _make_pipeline(cat_cols, num_cols, n_jobs=int(n_jobs), **params)
     raw_pipe_full.fit(X, y)
+    metrics["backend"] = backend
+    if backend == "hgb":
+        metrics["boosting_iterations"] = int(raw_pipe_full.named_steps["clf"].n_iter_)
 
-    if calib_n >= 50 and train_n >= 200 and calibration in ("sigmoid", "isotonic"):
+    calibrated_model: CalibratedClassifierCV | OOFCalibratedModel | None = None
+    can_calibrate = calib_n >= 50 and train_n >= 200 and calibration in ("sigmoid", "isotonic")
+    if can_calibrate and calibration_source == "oof" and covered.sum() >= 50:
+        # The OOF probabilities already exist: fit the calibrator on them and pair it with the full forest
+        calibrated_model = OOFCalibratedModel.fit(raw_pipe_full, oof[covered], y.to_numpy()[covered], calibration)
+        final_method = calibration
+        metrics.update(
+            {
+                "calibration_method": calibration,
+                "calibration_source": "oof",
+                "calibration_samples": int(covered.sum()),
+            }
+        )
+    elif can_calibrate:
         try:
             # Use cross-validated calibration (cv=5) instead of 'prefit'
             # This is more robust across sklearn versions and generally better for datasets of this size
-            cal = CalibratedClassifierCV(_make_pipeline(cat_cols, num_cols), method=calibration, cv=5)
+            cal = CalibratedClassifierCV(_make_pipeline(cat_cols, num_cols, n_jobs=int(n_jobs), **params), method=calibration, cv=5)
             cal.fit(X, y)
             
             metrics.update(
@@ -110,7 +272,7 @@ def train_probability_model(
                     "calibration_samples": int(n),
                 }
             )
-            calibrated_model: CalibratedClassifierCV | None = cal
+            calibrated_model = cal
             final_method = calibration
         except Exception:
             calibrated_model = None
@@ -127,6 +289,7 @@ def train_probability_model(
         calibration_method=final_method,
         feature_columns=list(X.columns),
         target_positive=positive_label,
+        backend=backend,
     )
     return artifacts, metrics
 
@@ -164,6 +327,9 @@ def load_model(path: str) -> ModelArtifacts:
 def feature_importances(artifacts: ModelArtifacts, top_n: int = 25) -> list[tuple[str, float]]:
     pre: ColumnTransformer = artifacts.raw_pipeline.named_steps["pre"]
     clf: RandomForestClassifier = artifacts.raw_pipeline.named_steps["clf"]
+    if not hasattr(clf, "feature_importances_"):
+        # Gradient boosting has no impurity importances
+        return []
 
     cat: OneHotEncoder = pre.named_transformers_["cat"]
     cat_cols = pre.transformers_[0][2]
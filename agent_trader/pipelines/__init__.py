@@ -2,4 +2,7 @@ __all__ = [
     "train",
     "infer",
     "backtest",
+    "benchmark",
+    "portfolio",
+    "stage_cache",
 ]
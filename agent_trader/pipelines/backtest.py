@@ -2,19 +2,27 @@ from __future__ import annotations
 
 import argparse
 import json
+import sys
 from dataclasses import asdict
 from datetime import datetime, timezone
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
 from agent_trader.backtest.engine import BacktestConfig, assert_safety, simulate_trades, summarize
+from agent_trader.backtest.intrabar import IntrabarResolver
+from agent_trader.backtest.monte_carlo import MonteCarloThresholds, r_multiples, run_monte_carlo
+from agent_trader.backtest.sweep import prepare_sweep, select_candidates, surface_frame, sweep
 from agent_trader.config import DEFAULT_CONFIG
 from agent_trader.data.csv_loader import load_ohlcv_csv
-from agent_trader.data.mt5_loader import load_rates, timeframe_from_str
-from agent_trader.features.builder import build_feature_rows
+from agent_trader.data.history_store import HistoryStore
+from agent_trader.data.mt5_history import MT5HistoryDownloader
+from agent_trader.data.tick_store import TickStore, bar_spread_pips
+from agent_trader.features.builder import build_feature_rows, candidates_for_rows
 from agent_trader.ml.model import load_model, predict_proba
-from agent_trader.policy.quality import decide_quality
+from agent_trader.pipelines.stage_cache import StageCache
+from agent_trader.policy.quality import QualityThresholds
 from agent_trader.strategy.generator import CandidateInputs, generate_candidates
 
 
@@ -34,72 +42,108 @@ def main() -> int:
     ap.add_argument("--symbol", default=DEFAULT_CONFIG.symbol)
     ap.add_argument("--start", default="")
     ap.add_argument("--end", default="")
+    ap.add_argument("--mt5-cache-dir", default="")
+    ap.add_argument("--mt5-workers", type=int, default=4)
     ap.add_argument("--model", required=True)
     ap.add_argument("--min-prob", type=float, default=0.60)
     ap.add_argument("--spread-pips", type=float, default=1.2)
     ap.add_argument("--fill-policy", choices=["sl_first", "tp_first", "ohlc_path"], default="ohlc_path")
     ap.add_argument("--max-hold-bars", type=int, default=48)
     ap.add_argument("--out-trades", default="")
+    ap.add_argument("--derive-htf", action="store_true")
+    ap.add_argument("--htf-offset-minutes", type=int, default=0)
+    ap.add_argument("--stage-cache-dir", default="")
+    ap.add_argument("--sweep-min-probs", type=float, nargs="*", default=[])
+    ap.add_argument("--sweep-grid", nargs="*", default=[])
+    ap.add_argument("--out-sweep", default="")
+    ap.add_argument("--m1-store-root", default="")
+    ap.add_argument("--intrabar-cache-days", type=int, default=32)
+    ap.add_argument("--tick-store-root", default="")
+    ap.add_argument("--tick-max-age-seconds", type=float, default=3600.0)
+    ap.add_argument("--monte-carlo-paths", type=int, default=0)
+    ap.add_argument("--monte-carlo-method", choices=["bootstrap", "shuffle"], default="bootstrap")
+    ap.add_argument("--ruin-drawdown-r", type=float, default=MonteCarloThresholds().ruin_drawdown_r)
+    ap.add_argument("--monte-carlo-jobs", type=int, default=1)
     args = ap.parse_args()
 
     cfg = DEFAULT_CONFIG
     if args.source == "csv":
-        if not args.h4 or not args.h1 or not args.m15:
-            raise SystemExit("--h4/--h1/--m15 are required when --source=csv")
-        h4 = load_ohlcv_csv(args.h4, schema="generic")
-        h1 = load_ohlcv_csv(args.h1, schema="generic")
+        if not args.m15 or (not args.derive_htf and (not args.h4 or not args.h1)):
+            raise SystemExit("--h4/--h1/--m15 are required when --source=csv (only --m15 with --derive-htf)")
         m15 = load_ohlcv_csv(args.m15, schema="generic")
+        h4 = None if args.derive_htf else load_ohlcv_csv(args.h4, schema="generic")
+        h1 = None if args.derive_htf else load_ohlcv_csv(args.h1, schema="generic")
     else:
         if not args.start or not args.end:
             raise SystemExit("--start/--end are required when --source=mt5")
         start = _parse_dt(args.start)
         end = _parse_dt(args.end)
         symbol = str(args.symbol)
-        h4 = load_rates(symbol=symbol, timeframe=timeframe_from_str("H4"), start=start, end=end, timezone="UTC")
-        h1 = load_rates(symbol=symbol, timeframe=timeframe_from_str("H1"), start=start, end=end, timezone="UTC")
-        m15 = load_rates(symbol=symbol, timeframe=timeframe_from_str("M15"), start=start, end=end, timezone="UTC")
+        downloader = MT5HistoryDownloader(args.mt5_cache_dir or None, max_workers=int(args.mt5_workers))
+        m15 = downloader.load(symbol=symbol, timeframe="M15", start=start, end=end, timezone="UTC")
+        h4 = None if args.derive_htf else downloader.load(symbol=symbol, timeframe="H4", start=start, end=end, timezone="UTC")
+        h1 = None if args.derive_htf else downloader.load(symbol=symbol, timeframe="H1", start=start, end=end, timezone="UTC")
+    if args.derive_htf:
+        inputs = CandidateInputs.from_m15(m15, offset_minutes=int(args.htf_offset_minutes))
+    else:
+        inputs = CandidateInputs(h4=h4, h1=h1, m15=m15)
+    h4, h1 = inputs.h4, inputs.h1
 
     artifacts = load_model(str(args.model))
-    candidates = generate_candidates(CandidateInputs(h4=h4, h1=h1, m15=m15), cfg=cfg, live_gate=False)
-    feat_rows = build_feature_rows(cfg=cfg, h4=h4, h1=h1, m15=m15, candidates=candidates)
+    if args.stage_cache_dir:
+        stages = StageCache(Path(args.stage_cache_dir))
+        candidates, cand_key = stages.candidates(inputs, cfg=cfg, live_gate=False)
+        feat_rows = stages.feature_rows(inputs, candidates, cfg=cfg, candidates_key=cand_key)
+    else:
+        candidates = generate_candidates(inputs, cfg=cfg, live_gate=False)
+        feat_rows = build_feature_rows(cfg=cfg, h4=h4, h1=h1, m15=m15, candidates=candidates)
     if not feat_rows:
         print(json.dumps({"trades": 0, "reason": "no_candidates"}, separators=(",", ":")))
         return 0
 
+    # Probabilities line up with feature rows, not with every generated candidate
+    candidates = candidates_for_rows(candidates, feat_rows)
     feat_df = pd.DataFrame([r.features for r in feat_rows])
     probs = predict_proba(artifacts, feat_df)
 
-    best_by_time: dict[datetime, tuple[int, float]] = {}
-    for idx, (cand, p) in enumerate(zip(candidates, probs)):
-        p = float(p)
-        if p < float(args.min_prob):
-            continue
-        prev = best_by_time.get(cand.time)
-        if prev is None or p > prev[1]:
-            best_by_time[cand.time] = (idx, p)
-
-    selected: list = []
-    for idx, p in best_by_time.values():
-        cand = candidates[idx]
-        regime = str(cand.meta.get("market_regime") or "TRANSITION")
-        session_state = str(cand.meta.get("session_state") or "BLOCKED")
-        decision = decide_quality(
-            probability=float(p),
-            confluence_score=float(cand.confluence_score),
-            market_regime=regime,  # type: ignore[arg-type]
-            session_state=session_state,  # type: ignore[arg-type]
-            atr_percentile=cand.meta.get("atr_percentile"),
-        )
-        cand.meta["model_probability"] = float(p)
-        cand.meta["quality"] = decision.quality
-        cand.meta["risk_multiplier"] = float(decision.risk_multiplier)
-        selected.append(cand)
-
     bt = BacktestConfig(spread_pips=float(args.spread_pips), max_hold_bars=int(args.max_hold_bars), fill_policy=str(args.fill_policy))
-    results = simulate_trades(m15, selected, cfg=cfg, bt=bt)
+    intrabar = None
+    if args.m1_store_root:
+        # Bars touching both TP and SL are settled from M1 history, loaded a day at a time on demand
+        store = HistoryStore(args.m1_store_root, str(args.symbol), "M1")
+        intrabar = IntrabarResolver.from_store(store, max_days=int(args.intrabar_cache_days))
+    spreads = None
+    if args.tick_store_root:
+        # Recorded spread at each bar open; bars without a recent tick keep --spread-pips
+        spreads = bar_spread_pips(TickStore(args.tick_store_root, str(args.symbol)), m15, max_age_seconds=float(args.tick_max_age_seconds))
+        print(f"[INFO] tick spreads: {int((~np.isnan(spreads)).sum())}/{len(spreads)} bars covered", file=sys.stderr)
+    if args.sweep_min_probs:
+        # Walks the bars once per candidate, then re-selects for every threshold combination
+        grid = {}
+        for spec in args.sweep_grid:
+            name, _, values = spec.partition("=")
+            if name not in QualityThresholds.__dataclass_fields__ or not values:
+                raise SystemExit(f"--sweep-grid expects FIELD=v1,v2,... with a QualityThresholds field, got {spec!r}")
+            grid[name] = [float(v) for v in values.split(",")]
+        sweep_inputs = prepare_sweep(m15, candidates, probs, cfg=cfg, bt=bt, intrabar=intrabar, spreads=spreads)
+        surface = surface_frame(sweep(sweep_inputs, min_probs=[float(v) for v in args.sweep_min_probs], grid=grid))
+        if args.out_sweep:
+            Path(args.out_sweep).parent.mkdir(parents=True, exist_ok=True)
+            surface.to_csv(args.out_sweep, index=False)
+        print(surface.to_string(index=False))
+        return 0
+
+    selected = select_candidates(candidates, probs, min_prob=float(args.min_prob))
+    results = simulate_trades(m15, selected, cfg=cfg, bt=bt, intrabar=intrabar, spreads=spreads)
+    if intrabar is not None:
+        print(f"[INFO] intrabar: resolved={intrabar.resolved} unresolved={intrabar.unresolved} day_loads={intrabar.loads}", file=sys.stderr)
     assert_safety(results, cfg=cfg)
     summ = summarize(results)
     print(json.dumps(asdict(summ), separators=(",", ":"), ensure_ascii=False, default=str))
+    if args.monte_carlo_paths > 0:
+        th = MonteCarloThresholds(paths=int(args.monte_carlo_paths), method=args.monte_carlo_method, ruin_drawdown_r=float(args.ruin_drawdown_r))
+        mc = run_monte_carlo(r_multiples(results), th=th, jobs=int(args.monte_carlo_jobs))
+        print(json.dumps({"monte_carlo": asdict(mc)}, separators=(",", ":")))
 
     if args.out_trades:
         out_path = Path(args.out_trades)
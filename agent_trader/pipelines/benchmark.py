@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+
+import pandas as pd
+
+from agent_trader.ml.compiled import load_compiled_cached
+from agent_trader.ml.model import save_model, train_probability_model
+from agent_trader.pipelines.train import KEY_COLUMNS, LOOKAHEAD_COLUMNS
+
+
+@dataclass(frozen=True)
+class BackendResult:
+    backend: str
+    train_seconds: float
+    roc_auc_oof: float
+    brier_oof: float
+    artifact_bytes: int
+    # Live scoring path (compiled forest or sklearn pipeline), median per call
+    latency_ms_one_row: float
+    latency_ms_batch: float
+    batch_rows: int
+
+
+def benchmark_backends(
+    df: pd.DataFrame,
+    *,
+    backends: tuple[str, ...] = ("rf", "hgb"),
+    calibration: str = "sigmoid",
+    calibration_source: str = "cv",
+    n_estimators: int = 500,
+    max_depth: int | None = 6,
+    latency_rows: int = 50,
+    repeats: int = 5,
+) -> list[BackendResult]:
+    rows = df.drop(columns=["label"]).head(max(1, int(latency_rows))).to_dict("records")
+    out: list[BackendResult] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            t0 = time.perf_counter()
+            artifacts, metrics = train_probability_model(
+                df,
+                calibration=calibration,
+                calibration_source=calibration_source,
+                n_estimators=n_estimators,
+                max_depth=max_depth,
+                backend=backend,
+            )
+            train_seconds = time.perf_counter() - t0
+
+            path = os.path.join(tmp, f"{backend}.joblib")
+            save_model(artifacts, path)
+            # Warm the cache first so latency excludes compilation
+            model = load_compiled_cached(path)
+            one, batch = [], []
+            for _ in range(max(1, int(repeats))):
+                for row in rows:
+                    t0 = time.perf_counter()
+                    model.predict_one(row)
+                    one.append(time.perf_counter() - t0)
+                t0 = time.perf_counter()
+                model.predict_rows(rows)
+                batch.append(time.perf_counter() - t0)
+
+            out.append(
+                BackendResult(
+                    backend=backend,
+                    train_seconds=float(train_seconds),
+                    roc_auc_oof=float(metrics.get("roc_auc_oof", float("nan"))),
+                    brier_oof=float(metrics.get("brier_oof", float("nan"))),
+                    artifact_bytes=int(os.path.getsize(path)),
+                    latency_ms_one_row=1000.0 * statistics.median(one),
+                    latency_ms_batch=1000.0 * statistics.median(batch),
+                    batch_rows=len(rows),
+                )
+            )
+    return out
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dataset", required=True)
+    ap.add_argument("--backends", nargs="+", choices=["rf", "hgb"], default=["rf", "hgb"])
+    ap.add_argument("--calibration", choices=["none", "sigmoid", "isotonic"], default="sigmoid")
+    ap.add_argument("--calibration-source", choices=["cv", "oof"], default="cv")
+    ap.add_argument("--n-estimators", type=int, default=500)
+    ap.add_argument("--max-depth", type=int, default=6)
+    ap.add_argument("--latency-rows", type=int, default=50)
+    args = ap.parse_args(argv)
+
+    # The CSV written by train.py --out-dataset
+    dataset = pd.read_csv(args.dataset)
+    df = dataset.drop(columns=[c for c in LOOKAHEAD_COLUMNS + KEY_COLUMNS if c in dataset.columns])
+    results = benchmark_backends(
+        df,
+        backends=tuple(args.backends),
+        calibration=str(args.calibration),
+        calibration_source=str(args.calibration_source),
+        n_estimators=int(args.n_estimators),
+        max_depth=int(args.max_depth),
+        latency_rows=int(args.latency_rows),
+    )
+    for r in results:
+        print(json.dumps(asdict(r), separators=(",", ":")))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
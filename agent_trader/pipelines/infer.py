@@ -7,9 +7,9 @@ import pandas as pd
 
 from agent_trader.config import DEFAULT_CONFIG
 from agent_trader.data.csv_loader import load_ohlcv_csv
-from agent_trader.data.mt5_loader import load_recent_multi_timeframe
+from agent_trader.data.mt5_loader import load_recent_multi_timeframe, timeframe_from_str
 from agent_trader.execution.signal_writer import make_signal, write_signal_csv
-from agent_trader.features.builder import build_feature_rows
+from agent_trader.features.builder import build_feature_rows, candidates_for_rows
 from agent_trader.ml.model import load_model, predict_proba
 from agent_trader.policy.quality import decide_quality
 from agent_trader.strategy.generator import CandidateInputs, generate_candidates
@@ -29,29 +29,41 @@ def main() -> int:
     ap.add_argument("--out-dir", required=True)
     ap.add_argument("--min-prob", type=float, default=0.60)
     ap.add_argument("--mode", default="paper")
+    ap.add_argument("--derive-htf", action="store_true")
+    ap.add_argument("--htf-offset-minutes", type=int, default=0)
     args = ap.parse_args()
 
     cfg = DEFAULT_CONFIG
     if args.source == "mt5":
+        bars_by_tf = {"M15": int(args.bars_m15)}
+        if not args.derive_htf:
+            bars_by_tf.update({"H1": int(args.bars_h1), "H4": int(args.bars_h4)})
         frames = load_recent_multi_timeframe(
             symbol=str(args.symbol),
-            bars_by_tf={"M15": int(args.bars_m15), "H1": int(args.bars_h1), "H4": int(args.bars_h4)},
+            timeframes={k: timeframe_from_str(k) for k in bars_by_tf},
+            bars_by_tf=bars_by_tf,
             timezone="UTC",
         )
-        h4 = frames["H4"]
-        h1 = frames["H1"]
         m15 = frames["M15"]
+        h4 = frames.get("H4")
+        h1 = frames.get("H1")
     else:
-        if not args.h4 or not args.h1 or not args.m15:
-            raise SystemExit("--h4/--h1/--m15 are required when --source=csv")
-        h4 = load_ohlcv_csv(args.h4, schema="generic")
-        h1 = load_ohlcv_csv(args.h1, schema="generic")
+        if not args.m15 or (not args.derive_htf and (not args.h4 or not args.h1)):
+            raise SystemExit("--h4/--h1/--m15 are required when --source=csv (only --m15 with --derive-htf)")
         m15 = load_ohlcv_csv(args.m15, schema="generic")
+        h4 = None if args.derive_htf else load_ohlcv_csv(args.h4, schema="generic")
+        h1 = None if args.derive_htf else load_ohlcv_csv(args.h1, schema="generic")
+    if args.derive_htf:
+        inputs = CandidateInputs.from_m15(m15, offset_minutes=int(args.htf_offset_minutes))
+    else:
+        inputs = CandidateInputs(h4=h4, h1=h1, m15=m15)
+    h4, h1 = inputs.h4, inputs.h1
 
     artifacts = load_model(args.model)
 
-    candidates = generate_candidates(CandidateInputs(h4=h4, h1=h1, m15=m15), cfg=cfg, live_gate=True)
+    candidates = generate_candidates(inputs, cfg=cfg, live_gate=True)
     feat_rows = build_feature_rows(cfg=cfg, h4=h4, h1=h1, m15=m15, candidates=candidates)
+    candidates = candidates_for_rows(candidates, feat_rows)
     feat_df = pd.DataFrame([r.features for r in feat_rows])
     if len(feat_df) == 0:
         return 0
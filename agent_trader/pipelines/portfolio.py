@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import asdict, replace
+from pathlib import Path
+
+import pandas as pd
+
+from agent_trader.backtest.engine import BacktestConfig
+from agent_trader.backtest.portfolio import PortfolioThresholds, SymbolBook, simulate_portfolio
+from agent_trader.backtest.sweep import select_candidates
+from agent_trader.config import DEFAULT_CONFIG
+from agent_trader.data.csv_loader import load_ohlcv_csv
+from agent_trader.data.tick_store import TickStore, bar_spread_pips
+from agent_trader.features.builder import build_feature_rows, candidates_for_rows
+from agent_trader.ml.model import load_model, predict_proba
+from agent_trader.pipelines.stage_cache import StageCache
+from agent_trader.strategy.generator import CandidateInputs, generate_candidates
+
+
+def _book(args: argparse.Namespace, symbol: str, stages: StageCache | None) -> SymbolBook:
+    path = lambda v: v.replace("{symbol}", symbol)  # noqa: E731
+    cfg = replace(DEFAULT_CONFIG, symbol=symbol)
+    m15 = load_ohlcv_csv(path(args.m15), schema="generic")
+    if args.derive_htf:
+        inputs = CandidateInputs.from_m15(m15, offset_minutes=int(args.htf_offset_minutes))
+    else:
+        inputs = CandidateInputs(h4=load_ohlcv_csv(path(args.h4), schema="generic"), h1=load_ohlcv_csv(path(args.h1), schema="generic"), m15=m15)
+    if stages is not None:
+        candidates, key = stages.candidates(inputs, cfg=cfg, live_gate=False)
+        rows = stages.feature_rows(inputs, candidates, cfg=cfg, candidates_key=key)
+    else:
+        candidates = generate_candidates(inputs, cfg=cfg, live_gate=False)
+        rows = build_feature_rows(cfg=cfg, h4=inputs.h4, h1=inputs.h1, m15=m15, candidates=candidates)
+    selected = []
+    if rows:
+        probs = predict_proba(load_model(path(args.model)), pd.DataFrame([r.features for r in rows]))
+        selected = select_candidates(candidates_for_rows(candidates, rows), probs, min_prob=float(args.min_prob))
+    spreads = None
+    if args.tick_store_root:
+        spreads = bar_spread_pips(TickStore(args.tick_store_root, symbol), m15)
+    return SymbolBook(symbol=symbol, m15=m15, candidates=selected, spreads=spreads)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--symbols", required=True)
+    ap.add_argument("--m15", required=True)
+    ap.add_argument("--h4", default="")
+    ap.add_argument("--h1", default="")
+    ap.add_argument("--derive-htf", action="store_true")
+    ap.add_argument("--htf-offset-minutes", type=int, default=0)
+    ap.add_argument("--model", required=True)
+    ap.add_argument("--min-prob", type=float, default=0.60)
+    ap.add_argument("--spread-pips", type=float, default=1.2)
+    ap.add_argument("--fill-policy", choices=["sl_first", "tp_first", "ohlc_path"], default="ohlc_path")
+    ap.add_argument("--max-hold-bars", type=int, default=48)
+    ap.add_argument("--max-open-positions", type=int, default=PortfolioThresholds().max_open_positions)
+    ap.add_argument("--max-trades-per-day", type=int, default=DEFAULT_CONFIG.max_signals_per_day)
+    ap.add_argument("--max-trades-per-week", type=int, default=DEFAULT_CONFIG.max_trades_per_week)
+    ap.add_argument("--tick-store-root", default="")
+    ap.add_argument("--stage-cache-dir", default="")
+    ap.add_argument("--out-equity", default="")
+    args = ap.parse_args()
+
+    symbols = list(dict.fromkeys(s.strip() for s in args.symbols.split(",") if s.strip()))
+    if not args.derive_htf and (not args.h4 or not args.h1):
+        raise SystemExit("--h4/--h1 are required unless --derive-htf is set")
+    if len(symbols) > 1 and "{symbol}" not in args.m15:
+        raise SystemExit("--m15 needs a {symbol} placeholder with several symbols")
+
+    stages = StageCache(Path(args.stage_cache_dir)) if args.stage_cache_dir else None
+    books = [_book(args, sym, stages) for sym in symbols]
+    bt = BacktestConfig(spread_pips=float(args.spread_pips), max_hold_bars=int(args.max_hold_bars), fill_policy=str(args.fill_policy))
+    th = PortfolioThresholds(
+        max_open_positions=int(args.max_open_positions),
+        max_trades_per_day=int(args.max_trades_per_day),
+        max_trades_per_week=int(args.max_trades_per_week),
+    )
+    res = simulate_portfolio(books, cfg=DEFAULT_CONFIG, bt=bt, th=th)
+    by_symbol = res.equity.groupby("symbol")["r_multiple_scaled"].agg(["count", "sum"]).to_dict("index") if len(res.equity) else {}
+    print(json.dumps({**asdict(res.summary), "rejected": res.rejected, "by_symbol": by_symbol}, separators=(",", ":"), default=str))
+
+    if args.out_equity:
+        Path(args.out_equity).parent.mkdir(parents=True, exist_ok=True)
+        res.equity.to_csv(args.out_equity, index=False)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+import numpy as np
+import pandas as pd
+
+from agent_trader.config import TradingConfig
+from agent_trader.features.builder import FeatureRow, build_feature_rows
+from agent_trader.labeling.labeler import LabelingResult, label_candidates
+from agent_trader.strategy.generator import CandidateInputs, generate_candidates
+from agent_trader.types import LabeledTrade, Side, TradeCandidate
+
+
+# Bumped when the on-disk layout changes
+STAGE_FORMAT = 2
+_PKG = Path(__file__).resolve().parents[1]
+# Everything the candidate / feature / label stages import
+_STAGE_SOURCES = (
+    "config.py",
+    "types.py",
+    "utils.py",
+    "data/resample.py",
+    "features",
+    "indicators",
+    "labeling",
+    "market_regime",
+    "session",
+    "strategy",
+)
+
+
+@lru_cache(maxsize=1)
+def code_version() -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for rel in _STAGE_SOURCES:
+        p = _PKG / rel
+        for f in sorted(p.rglob("*.py")) if p.is_dir() else [p]:
+            h.update(f.relative_to(_PKG).as_posix().encode())
+            h.update(f.read_bytes())
+    return h.hexdigest()
+
+
+def frame_digest(df: pd.DataFrame | None) -> str:
+    if df is None:
+        return "none"
+    h = hashlib.blake2b(digest_size=16)
+    t = pd.to_datetime(df["time"])
+    h.update(str(getattr(t.dt, "tz", None)).encode())
+    h.update(t.to_numpy(dtype="datetime64[ns]").view("i8").tobytes())
+    for c in ("open", "high", "low", "close"):
+        h.update(np.ascontiguousarray(df[c].to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+
+def _key(*parts: Any) -> str:
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=20).hexdigest()
+
+
+# Columnar encoding: each column is one typed array plus masks for None / absent keys
+
+
+def _json_default(v: Any) -> Any:
+    if isinstance(v, np.generic):
+        return v.item()
+    raise TypeError(f"{type(v).__name__} is not JSON serializable")
+
+
+def _kind(values: list[Any]) -> str:
+    types = {type(v) for v in values if v is not None}
+    if not types:
+        return "none"
+    if types <= {bool, np.bool_}:
+        return "bool"
+    if types <= {int, np.int64, np.int32}:
+        return "int"
+    if types <= {float, np.float64, np.float32}:
+        return "float"
+    if types <= {str}:
+        return "str"
+    if all(issubclass(t, datetime) for t in types):
+        return "datetime"
+    return "json"
+
+
+def _encode_columns(records: Sequence[dict[str, Any]]) -> tuple[dict[str, np.ndarray], dict[str, dict]]:
+    names: dict[str, None] = {}
+    for r in records:
+        names.update(dict.fromkeys(r))
+    arrays: dict[str, np.ndarray] = {}
+    schema: dict[str, dict] = {}
+    for i, name in enumerate(names):
+        present = np.array([name in r for r in records], dtype=bool)
+        values = [r.get(name) for r in records]
+        kind = _kind(values)
+        info: dict[str, Any] = {"name": name, "kind": kind}
+        none = np.array([v is None for v in values], dtype=bool)
+        if kind == "bool":
+            data = np.array([bool(v) if v is not None else False for v in values], dtype=bool)
+        elif kind == "int":
+            data = np.array([int(v) if v is not None else 0 for v in values], dtype=np.int64)
+        elif kind == "float":
+            data = np.array([float(v) if v is not None else math.nan for v in values], dtype=np.float64)
+        elif kind == "str":
+            data = np.array([v if v is not None else "" for v in values], dtype=str)
+        elif kind == "datetime":
+            stamps = [pd.Timestamp(v) for v in values if v is not None]
+            info["tz"] = str(stamps[0].tz) if stamps[0].tz is not None else ""
+            data = np.array([pd.Timestamp(v).value if v is not None else 0 for v in values], dtype=np.int64)
+        elif kind == "json":
+            data = np.array([json.dumps(v, default=_json_default) for v in values], dtype=str)
+        else:
+            data = np.zeros(len(values), dtype=bool)
+        col = f"c{i}"
+        arrays[col] = data
+        if none.any():
+            arrays[col + "_none"] = none
+        if not present.all():
+            arrays[col + "_present"] = present
+        schema[col] = info
+    return arrays, schema
+
+
+def _decode_columns(arrays: dict[str, np.ndarray], schema: dict[str, dict], n: int) -> list[dict[str, Any]]:
+    records: list[dict[str, Any]] = [{} for _ in range(n)]
+    for col, info in schema.items():
+        kind = info["kind"]
+        data = arrays[col]
+        none = arrays.get(col + "_none")
+        present = arrays.get(col + "_present")
+        if kind == "datetime":
+            tz = info.get("tz") or None
+            values = [pd.Timestamp(int(v), tz=tz).to_pydatetime() for v in data]
+        elif kind == "json":
+            values = [json.loads(str(v)) for v in data]
+        elif kind == "none":
+            values = [None] * n
+        else:
+            values = data.tolist()
+        name = info["name"]
+        for r in range(n):
+            if present is not None and not present[r]:
+                continue
+            records[r][name] = None if none is not None and none[r] else values[r]
+    return records
+
+
+def _candidate_record(c: TradeCandidate) -> dict[str, Any]:
+    rec = {
+        "time": c.time,
+        "symbol": c.symbol,
+        "side": c.side.value,
+        "entry_price": c.entry_price,
+        "sl_price": c.sl_price,
+        "tp_price": c.tp_price,
+        "reason": c.reason,
+        "confluence_score": c.confluence_score,
+    }
+    rec.update({f"meta.{k}": v for k, v in c.meta.items()})
+    return rec
+
+
+def _record_candidate(rec: dict[str, Any]) -> TradeCandidate:
+    meta = {k[5:]: v for k, v in rec.items() if k.startswith("meta.")}
+    return TradeCandidate(
+        time=rec["time"],
+        symbol=rec["symbol"],
+        side=Side(rec["side"]),
+        entry_price=rec["entry_price"],
+        sl_price=rec["sl_price"],
+        tp_price=rec["tp_price"],
+        reason=rec["reason"],
+        confluence_score=rec["confluence_score"],
+        meta=meta,
+    )
+
+
+class StageCache:
+    """On-disk cache of candidates, feature rows and labels, one columnar .npz per stage result.
+
+    Keys hash the input bars, the TradingConfig, the stage parameters, the upstream stage key and
+    the source of every module the stages run, so any change there is a miss, never a stale hit.
+    """
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, stage: str, key: str) -> Path:
+        return self.root / stage / f"{key}.npz"
+
+    def _load(self, stage: str, key: str) -> tuple[list[dict[str, Any]], dict] | None:
+        path = self._path(stage, key)
+        if not path.exists():
+            return None
+        with np.load(path, allow_pickle=False) as z:
+            head = json.loads(str(z["__head__"]))
+            arrays = {k: z[k] for k in z.files if k != "__head__"}
+        if head.get("format") != STAGE_FORMAT:
+            return None
+        return _decode_columns(arrays, head["schema"], int(head["rows"])), head.get("extra", {})
+
+    def _save(self, stage: str, key: str, records: Sequence[dict[str, Any]], extra: dict | None = None) -> None:
+        arrays, schema = _encode_columns(records)
+        head = {"format": STAGE_FORMAT, "rows": len(records), "schema": schema, "extra": extra or {}}
+        path = self._path(stage, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, __head__=np.array(json.dumps(head)), **arrays)
+        os.replace(tmp, path)
+
+    def _cached(self, stage: str, key: str, build: Callable[[], tuple[list[dict[str, Any]], dict]]) -> tuple[list[dict[str, Any]], dict]:
+        hit = self._load(stage, key)
+        if hit is not None:
+            self.hits += 1
+            return hit
+        self.misses += 1
+        records, extra = build()
+        self._save(stage, key, records, extra)
+        return records, extra
+
+    def candidates(
+        self,
+        inputs: CandidateInputs,
+        *,
+        cfg: TradingConfig,
+        live_gate: bool = False,
+        training_mode: bool = False,
+        generate: Callable[[], list[TradeCandidate]] | None = None,
+    ) -> tuple[list[TradeCandidate], str]:
+        # `generate` may swap in an equivalent generator (e.g. the chunked parallel one); it is not part of the key
+        key = _key(
+            "candidates",
+            code_version(),
+            repr(cfg),
+            frame_digest(inputs.h4),
+            frame_digest(inputs.h1),
+            frame_digest(inputs.m15),
+            bool(live_gate),
+            bool(training_mode),
+        )
+        if generate is None:
+            generate = lambda: generate_candidates(inputs, cfg=cfg, live_gate=live_gate, training_mode=training_mode)  # noqa: E731
+        records, _ = self._cached("candidates", key, lambda: ([_candidate_record(c) for c in generate()], {}))
+        return [_record_candidate(r) for r in records], key
+
+    def feature_rows(
+        self, inputs: CandidateInputs, candidates: list[TradeCandidate], *, cfg: TradingConfig, candidates_key: str
+    ) -> list[FeatureRow]:
+        key = _key("features", code_version(), repr(cfg), candidates_key)
+
+        def build() -> tuple[list[dict[str, Any]], dict]:
+            rows = build_feature_rows(cfg=cfg, h4=inputs.h4, h1=inputs.h1, m15=inputs.m15, candidates=candidates)
+            return [{"__time__": r.time, "__id__": r.candidate_id, **r.features} for r in rows], {}
+
+        records, _ = self._cached("features", key, build)
+        return [FeatureRow(time=r.pop("__time__"), candidate_id=r.pop("__id__"), features=r) for r in records]
+
+    def labels(
+        self,
+        m15: pd.DataFrame,
+        candidates: list[TradeCandidate],
+        *,
+        cfg: TradingConfig,
+        candidates_key: str,
+        max_lookahead_bars: int = 48,
+    ) -> LabelingResult:
+        key = _key("labels", code_version(), repr(cfg), candidates_key, int(max_lookahead_bars))
+
+        def build() -> tuple[list[dict[str, Any]], dict]:
+            res = label_candidates(cfg=cfg, m15=m15, candidates=candidates, max_lookahead_bars=max_lookahead_bars)
+            pos = {id(c): i for i, c in enumerate(candidates)}
+            recs = [
+                {
+                    "candidate": pos[id(lt.candidate)],
+                    "label": lt.label,
+                    "mfe_pips": lt.mfe_pips,
+                    "mae_pips": lt.mae_pips,
+                    "minutes_to_outcome": lt.minutes_to_outcome,
+                    "outcome_price": lt.outcome_price,
+                }
+                for lt in res.labeled
+            ]
+            return recs, {"dropped": int(res.dropped)}
+
+        records, extra = self._cached("labels", key, build)
+        labeled = [
+            LabeledTrade(
+                candidate=candidates[r["candidate"]],
+                label=r["label"],
+                mfe_pips=r["mfe_pips"],
+                mae_pips=r["mae_pips"],
+                minutes_to_outcome=r["minutes_to_outcome"],
+                outcome_price=r["outcome_price"],
+            )
+            for r in records
+        ]
+        return LabelingResult(labeled=labeled, dropped=int(extra.get("dropped", 0)))
@@ -1,60 +1,196 @@
 from __future__ import annotations
 
 import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict
 from pathlib import Path
 
 import pandas as pd
+from threadpoolctl import threadpool_limits
 
 from agent_trader.config import DEFAULT_CONFIG
 from agent_trader.data.csv_loader import load_ohlcv_csv
-from agent_trader.features.builder import build_feature_rows
+from agent_trader.features.builder import FeatureRow, build_feature_rows
+from agent_trader.labeling.batch import label_candidates_batch, parse_barrier
 from agent_trader.labeling.labeler import label_candidates
+from agent_trader.ml.budget import BudgetThresholds, run_budget
+from agent_trader.ml.compiled import compile_model, save_lean
 from agent_trader.ml.model import feature_importances, save_model, train_probability_model
-from agent_trader.strategy.generator import CandidateInputs, generate_candidates
+from agent_trader.pipelines.stage_cache import StageCache
+from agent_trader.strategy.generator import CandidateInputs, generate_candidates, generate_candidates_parallel
+from agent_trader.types import LabeledTrade
 
 
-def _rows_to_frame(rows):
-    df = pd.DataFrame([r.features for r in rows])
-    df["time"] = [r.time for r in rows]
-    return df
+LOOKAHEAD_COLUMNS = ("time", "mfe_pips", "mae_pips", "minutes_to_outcome")
+# Row keys kept in the dataset CSV but never fed to the model
+KEY_COLUMNS = ("candidate_id",)
+# Path arguments that take a `{symbol}` placeholder in --symbols mode
+SYMBOL_PATH_ARGS = ("h4", "h1", "m15", "out_model", "out_dataset", "out_lean", "out_labels")
 
 
-def main() -> int:
+def _assemble_dataset(rows: list[FeatureRow], labeled: list[LabeledTrade]) -> pd.DataFrame:
+    # One row per candidate that has both features and a label, joined on candidate id
+    by_id = {lt.candidate.candidate_id: lt for lt in labeled}
+    records = []
+    for r in rows:
+        lt = by_id.get(r.candidate_id)
+        if lt is None:
+            continue
+        records.append(
+            {
+                "candidate_id": r.candidate_id,
+                **r.features,
+                "time": r.time,
+                "label": lt.label,
+                "mfe_pips": lt.mfe_pips,
+                "mae_pips": lt.mae_pips,
+                "minutes_to_outcome": lt.minutes_to_outcome,
+            }
+        )
+    return pd.DataFrame(records)
+
+
+def main(argv: list[str] | None = None) -> int:
     ap = argparse.ArgumentParser()
-    ap.add_argument("--h4", required=True)
-    ap.add_argument("--h1", required=True)
+    ap.add_argument("--h4", default="")
+    ap.add_argument("--h1", default="")
     ap.add_argument("--m15", required=True)
+    ap.add_argument("--derive-htf", action="store_true")
+    ap.add_argument("--htf-offset-minutes", type=int, default=0)
     ap.add_argument("--symbol", default="GBPUSD")
-    ap.add_argument("--out-model", required=True)
+    ap.add_argument("--symbols", default="")
+    ap.add_argument("--symbol-jobs", type=int, default=0)
+    ap.add_argument("--max-cores", type=int, default=0)
+    ap.add_argument("--out-model", default="")
     ap.add_argument("--out-dataset", required=False)
+    ap.add_argument("--out-lean", default="")
+    ap.add_argument("--out-labels", default="")
+    ap.add_argument("--barrier", action="append", default=[])
+    ap.add_argument("--stage-cache-dir", default="")
+    ap.add_argument("--gen-jobs", type=int, default=1)
+    ap.add_argument("--gen-chunk-bars", type=int, default=5000)
     ap.add_argument("--calibration", choices=["none", "sigmoid", "isotonic"], default="sigmoid")
-    args = ap.parse_args()
+    ap.add_argument("--calibration-source", choices=["cv", "oof"], default="cv")
+    ap.add_argument("--fold-jobs", type=int, default=1)
+    ap.add_argument("--backend", choices=["rf", "hgb"], default="rf")
+    ap.add_argument("--n-estimators", type=int, default=500)
+    ap.add_argument("--max-depth", type=int, default=6)
+    ap.add_argument("--budget", action="store_true")
+    ap.add_argument("--budget-fractions", type=float, nargs="+", default=list(BudgetThresholds().sample_fractions))
+    ap.add_argument("--budget-trees", type=int, nargs="+", default=list(BudgetThresholds().tree_counts))
+    ap.add_argument("--budget-depths", type=int, nargs="+", default=list(BudgetThresholds().max_depths))
+    args = ap.parse_args(argv)
+    if not args.budget and not args.out_model:
+        raise SystemExit("--out-model is required unless --budget is set")
+    if args.out_lean and args.backend != "rf":
+        raise SystemExit("--out-lean is only available for the rf backend")
+    try:
+        args.barrier = [parse_barrier(s) for s in args.barrier]
+    except ValueError as e:
+        raise SystemExit(str(e))
+    if args.symbols:
+        return _train_symbols(args)
+    return _train(args)
+
+
+def _symbol_args(args: argparse.Namespace, symbol: str) -> argparse.Namespace:
+    out = argparse.Namespace(**vars(args))
+    out.symbol = symbol
+    out.symbols = ""
+    for name in SYMBOL_PATH_ARGS:
+        v = getattr(args, name)
+        if v:
+            setattr(out, name, v.replace("{symbol}", symbol))
+    return out
+
+
+def _run_symbol(task: tuple[argparse.Namespace, int]) -> tuple[int, float]:
+    args, cores = task
+    t0 = time.perf_counter()
+    # Forests get `cores` threads via n_jobs; the cap also covers OpenMP (hgb) and BLAS pools
+    with threadpool_limits(limits=cores):
+        rc = _train(args, n_jobs=cores)
+    return rc, time.perf_counter() - t0
+
+
+def _train_symbols(args: argparse.Namespace) -> int:
+    symbols = list(dict.fromkeys(s.strip() for s in args.symbols.split(",") if s.strip()))
+    if not symbols:
+        raise SystemExit("--symbols is empty")
+    # Every per-symbol output must be distinct, or parallel runs overwrite each other
+    for name in SYMBOL_PATH_ARGS:
+        v = getattr(args, name)
+        if v and "{symbol}" not in v and (len(symbols) > 1 or name == "m15"):
+            raise SystemExit(f"--{name.replace('_', '-')} needs a {{symbol}} placeholder with --symbols")
+    if not args.derive_htf and (not args.h4 or not args.h1):
+        raise SystemExit("--h4/--h1 are required unless --derive-htf is set")
 
+    max_cores = int(args.max_cores) or (os.cpu_count() or 1)
+    jobs = max(1, min(len(symbols), int(args.symbol_jobs) or max_cores, max_cores))
+    cores = max(1, max_cores // jobs)
+    tasks = {}
+    for sym in symbols:
+        sa = _symbol_args(args, sym)
+        # Nested pools inside a symbol share its slice of the cores
+        sa.gen_jobs = min(int(sa.gen_jobs), cores)
+        sa.fold_jobs = min(int(sa.fold_jobs), cores)
+        tasks[sym] = (sa, cores)
+
+    print(f"[INFO] {len(symbols)} symbols, {jobs} at a time, {cores} cores each")
+    t0 = time.perf_counter()
+    report = []
+    with ProcessPoolExecutor(max_workers=jobs) as ex:
+        futures = {ex.submit(_run_symbol, task): sym for sym, task in tasks.items()}
+        for fut in as_completed(futures):
+            sym = futures[fut]
+            try:
+                rc, secs = fut.result()
+                row = {"symbol": sym, "status": "ok" if rc == 0 else f"exit {rc}", "wall_seconds": round(secs, 1)}
+            except (Exception, SystemExit) as e:
+                # `_train` reports bad inputs with SystemExit; keep it to this symbol's row
+                row = {"symbol": sym, "status": f"error: {type(e).__name__}: {e}", "wall_seconds": None}
+            print(f"[INFO] {sym}: {row['status']} ({row['wall_seconds']}s)")
+            report.append(row)
+    report.sort(key=lambda r: symbols.index(r["symbol"]))
+    print(pd.DataFrame(report).to_string(index=False))
+    print(f"[INFO] Total wall time: {time.perf_counter() - t0:.1f}s")
+    return 0 if all(r["status"] == "ok" for r in report) else 1
+
+
+def _train(args: argparse.Namespace, *, n_jobs: int = -1) -> int:
     cfg = DEFAULT_CONFIG
     if args.symbol != cfg.symbol:
         from dataclasses import replace
         cfg = replace(cfg, symbol=args.symbol)
     
-    h4 = load_ohlcv_csv(args.h4, schema="generic")
-    h1 = load_ohlcv_csv(args.h1, schema="generic")
     m15 = load_ohlcv_csv(args.m15, schema="generic")
+    if args.derive_htf:
+        inputs = CandidateInputs.from_m15(m15, offset_minutes=int(args.htf_offset_minutes))
+    else:
+        if not args.h4 or not args.h1:
+            raise SystemExit("--h4/--h1 are required unless --derive-htf is set")
+        inputs = CandidateInputs(h4=load_ohlcv_csv(args.h4, schema="generic"), h1=load_ohlcv_csv(args.h1, schema="generic"), m15=m15)
+    h4, h1 = inputs.h4, inputs.h1
 
-    candidates = generate_candidates(CandidateInputs(h4=h4, h1=h1, m15=m15), cfg=cfg, training_mode=True)
-    feat_rows = build_feature_rows(cfg=cfg, h4=h4, h1=h1, m15=m15, candidates=candidates)
-    feat_df = _rows_to_frame(feat_rows)
-
-    label_res = label_candidates(cfg=cfg, m15=m15, candidates=candidates)
-    label_df = pd.DataFrame(
-        {
-            "time": [lt.candidate.time for lt in label_res.labeled],
-            "label": [lt.label for lt in label_res.labeled],
-            "mfe_pips": [lt.mfe_pips for lt in label_res.labeled],
-            "mae_pips": [lt.mae_pips for lt in label_res.labeled],
-            "minutes_to_outcome": [lt.minutes_to_outcome for lt in label_res.labeled],
-        }
-    )
+    def generate() -> list:
+        if int(args.gen_jobs) > 1:
+            return generate_candidates_parallel(inputs, cfg=cfg, training_mode=True, chunk_bars=int(args.gen_chunk_bars), max_workers=int(args.gen_jobs))
+        return generate_candidates(inputs, cfg=cfg, training_mode=True)
 
-    dataset = feat_df.merge(label_df, on="time", how="inner")
+    if args.stage_cache_dir:
+        # Reuses candidates / features / labels while bars, config and stage code are unchanged
+        stages = StageCache(Path(args.stage_cache_dir))
+        candidates, cand_key = stages.candidates(inputs, cfg=cfg, training_mode=True, generate=generate)
+        feat_rows = stages.feature_rows(inputs, candidates, cfg=cfg, candidates_key=cand_key)
+        label_res = stages.labels(m15, candidates, cfg=cfg, candidates_key=cand_key)
+    else:
+        candidates = generate()
+        feat_rows = build_feature_rows(cfg=cfg, h4=h4, h1=h1, m15=m15, candidates=candidates)
+        label_res = label_candidates(cfg=cfg, m15=m15, candidates=candidates)
+    dataset = _assemble_dataset(feat_rows, label_res.labeled)
     if len(dataset) < 1:
         print(f"[ERROR] No training data found. Found {len(dataset)} samples.")
         print("Tip: Make sure your MT4 chart has more historical bars (press Home key on chart).")
@@ -65,25 +201,62 @@ def main() -> int:
         print("[WARNING] The model will be created so you can start trading, but it won't be very accurate.")
         print("[WARNING] Please add more history in MT4 later and re-train for better results.")
 
+    if args.out_labels:
+        # Wide table of alternative exits for the same candidates, for exit research / extra targets
+        wide = label_candidates_batch(cfg=cfg, m15=m15, candidates=candidates, barriers=args.barrier or [parse_barrier("base")])
+        Path(args.out_labels).parent.mkdir(parents=True, exist_ok=True)
+        wide.to_csv(args.out_labels, index=False)
+
     if args.out_dataset:
         Path(args.out_dataset).parent.mkdir(parents=True, exist_ok=True)
         dataset.to_csv(args.out_dataset, index=False)
 
     # Remove look-ahead features that are only known after the trade is over.
     # Keeping these in would cause "feature leakage" and crash live trading.
-    drop_cols = ["time", "mfe_pips", "mae_pips", "minutes_to_outcome"]
+    train_df = dataset.drop(columns=[c for c in LOOKAHEAD_COLUMNS + KEY_COLUMNS if c in dataset.columns])
+
+    if args.budget:
+        th = BudgetThresholds(
+            sample_fractions=tuple(args.budget_fractions),
+            tree_counts=tuple(args.budget_trees),
+            max_depths=tuple(args.budget_depths),
+        )
+        report = run_budget(
+            train_df,
+            th=th,
+            baseline=(int(args.n_estimators), int(args.max_depth)),
+            calibration_source=str(args.calibration_source),
+            n_jobs=int(n_jobs),
+        )
+        print(json.dumps(asdict(report), separators=(",", ":")))
+        return 0
+
     artifacts, metrics = train_probability_model(
-        dataset.drop(columns=[c for c in drop_cols if c in dataset.columns]),
+        train_df,
         target_col="label",
         calibration=("none" if args.calibration == "none" else args.calibration),
+        calibration_source=str(args.calibration_source),
+        fold_jobs=int(args.fold_jobs),
+        n_estimators=int(args.n_estimators),
+        max_depth=int(args.max_depth),
+        backend=str(args.backend),
+        n_jobs=int(n_jobs),
     )
     save_model(artifacts, args.out_model)
+    if args.out_lean:
+        meta = {k: v for k, v in metrics.items() if isinstance(v, (int, float, str))}
+        save_lean(
+            compile_model(artifacts),
+            args.out_lean,
+            metadata={"symbol": cfg.symbol, "samples": int(len(train_df)), "n_estimators": int(args.n_estimators), "max_depth": int(args.max_depth), "metrics": meta},
+        )
 
     top = feature_importances(artifacts, top_n=20)
     metrics_out = {
         **metrics,
         "feature_importances_top20": top,
         "candidates": len(candidates),
+        "feature_rows": len(feat_rows),
         "labeled": len(label_res.labeled),
         "dropped": label_res.dropped,
     }
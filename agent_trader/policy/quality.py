@@ -3,6 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Literal
 
+import numpy as np
+
 from agent_trader.market_regime.regime import MarketRegime
 from agent_trader.session.session_filter import SessionState
 
@@ -16,6 +18,31 @@ class QualityDecision:
     risk_multiplier: float
 
 
+@dataclass(frozen=True)
+class QualityThresholds:
+    transition_confluence: float = 4.0
+    good_confluence: float = 4.0
+    good_prob: float = 0.50
+    good_prob_confluence: float = 3.0
+    good_alt_confluence: float = 3.5
+    average_prob: float = 0.45
+    average_prob_confluence: float = 2.5
+    average_alt_confluence: float = 3.0
+    fallback_prob: float = 0.60
+    fallback_confluence: float = 1.5
+    active_atr_percentile: float = 0.7
+    secondary_risk_factor: float = 0.5
+
+
+DEFAULT_QUALITY = QualityThresholds()
+
+
+@dataclass(frozen=True)
+class QualityDecisionArray:
+    quality: np.ndarray
+    risk_multiplier: np.ndarray
+
+
 def decide_quality(
     *,
     probability: float,
@@ -23,10 +50,11 @@ def decide_quality(
     market_regime: MarketRegime,
     session_state: SessionState,
     atr_percentile: float | None = None,
+    th: QualityThresholds = DEFAULT_QUALITY,
 ) -> QualityDecision:
     # 1. Basic filtering by regime
     # We now allow TRANSITION if it's a high-confluence SMC setup
-    if market_regime == "TRANSITION" and confluence_score < 4.0:
+    if market_regime == "TRANSITION" and confluence_score < th.transition_confluence:
         return QualityDecision(quality="SKIP", risk_multiplier=0.0)
     
     # 2. Strict blocking
@@ -38,23 +66,23 @@ def decide_quality(
     
     # NEW: Strategy Strength Overrides (Allowing trades with low AI prob if Confluence is high)
     # GOOD: Extreme technical strength (Institutional/SMC)
-    if confluence_score >= 4.0:
+    if confluence_score >= th.good_confluence:
         base = QualityDecision(quality="GOOD", risk_multiplier=1.0)
     # GOOD: Strong technicals + some AI agreement
-    elif (probability >= 0.50 and confluence_score >= 3.0) or (confluence_score >= 3.5):
+    elif (probability >= th.good_prob and confluence_score >= th.good_prob_confluence) or (confluence_score >= th.good_alt_confluence):
         base = QualityDecision(quality="GOOD", risk_multiplier=0.75)
     # AVERAGE: Standard setups
-    elif (probability >= 0.45 and confluence_score >= 2.5) or (confluence_score >= 3.0):
+    elif (probability >= th.average_prob and confluence_score >= th.average_prob_confluence) or (confluence_score >= th.average_alt_confluence):
         base = QualityDecision(quality="AVERAGE", risk_multiplier=0.5)
     # FALLBACK: Normal AI-driven logic
-    elif probability >= 0.60 and confluence_score >= 1.5:
+    elif probability >= th.fallback_prob and confluence_score >= th.fallback_confluence:
         base = QualityDecision(quality="AVERAGE", risk_multiplier=0.5)
     else:
         base = QualityDecision(quality="SKIP", risk_multiplier=0.0)
 
     # 4. Market Activity Override (The "Smarter Way")
     # If volatility is high, we are more lenient with session rules
-    is_highly_active = atr_percentile is not None and atr_percentile >= 0.7
+    is_highly_active = atr_percentile is not None and atr_percentile >= th.active_atr_percentile
     
     # 5. Session Logic
     if session_state == "PRIMARY":
@@ -67,11 +95,48 @@ def decide_quality(
             if base.quality == "SKIP":
                 return QualityDecision(quality="SKIP", risk_multiplier=0.0)
             # Allow both GOOD and AVERAGE, but with reduced risk (half of base)
-            return QualityDecision(quality=base.quality, risk_multiplier=base.risk_multiplier * 0.5)
+            return QualityDecision(quality=base.quality, risk_multiplier=base.risk_multiplier * th.secondary_risk_factor)
         else:
             # Normal secondary session logic: only GOOD trades
             if base.quality != "GOOD":
                 return QualityDecision(quality="SKIP", risk_multiplier=0.0)
-            return QualityDecision(quality="GOOD", risk_multiplier=base.risk_multiplier * 0.5)
+            return QualityDecision(quality="GOOD", risk_multiplier=base.risk_multiplier * th.secondary_risk_factor)
 
     return QualityDecision(quality="SKIP", risk_multiplier=0.0)
+
+
+def decide_quality_array(
+    *,
+    probability: np.ndarray,
+    confluence_score: np.ndarray,
+    market_regime: np.ndarray,
+    session_state: np.ndarray,
+    atr_percentile: np.ndarray | None = None,
+    th: QualityThresholds = DEFAULT_QUALITY,
+) -> QualityDecisionArray:
+    """`decide_quality` over aligned arrays; missing ATR percentiles are NaN."""
+    p = np.asarray(probability, dtype=float)
+    conf = np.asarray(confluence_score, dtype=float)
+    regime = np.asarray(market_regime).astype(str)
+    session = np.asarray(session_state).astype(str)
+    atr = np.full(len(p), np.nan) if atr_percentile is None else np.asarray(atr_percentile, dtype=float)
+
+    good_full = conf >= th.good_confluence
+    good = good_full | (p >= th.good_prob) & (conf >= th.good_prob_confluence) | (conf >= th.good_alt_confluence)
+    average = ~good & (
+        (p >= th.average_prob) & (conf >= th.average_prob_confluence)
+        | (conf >= th.average_alt_confluence)
+        | (p >= th.fallback_prob) & (conf >= th.fallback_confluence)
+    )
+    base_risk = np.select([good_full, good, average], [1.0, 0.75, 0.5], 0.0)
+
+    # NaN compares False, like a missing percentile
+    active = atr >= th.active_atr_percentile
+    primary = session == "PRIMARY"
+    secondary = session == "SECONDARY"
+    keep = ((primary & (good | average)) | (secondary & (good | (average & active)))) & ~(
+        (regime == "TRANSITION") & (conf < th.transition_confluence)
+    )
+    risk = np.where(keep, np.where(secondary, base_risk * th.secondary_risk_factor, base_risk), 0.0)
+    quality = np.where(keep & good, "GOOD", np.where(keep & average, "AVERAGE", "SKIP"))
+    return QualityDecisionArray(quality=quality, risk_multiplier=risk)
@@ -13,11 +13,19 @@ import pandas as pd
 
 from agent_trader.config import DEFAULT_CONFIG
 from agent_trader.data.csv_loader import load_ohlcv_csv
-from agent_trader.data.mt5_loader import get_spread_pips, load_recent_multi_timeframe
+from agent_trader.data.delta_log import DeltaLogReader
+from agent_trader.data.history_store import HistoryStore, store_for_snapshot
+from agent_trader.data.incremental_csv import IncrementalCSVReader
+from agent_trader.data.mt5_cache import CachedRatesFetcher
+from agent_trader.data.mt5_loader import get_spread_pips, load_recent_multi_timeframe, shutdown as mt5_shutdown
+from agent_trader.data.resample import IncrementalResampler
+from agent_trader.data.snapshot import SnapshotReader
 from agent_trader.execution.signal_writer import make_signal, write_signal_csv
-from agent_trader.features.builder import build_feature_rows
-from agent_trader.ml.model import load_model, predict_proba
+from agent_trader.features.builder import build_feature_rows, candidates_for_rows
+from agent_trader.ml.compiled import load_compiled_cached
+from agent_trader.ml.memo import PredictionCache
 from agent_trader.policy.quality import decide_quality
+from agent_trader.runtime.warmup import plan_warmup
 from agent_trader.session.session_filter import get_session_state
 from agent_trader.strategy.generator import CandidateInputs, generate_candidates
 
@@ -69,6 +77,28 @@ def _write_state(path: Path, state: dict) -> None:
     tmp.replace(path)
 
 
+_HISTORY_STORES: dict[str, HistoryStore] = {}
+
+
+def _tail_bars(df: pd.DataFrame, bars: int) -> pd.DataFrame:
+    if bars <= 0 or len(df) <= bars:
+        return df
+    return df.iloc[len(df) - int(bars) :].reset_index(drop=True)
+
+
+def _ingest_history(history_dir: str, paths: list[str]) -> None:
+    # Fold each EA snapshot into the long-term store; only the new bars are read
+    for p in paths:
+        store = _HISTORY_STORES.get(p)
+        if store is None:
+            store = store_for_snapshot(history_dir, p)
+            _HISTORY_STORES[p] = store
+        try:
+            store.ingest_snapshot(p)
+        except OSError:
+            logging.warning("history_ingest_failed path=%s", p)
+
+
 def _pip_size(symbol: str) -> float:
     s = symbol.upper()
     return 0.01 if s.endswith("JPY") else 0.0001
@@ -91,6 +121,13 @@ def run_once(
     state_file: str,
     max_signals_per_day: int,
     max_spread_pips: float,
+    history_dir: str = "",
+    csv_reader: IncrementalCSVReader | None = None,
+    snapshot_reader: SnapshotReader | None = None,
+    delta_reader: DeltaLogReader | None = None,
+    mt5_fetcher: CachedRatesFetcher | None = None,
+    resampler: IncrementalResampler | None = None,
+    prediction_cache: PredictionCache | None = None,
 ) -> ServiceStatus:
     # Update config with the actual symbol being traded
     cfg = replace(DEFAULT_CONFIG, symbol=mt5_symbol)
@@ -116,14 +153,16 @@ def run_once(
 
     spread_pips: float | None = None
     if source == "mt5":
-        frames = load_recent_multi_timeframe(
-            symbol=str(mt5_symbol),
-            bars_by_tf={"M15": int(bars_m15), "H1": int(bars_h1), "H4": int(bars_h4)},
-            timezone="UTC",
-        )
+        bars_by_tf = {"M15": int(bars_m15)}
+        if resampler is None:
+            bars_by_tf.update({"H1": int(bars_h1), "H4": int(bars_h4)})
+        if mt5_fetcher is not None:
+            frames = mt5_fetcher.fetch_multi(symbol=str(mt5_symbol), bars_by_tf=bars_by_tf)
+        else:
+            frames = load_recent_multi_timeframe(symbol=str(mt5_symbol), bars_by_tf=bars_by_tf, timezone="UTC")
         m15 = frames["M15"]
-        h1 = frames["H1"]
-        h4 = frames["H4"]
+        h1 = frames.get("H1")
+        h4 = frames.get("H4")
         spread_pips = get_spread_pips(symbol=str(mt5_symbol), pip_size=_pip_size(str(mt5_symbol)))
         if spread_pips is not None and float(spread_pips) > float(max_spread_pips):
             return ServiceStatus(
@@ -137,10 +176,44 @@ def run_once(
                 last_error="spread_too_high",
                 skipped_reasons=[],
             )
+    elif source == "snapshot":
+        if snapshot_reader is None:
+            raise ValueError("snapshot_reader is required when source=snapshot")
+        snap = snapshot_reader.read()
+        if snap is None:
+            raise RuntimeError("no coherent snapshot published yet")
+        h4 = snap.frames.get("H4")
+        h1 = snap.frames.get("H1")
+        m15 = snap.frames["M15"]
+    elif source == "delta":
+        if delta_reader is None:
+            raise ValueError("delta_reader is required when source=delta")
+        frames = delta_reader.read()
+        needed = ("M15",) if resampler is not None else ("H4", "H1", "M15")
+        if not all(tf in frames for tf in needed):
+            raise RuntimeError(f"delta log does not hold {'/'.join(needed)} bars yet")
+        h4 = frames.get("H4")
+        h1 = frames.get("H1")
+        m15 = frames["M15"]
     else:
-        h4 = load_ohlcv_csv(h4_path, schema="generic")
-        h1 = load_ohlcv_csv(h1_path, schema="generic")
-        m15 = load_ohlcv_csv(m15_path, schema="generic")
+        # With a resampler only the M15 export is read
+        paths = [m15_path] if resampler is not None else [h4_path, h1_path, m15_path]
+        read = csv_reader.read if csv_reader is not None else (lambda p: load_ohlcv_csv(p, schema="generic"))
+        loaded = [read(p) for p in paths]
+        m15 = loaded[-1]
+        h4, h1 = (None, None) if resampler is not None else (loaded[0], loaded[1])
+        if history_dir:
+            _ingest_history(history_dir, paths)
+
+    if resampler is not None:
+        derived = resampler.update(m15)
+        h4 = derived["H4"]
+        h1 = derived["H1"]
+
+    # Exports and caches may hold more history than the strategy depends on
+    m15 = _tail_bars(m15, bars_m15)
+    h1 = _tail_bars(h1, bars_h1)
+    h4 = _tail_bars(h4, bars_h4)
 
     m15_times = pd.to_datetime(m15["time"])
     latest_t = m15_times.iloc[-1].to_pydatetime()
@@ -160,7 +233,8 @@ def run_once(
             skipped_reasons=[],
         )
 
-    artifacts = load_model(model_path)
+    # Compiled once per model file and reused while its mtime is unchanged
+    model = load_compiled_cached(model_path)
     candidates = generate_candidates(CandidateInputs(h4=h4, h1=h1, m15=m15), cfg=cfg, live_gate=True)
     
     # Filter for recent candidates only in live/paper mode
@@ -183,8 +257,7 @@ def run_once(
         )
 
     feat_rows = build_feature_rows(cfg=cfg, h4=h4, h1=h1, m15=m15, candidates=candidates)
-    feat_df = pd.DataFrame([r.features for r in feat_rows])
-    if len(feat_df) == 0:
+    if not feat_rows:
         return ServiceStatus(
             time_utc=now_iso,
             session_state=ss,
@@ -197,7 +270,10 @@ def run_once(
             skipped_reasons=[],
         )
 
-    probs = predict_proba(artifacts, feat_df)
+    candidates = candidates_for_rows(candidates, feat_rows)
+    rows = [r.features for r in feat_rows]
+    # The same closed-bar candidates come back every cycle until the next M15 bar
+    probs = prediction_cache.predict_rows(model, rows) if prediction_cache is not None else model.predict_rows(rows)
     ranked = sorted(zip(candidates, probs), key=lambda x: x[1], reverse=True)
     out_path = Path(out_dir)
     out_path.mkdir(parents=True, exist_ok=True)
@@ -281,14 +357,14 @@ def run_once(
 
 def main() -> int:
     ap = argparse.ArgumentParser()
-    ap.add_argument("--source", choices=["csv", "mt5"], default="csv")
+    ap.add_argument("--source", choices=["csv", "mt5", "snapshot", "delta"], default="csv")
     ap.add_argument("--h4", default="")
     ap.add_argument("--h1", default="")
     ap.add_argument("--m15", default="")
     ap.add_argument("--symbol", default=DEFAULT_CONFIG.symbol)
-    ap.add_argument("--bars-m15", type=int, default=1500)
-    ap.add_argument("--bars-h1", type=int, default=800)
-    ap.add_argument("--bars-h4", type=int, default=500)
+    ap.add_argument("--bars-m15", type=int, default=0)
+    ap.add_argument("--bars-h1", type=int, default=0)
+    ap.add_argument("--bars-h4", type=int, default=0)
     ap.add_argument("--model", required=True)
     ap.add_argument("--out-dir", required=True)
     ap.add_argument("--min-prob", type=float, default=0.55)
@@ -299,6 +375,12 @@ def main() -> int:
     ap.add_argument("--max-signals-per-day", type=int, default=DEFAULT_CONFIG.max_signals_per_day)
     ap.add_argument("--max-spread-pips", type=float, default=DEFAULT_CONFIG.max_spread_pips)
     ap.add_argument("--log-file", default="")
+    ap.add_argument("--history-dir", default="")
+    ap.add_argument("--prediction-cache-size", type=int, default=4096)
+    ap.add_argument("--snapshot-dir", default="")
+    ap.add_argument("--delta-dir", default="")
+    ap.add_argument("--derive-htf", action="store_true")
+    ap.add_argument("--htf-offset-minutes", type=int, default=0)
     args = ap.parse_args()
 
     log_level = os.environ.get("AGENT_TRADER_LOG_LEVEL", "INFO").upper()
@@ -308,11 +390,42 @@ def main() -> int:
     logging.basicConfig(level=getattr(logging, log_level, logging.INFO), handlers=handlers, format="%(asctime)s %(levelname)s %(message)s")
 
     status_path = Path(args.status_file)
+    # 0 means "as many bars as the indicators depend on" (see runtime/warmup.py)
+    plan = plan_warmup()
+    bars_m15 = int(args.bars_m15) or (plan.m15_for_derived_htf() if args.derive_htf else plan.m15)
+    bars_h1 = int(args.bars_h1) or plan.h1
+    bars_h4 = int(args.bars_h4) or plan.h4
+    # Keeps the parsed CSVs between cycles so only changed rows are re-read
+    csv_reader = IncrementalCSVReader(schema="generic")
+    snapshot_reader = SnapshotReader(args.snapshot_dir, str(args.symbol)) if args.snapshot_dir else None
+    mt5_fetcher = CachedRatesFetcher() if args.source == "mt5" else None
+    resampler = (
+        IncrementalResampler(
+            offset_minutes=int(args.htf_offset_minutes),
+            max_bars={"H1": int(bars_h1), "H4": int(bars_h4)},
+        )
+        if args.derive_htf
+        else None
+    )
+    delta_reader = (
+        DeltaLogReader(
+            args.delta_dir,
+            str(args.symbol),
+            max_bars={"M15": int(bars_m15), "H1": int(bars_h1), "H4": int(bars_h4)},
+        )
+        if args.delta_dir
+        else None
+    )
+    prediction_cache = PredictionCache(int(args.prediction_cache_size)) if int(args.prediction_cache_size) > 0 else None
     try:
         while True:
             try:
-                if args.source == "csv" and (not args.h4 or not args.h1 or not args.m15):
-                    raise ValueError("--h4/--h1/--m15 are required when --source=csv")
+                if args.source == "csv" and (not args.m15 or (not args.derive_htf and (not args.h4 or not args.h1))):
+                    raise ValueError("--h4/--h1/--m15 are required when --source=csv (only --m15 with --derive-htf)")
+                if args.source == "snapshot" and snapshot_reader is None:
+                    raise ValueError("--snapshot-dir is required when --source=snapshot")
+                if args.source == "delta" and delta_reader is None:
+                    raise ValueError("--delta-dir is required when --source=delta")
 
                 s = run_once(
                     source=str(args.source),
@@ -320,9 +433,9 @@ def main() -> int:
                     h1_path=str(args.h1),
                     m15_path=str(args.m15),
                     mt5_symbol=str(args.symbol),
-                    bars_m15=int(args.bars_m15),
-                    bars_h1=int(args.bars_h1),
-                    bars_h4=int(args.bars_h4),
+                    bars_m15=int(bars_m15),
+                    bars_h1=int(bars_h1),
+                    bars_h4=int(bars_h4),
                     model_path=str(args.model),
                     out_dir=str(args.out_dir),
                     min_prob=float(args.min_prob),
@@ -330,6 +443,13 @@ def main() -> int:
                     state_file=str(args.state_file),
                     max_signals_per_day=int(args.max_signals_per_day),
                     max_spread_pips=float(args.max_spread_pips),
+                    history_dir=str(args.history_dir),
+                    csv_reader=csv_reader,
+                    snapshot_reader=snapshot_reader,
+                    delta_reader=delta_reader,
+                    mt5_fetcher=mt5_fetcher,
+                    resampler=resampler,
+                    prediction_cache=prediction_cache,
                 )
             except Exception as e:  # noqa: BLE001
                 now_iso = datetime.now(timezone.utc).isoformat()
@@ -369,6 +489,8 @@ def main() -> int:
     except KeyboardInterrupt:
         print("\n[INFO] AI Service stopped by user. Happy trading!", flush=True)
         return 0
+    finally:
+        mt5_shutdown()
 
 
 if __name__ == "__main__":
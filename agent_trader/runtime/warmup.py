@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+from dataclasses import asdict, dataclass
+
+import pandas as pd
+
+from agent_trader.config import DEFAULT_CONFIG, TradingConfig
+from agent_trader.data.csv_loader import load_ohlcv_csv
+from agent_trader.features.builder import build_feature_rows
+from agent_trader.strategy.generator import CandidateInputs, generate_candidates
+
+
+@dataclass(frozen=True)
+class WarmupThresholds:
+    # Residual weight of the truncated EMA seed, (1 - 2 / (period + 1)) ** bars
+    ema_tolerance: float = 1e-3
+    ema_periods: tuple[int, ...] = (50, 200)
+    atr_period: int = 14
+    atr_percentile_window: int = 250
+    generator_start: int = 210
+    sr_lookback: int = 300
+    smc_window: int = 100
+    fvg_max_age: int = 96
+    # M15 bars the service acts on (its 30 minute cutoff keeps the last three)
+    target_bars: int = 3
+
+
+DEFAULT_WARMUP = WarmupThresholds()
+
+
+@dataclass(frozen=True)
+class WarmupPlan:
+    m15: int
+    h1: int
+    h4: int
+
+    def bars_by_tf(self) -> dict[str, int]:
+        return {"M15": self.m15, "H1": self.h1, "H4": self.h4}
+
+    def m15_for_derived_htf(self) -> int:
+        # When H1/H4 are resampled from M15 the feed has to cover their history too
+        return max(self.m15, self.h1 * 4, self.h4 * 16)
+
+
+def ema_warmup_bars(period: int, tolerance: float) -> int:
+    alpha = 2.0 / (float(period) + 1.0)
+    return int(math.ceil(math.log(tolerance) / math.log(1.0 - alpha)))
+
+
+def plan_warmup(th: WarmupThresholds = DEFAULT_WARMUP) -> WarmupPlan:
+    # M15: ATR needs the previous close, so the first exact ATR14 sits at index `atr_period`;
+    # its 250-bar percentile is exact from index atr_period + window - 1.
+    first_exact = max(
+        th.atr_period + th.atr_percentile_window - 1,
+        th.generator_start,
+        th.smc_window,
+        th.fvg_max_age + 2,
+    )
+    m15 = first_exact + th.target_bars
+
+    ema = max(ema_warmup_bars(p, th.ema_tolerance) for p in th.ema_periods)
+    # Higher-timeframe bars spanned by the target M15 bars (the forming bar included)
+    h1_span = int(math.ceil(th.target_bars / 4)) + 1
+    h4_span = int(math.ceil(th.target_bars / 16)) + 1
+    h1 = max(ema, th.sr_lookback) + h1_span
+    h4 = ema + h4_span
+    return WarmupPlan(m15=m15, h1=h1, h4=h4)
+
+
+@dataclass(frozen=True)
+class WarmupCheck:
+    ok: bool
+    candidates_full: int
+    candidates_truncated: int
+    max_abs_diff: float
+    mismatches: list[str]
+
+
+def _tail(df: pd.DataFrame, n: int) -> pd.DataFrame:
+    return df.iloc[max(0, len(df) - int(n)) :].reset_index(drop=True)
+
+
+def _targets(cfg: TradingConfig, inputs: CandidateInputs, target_bars: int, training_mode: bool) -> dict:
+    m15_times = pd.to_datetime(inputs.m15["time"])
+    cutoff = m15_times.iloc[-int(target_bars)]
+    cands = generate_candidates(inputs, cfg=cfg, live_gate=False, training_mode=training_mode)
+    cands = [c for c in cands if pd.Timestamp(c.time) >= cutoff]
+    rows = build_feature_rows(cfg=cfg, h4=inputs.h4, h1=inputs.h1, m15=inputs.m15, candidates=cands)
+    return {(str(r.time), r.features["side"]): r.features for r in rows}
+
+
+def verify_plan(
+    *,
+    h4: pd.DataFrame,
+    h1: pd.DataFrame,
+    m15: pd.DataFrame,
+    plan: WarmupPlan,
+    cfg: TradingConfig = DEFAULT_CONFIG,
+    th: WarmupThresholds = DEFAULT_WARMUP,
+    atol: float = 1e-4,
+    training_mode: bool = False,
+) -> WarmupCheck:
+    """Runs the live path on the full frames and on frames cut to `plan`, and compares the
+    candidates and features of the last `target_bars` M15 bars.
+
+    `training_mode=True` skips the session filters, which checks more candidates per run.
+    """
+    full = _targets(cfg, CandidateInputs(h4=h4, h1=h1, m15=m15), th.target_bars, training_mode)
+    cut_inputs = CandidateInputs(h4=_tail(h4, plan.h4), h1=_tail(h1, plan.h1), m15=_tail(m15, plan.m15))
+    cut = _targets(cfg, cut_inputs, th.target_bars, training_mode)
+
+    mismatches: list[str] = []
+    max_diff = 0.0
+    for key in sorted(set(full) | set(cut)):
+        if key not in full or key not in cut:
+            mismatches.append(f"{key[0]} {key[1]}: candidate only in {'full' if key in full else 'truncated'} run")
+            continue
+        for name, a in full[key].items():
+            b = cut[key].get(name)
+            if isinstance(a, float) and isinstance(b, float):
+                d = abs(a - b) if not (math.isnan(a) and math.isnan(b)) else 0.0
+                max_diff = max(max_diff, d)
+                if d > atol:
+                    mismatches.append(f"{key[0]} {key[1]}: {name} {a!r} != {b!r}")
+            elif a != b:
+                mismatches.append(f"{key[0]} {key[1]}: {name} {a!r} != {b!r}")
+    return WarmupCheck(
+        ok=not mismatches,
+        candidates_full=len(full),
+        candidates_truncated=len(cut),
+        max_abs_diff=float(max_diff),
+        mismatches=mismatches,
+    )
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ema-tolerance", type=float, default=DEFAULT_WARMUP.ema_tolerance)
+    ap.add_argument("--target-bars", type=int, default=DEFAULT_WARMUP.target_bars)
+    ap.add_argument("--h4", default="")
+    ap.add_argument("--h1", default="")
+    ap.add_argument("--m15", default="")
+    args = ap.parse_args()
+
+    th = WarmupThresholds(ema_tolerance=float(args.ema_tolerance), target_bars=int(args.target_bars))
+    plan = plan_warmup(th)
+    out: dict = {"plan": asdict(plan)}
+    if args.h4 and args.h1 and args.m15:
+        check = verify_plan(
+            h4=load_ohlcv_csv(args.h4, schema="generic"),
+            h1=load_ohlcv_csv(args.h1, schema="generic"),
+            m15=load_ohlcv_csv(args.m15, schema="generic"),
+            plan=plan,
+            th=th,
+        )
+        out["check"] = asdict(check)
+    print(json.dumps(out, separators=(",", ":")))
+    return 0 if out.get("check", {}).get("ok", True) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 
 import pandas as pd
 
 from agent_trader.config import TradingConfig
+from agent_trader.data.resample import resample_ohlcv
 from agent_trader.indicators.atr import atr, rolling_percentile
 from agent_trader.market_regime.regime import classify_regime
 from agent_trader.session.session_filter import get_session_state
@@ -23,6 +27,21 @@ class CandidateInputs:
     h1: pd.DataFrame
     m15: pd.DataFrame
 
+    @classmethod
+    def from_m15(cls, m15: pd.DataFrame, *, offset_minutes: int = 0) -> "CandidateInputs":
+        # H1/H4 built from the same M15 feed, so all three timeframes describe one moment
+        return cls(
+            h4=resample_ohlcv(m15, "H4", offset_minutes=offset_minutes),
+            h1=resample_ohlcv(m15, "H1", offset_minutes=offset_minutes),
+            m15=m15,
+        )
+
+
+_FIRST_BAR = 210
+# M15 bars a chunk needs before its first own bar: ATR14 plus its 250-bar percentile window
+# (the widest lookback), which also covers the 100-bar SMC window and the 96-bar FVG age limit
+CHUNK_OVERLAP_BARS = 14 + 250
+
 
 def generate_candidates(data: CandidateInputs, *, cfg: TradingConfig, live_gate: bool = False, training_mode: bool = False) -> list[TradeCandidate]:
     m15 = data.m15.reset_index(drop=True)
@@ -31,10 +50,22 @@ def generate_candidates(data: CandidateInputs, *, cfg: TradingConfig, live_gate:
         latest_t = m15_times.iloc[-1].to_pydatetime()
         if get_session_state(latest_t, tz=cfg.timezone) == "BLOCKED":
             return []
+    return _generate_range(data, m15, cfg=cfg, live_gate=live_gate, training_mode=training_mode, first=_FIRST_BAR, atr14=atr(m15, 14))
 
+
+def _generate_range(
+    data: CandidateInputs,
+    m15: pd.DataFrame,
+    *,
+    cfg: TradingConfig,
+    live_gate: bool,
+    training_mode: bool,
+    first: int,
+    atr14: pd.Series,
+) -> list[TradeCandidate]:
+    m15_times = pd.to_datetime(m15["time"])
     h4_ctx = compute_trend_context(data.h4)
     h1_ctx = compute_trend_context(data.h1)
-    atr14 = atr(m15, 14)
     atr_pct = rolling_percentile(atr14, window=250)
     fvgs = detect_fvgs_m15(m15, min_gap=0.0)
 
@@ -45,13 +76,15 @@ def generate_candidates(data: CandidateInputs, *, cfg: TradingConfig, live_gate:
     sr = compute_sr_context(data.h1, end_time=None)
 
     out: list[TradeCandidate] = []
-    for i in range(210, len(m15)):
+    for i in range(first, len(m15)):
         t = m15_times.iloc[i].to_pydatetime()
         
         # Default session values for training mode
         session = "London"
         overlap = True
         session_state = "PRIMARY"
+        # Only the trend branch looks for order blocks; reset so no bar inherits an earlier bar's value
+        in_ob = False
 
         # During training, we ignore session filters to maximize data samples.
         # This helps the AI learn patterns even if they happen outside London hours.
@@ -292,3 +325,52 @@ def generate_candidates(data: CandidateInputs, *, cfg: TradingConfig, live_gate:
             # print(f"DEBUG: Last bar regime: {last_regime}")
 
     return out
+
+
+def _generate_chunk(task: tuple) -> list[TradeCandidate]:
+    h4, h1, m15, atr14, first, cfg, training_mode = task
+    return _generate_range(
+        CandidateInputs(h4=h4, h1=h1, m15=m15), m15, cfg=cfg, live_gate=False, training_mode=training_mode, first=first, atr14=atr14
+    )
+
+
+def generate_candidates_parallel(
+    data: CandidateInputs,
+    *,
+    cfg: TradingConfig,
+    training_mode: bool = True,
+    chunk_bars: int = 5000,
+    max_workers: int | None = None,
+) -> list[TradeCandidate]:
+    """Same output as `generate_candidates` (without the live gate), split into M15 chunks run in a process pool.
+
+    Each chunk carries `CHUNK_OVERLAP_BARS` of preceding M15 history. ATR14 is computed once over the
+    whole history and sliced, and every worker gets the full H1/H4 frames, so EMA200 and the 300-bar
+    S/R context see exactly what the serial run sees.
+    """
+    m15 = data.m15.reset_index(drop=True)
+    atr14 = atr(m15, 14)
+    bounds = list(range(_FIRST_BAR, len(m15), max(1, int(chunk_bars)))) + [len(m15)]
+    tasks = []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        start = max(0, lo - CHUNK_OVERLAP_BARS)
+        tasks.append(
+            (
+                data.h4,
+                data.h1,
+                m15.iloc[start:hi].reset_index(drop=True),
+                atr14.iloc[start:hi].reset_index(drop=True),
+                lo - start,
+                cfg,
+                training_mode,
+            )
+        )
+    if not tasks:
+        return []
+    workers = max(1, min(len(tasks), int(max_workers or os.cpu_count() or 1)))
+    if workers == 1:
+        parts = [_generate_chunk(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            parts = list(ex.map(_generate_chunk, tasks, chunksize=max(1, math.ceil(len(tasks) / (4 * workers)))))
+    return [c for part in parts for c in part]
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import hashlib
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
+from functools import cached_property
 from typing import Optional
 
 
@@ -54,6 +56,13 @@ class TradeCandidate:
     confluence_score: float
     meta: dict
 
+    @cached_property
+    def candidate_id(self) -> str:
+        # Deterministic across runs and processes: same setup on the same bar, same id
+        t = self.time.isoformat() if hasattr(self.time, "isoformat") else str(self.time)
+        key = f"{self.symbol}|{t}|{self.side.value}|{self.entry_price!r}|{self.sl_price!r}|{self.tp_price!r}|{self.reason}"
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
 
 @dataclass(frozen=True)
 class LabeledTrade:
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agent_trader.config import DEFAULT_CONFIG
+from agent_trader.labeling.batch import BarrierConfig, label_candidates_batch, parse_barrier
+from agent_trader.labeling.labeler import label_candidates
+from agent_trader.types import Side, TradeCandidate
+from agent_trader.utils import pips_to_price
+
+
+def _setup(n_bars: int = 600, n_cands: int = 250):
+    rng = np.random.default_rng(5)
+    times = pd.date_range("2024-01-01", periods=n_bars, freq="15min", tz="UTC")
+    close = 1.27 + np.cumsum(rng.normal(0, 6e-4, n_bars))
+    open_ = np.r_[close[0], close[:-1]]
+    m15 = pd.DataFrame(
+        {
+            "time": times,
+            "open": open_,
+            "high": np.maximum(open_, close) + rng.uniform(0, 5e-4, n_bars),
+            "low": np.minimum(open_, close) - rng.uniform(0, 5e-4, n_bars),
+            "close": close,
+        }
+    )
+    cands = []
+    # Includes the very last bars, so windows run off the end of the data
+    for i in sorted(rng.choice(n_bars, n_cands, replace=False)):
+        side = Side.BUY if rng.random() < 0.5 else Side.SELL
+        sgn = 1.0 if side == Side.BUY else -1.0
+        entry = float(close[i])
+        cands.append(
+            TradeCandidate(
+                time=times[i].to_pydatetime(),
+                symbol="GBPUSD",
+                side=side,
+                entry_price=entry,
+                sl_price=entry - sgn * pips_to_price("GBPUSD", float(rng.uniform(5, 25))),
+                tp_price=entry + sgn * pips_to_price("GBPUSD", float(rng.uniform(5, 40))),
+                reason="test",
+                confluence_score=1.0,
+                meta={},
+            )
+        )
+    return m15, cands
+
+
+def _with_levels(c: TradeCandidate, b: BarrierConfig) -> TradeCandidate:
+    sgn = 1.0 if c.side == Side.BUY else -1.0
+    sl = c.sl_price if b.sl_pips is None else c.entry_price - sgn * pips_to_price(c.symbol, b.sl_pips)
+    tp = c.tp_price if b.tp_pips is None else c.entry_price + sgn * pips_to_price(c.symbol, b.tp_pips)
+    return replace(c, sl_price=sl, tp_price=tp)
+
+
+def test_every_barrier_matches_the_single_config_labeler():
+    m15, cands = _setup()
+    barriers = [
+        BarrierConfig(name="base"),
+        BarrierConfig(name="tight", sl_pips=8.0, tp_pips=12.0, max_lookahead_bars=16, break_even_after_rr=0.5),
+        BarrierConfig(name="wide", tp_pips=60.0, max_lookahead_bars=120, break_even_after_rr=10.0),
+    ]
+    for cfg in (DEFAULT_CONFIG, replace(DEFAULT_CONFIG, allow_overnight=True)):
+        wide = label_candidates_batch(cfg=cfg, m15=m15, candidates=cands, barriers=barriers, block_rows=64)
+        for b in barriers:
+            ref = label_candidates(
+                cfg=cfg,
+                m15=m15,
+                candidates=[_with_levels(c, b) for c in cands],
+                max_lookahead_bars=b.max_lookahead_bars,
+                break_even_after_rr=b.break_even_after_rr,
+            )
+            assert len(wide) == len(ref.labeled) and len(cands) - len(wide) == ref.dropped
+            assert list(wide["time"]) == [lt.candidate.time for lt in ref.labeled]
+            assert list(wide[f"{b.name}_label"]) == [lt.label for lt in ref.labeled]
+            assert list(wide[f"{b.name}_minutes_to_outcome"]) == [lt.minutes_to_outcome for lt in ref.labeled]
+            np.testing.assert_array_equal(wide[f"{b.name}_mfe_pips"], [lt.mfe_pips for lt in ref.labeled])
+            np.testing.assert_array_equal(wide[f"{b.name}_mae_pips"], [lt.mae_pips for lt in ref.labeled])
+            np.testing.assert_array_equal(wide[f"{b.name}_outcome_price"], [lt.outcome_price for lt in ref.labeled])
+        assert len(set(wide["base_label"])) == 3
+
+
+def test_parse_barrier_spec():
+    assert parse_barrier("tight:sl=8,tp=12,bars=16,be=0.5") == BarrierConfig("tight", 8.0, 12.0, 16, 0.5)
+    assert parse_barrier("base") == BarrierConfig("base")
+    with pytest.raises(ValueError):
+        parse_barrier("x:stop=3")
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from agent_trader.ml.budget import BudgetThresholds, _prefix_oof, run_budget, time_block_subsample
+from agent_trader.ml.model import _oof_predictions, _training_frame
+
+
+def _dataset(n: int = 360) -> pd.DataFrame:
+    rng = np.random.default_rng(11)
+    df = pd.DataFrame(
+        {
+            "side": rng.choice(["buy", "sell"], n),
+            "x1": rng.normal(size=n),
+            "x2": rng.normal(size=n),
+        }
+    )
+    score = df["x1"] + 0.5 * (df["side"] == "buy") + rng.normal(0, 1, n)
+    df["label"] = np.where(score > 0.2, "win", "loss")
+    return df
+
+
+def test_time_block_subsample_keeps_whole_blocks_in_order():
+    df = pd.DataFrame({"i": np.arange(100)})
+    sub = time_block_subsample(df, 0.4, 10)
+    assert sub["i"].is_monotonic_increasing
+    assert len(sub) == 40
+    assert sub["i"].iloc[0] == 0 and sub["i"].iloc[-1] == 99
+    # Every kept row belongs to a fully kept block
+    assert set(np.bincount(sub["i"].to_numpy() // 10)) <= {0, 10}
+    assert len(time_block_subsample(df, 1.0, 10)) == 100
+
+
+def test_tree_prefixes_match_a_forest_of_that_size():
+    X, y, cat, num = _training_frame(_dataset(), "label", "win", ("breakeven",))
+    oof, covered, _, _ = _prefix_oof(X, y, cat, num, n_splits=3, tree_counts=(8, 20), max_depth=4)
+    want, want_cov = _oof_predictions(X, y, cat, num, 3, 1, {"n_estimators": 20, "max_depth": 4})
+    assert (covered == want_cov).all()
+    assert np.max(np.abs(oof[20] - want)) < 1e-12
+    assert not np.allclose(oof[8], oof[20])
+
+
+def test_budget_report_recommends_a_full_sample_point():
+    th = BudgetThresholds(sample_fractions=(0.5, 1.0), tree_counts=(5, 20), max_depths=(3,), time_blocks=6, n_splits=3)
+    report = run_budget(_dataset(), th=th, baseline=(20, 3))
+    assert len(report.points) == 4
+    assert {p.samples for p in report.points} == {180, 360}
+    assert report.recommended.fraction == 1.0
+    assert all(0.0 <= p.roc_auc <= 1.0 and 0.0 <= p.brier <= 1.0 for p in report.points)
+    assert report.estimated_full_seconds["baseline"] >= report.estimated_full_seconds["recommended"] > 0.0
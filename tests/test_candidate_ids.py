@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import pickle
+from datetime import datetime, timezone
+
+from agent_trader.features.builder import FeatureRow, candidates_for_rows
+from agent_trader.pipelines.train import _assemble_dataset
+from agent_trader.types import LabeledTrade, Side, TradeCandidate
+
+
+def _cand(side: Side, minute: int = 0, entry: float = 1.25) -> TradeCandidate:
+    return TradeCandidate(
+        time=datetime(2024, 3, 1, 10, minute, tzinfo=timezone.utc),
+        symbol="GBPUSD",
+        side=side,
+        entry_price=entry,
+        sl_price=entry - 0.002 if side == Side.BUY else entry + 0.002,
+        tp_price=entry + 0.004 if side == Side.BUY else entry - 0.004,
+        reason="trend+priceaction",
+        confluence_score=3.0,
+        meta={},
+    )
+
+
+def _label(c: TradeCandidate, label: str) -> LabeledTrade:
+    return LabeledTrade(candidate=c, label=label, mfe_pips=10.0, mae_pips=5.0, minutes_to_outcome=60, outcome_price=None)
+
+
+def test_candidate_id_is_deterministic_and_distinguishes_setups():
+    buy = _cand(Side.BUY)
+    assert buy.candidate_id == _cand(Side.BUY).candidate_id == pickle.loads(pickle.dumps(buy)).candidate_id
+    assert len({buy.candidate_id, _cand(Side.SELL).candidate_id, _cand(Side.BUY, minute=15).candidate_id}) == 3
+
+
+def test_dataset_joins_on_id_without_cross_product():
+    buy, sell, later = _cand(Side.BUY), _cand(Side.SELL), _cand(Side.BUY, minute=15)
+    rows = [FeatureRow(time=c.time, features={"side": c.side.value}, candidate_id=c.candidate_id) for c in (buy, sell, later)]
+    # `later` has no label; the two same-bar candidates must not pair with each other's label
+    df = _assemble_dataset(rows, [_label(sell, "loss"), _label(buy, "win")])
+    assert len(df) == 2
+    assert df.set_index("side")["label"].to_dict() == {"buy": "win", "sell": "loss"}
+    assert list(df["candidate_id"]) == [buy.candidate_id, sell.candidate_id]
+
+
+def test_candidates_follow_feature_rows_when_some_are_skipped():
+    cands = [_cand(Side.BUY), _cand(Side.SELL), _cand(Side.BUY, minute=15)]
+    rows = [FeatureRow(time=c.time, features={}, candidate_id=c.candidate_id) for c in (cands[0], cands[2])]
+    assert candidates_for_rows(cands, rows) == [cands[0], cands[2]]
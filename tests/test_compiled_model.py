@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from sklearn.calibration import CalibratedClassifierCV
+
+from agent_trader.ml.compiled import compile_model, load_compiled_cached, save_compiled
+from agent_trader.ml.model import ModelArtifacts, _make_pipeline, predict_proba, save_model
+
+
+def _dataset(n: int = 300) -> tuple[pd.DataFrame, pd.Series]:
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        {
+            "side": pd.Series(rng.choice(["buy", "sell"], n), dtype=object),
+            "market_regime": pd.Series(rng.choice(["TREND", "RANGE", None], n), dtype=object),
+            "x1": rng.normal(size=n),
+            "x2": np.where(rng.random(n) < 0.2, np.nan, rng.normal(size=n)),
+            "x3": rng.integers(0, 5, n),
+        }
+    )
+    y = ((X["x1"] + 0.5 * (X["side"] == "buy") + rng.normal(0, 1, n)) > 0.3).astype(int)
+    return X, y
+
+
+def _artifacts(method: str) -> ModelArtifacts:
+    X, y = _dataset()
+    cat, num = ["side", "market_regime"], ["x1", "x2", "x3"]
+    raw = _make_pipeline(cat, num).set_params(clf__n_estimators=40, clf__n_jobs=1).fit(X, y)
+    cal = None
+    if method != "none":
+        base = _make_pipeline(cat, num).set_params(clf__n_estimators=40, clf__n_jobs=1)
+        cal = CalibratedClassifierCV(base, method=method, cv=3).fit(X, y)
+    return ModelArtifacts(raw, cal, method, list(X.columns), "win")
+
+
+def test_compiled_matches_sklearn_for_each_calibration():
+    X, _ = _dataset()
+    X.loc[0, "side"] = "unseen"
+    X.loc[1, "x1"] = np.nan
+    for method in ("none", "sigmoid", "isotonic"):
+        art = _artifacts(method)
+        want = np.asarray(predict_proba(art, X))
+        got = compile_model(art).predict_rows(X.to_dict("records"))
+        assert np.max(np.abs(want - got)) < 1e-9, method
+
+
+def test_cached_loader_compiles_once_per_model_file(tmp_path):
+    art = _artifacts("sigmoid")
+    path = tmp_path / "model.joblib"
+    save_model(art, str(path))
+    m1 = load_compiled_cached(str(path))
+    assert load_compiled_cached(str(path)) is m1
+
+    compiled_path = tmp_path / "model.compiled.joblib"
+    save_compiled(m1, str(compiled_path))
+    row = _dataset()[0].iloc[5].to_dict()
+    assert load_compiled_cached(str(compiled_path)).predict_one(row) == m1.predict_one(row)
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from agent_trader.data.delta_log import DeltaLogReader, DeltaLogWriter
+
+
+def _history(n: int) -> pd.DataFrame:
+    times = pd.date_range(datetime(2024, 1, 2), periods=n, freq="15min")
+    close = np.round(1.2 + np.arange(n) * 0.0001, 5)
+    return pd.DataFrame({"time": times, "open": close, "high": close + 0.001, "low": close - 0.001, "close": close, "volume": np.arange(n)})
+
+
+def test_delta_reader_tracks_sliding_exports(tmp_path):
+    full = _history(400)
+    writer = DeltaLogWriter(tmp_path, "GBPUSD")
+    reader = DeltaLogReader(tmp_path, "GBPUSD", max_bars={"M15": 300})
+
+    window = 300
+    for end in (window, window + 1, window + 1, window + 5):
+        snap = full.iloc[end - window : end].reset_index(drop=True)
+        if end == window + 1:
+            # Forming bar keeps moving inside the same M15 candle
+            snap.loc[len(snap) - 1, "close"] = float(snap["close"].iloc[-1]) + 0.0005
+        writer.export({"M15": snap})
+        got = reader.read()["M15"]
+        assert len(got) == len(snap)
+        assert list(got["time"]) == list(pd.to_datetime(snap["time"]))
+        assert np.allclose(got["close"].to_numpy(), snap["close"].to_numpy())
+        assert list(got["volume"]) == list(snap["volume"])
+
+    # Steady state: one closed bar appended, only that line and the side file are parsed
+    before = writer.bytes_written
+    writer.export({"M15": full.iloc[window + 6 - window : window + 6].reset_index(drop=True)})
+    assert writer.bytes_written - before < 300
+    reader.read()
+    assert reader.last_bytes_read < 300
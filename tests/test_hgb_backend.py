@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier
+
+from agent_trader.ml.compiled import PipelineScorer, load_compiled_cached
+from agent_trader.ml.model import feature_importances, predict_proba, save_model, train_probability_model
+from agent_trader.pipelines import benchmark, train
+from agent_trader.pipelines.benchmark import benchmark_backends
+
+
+def _dataset(n: int = 320) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame(
+        {
+            "side": rng.choice(["buy", "sell"], n),
+            "session": rng.choice(["LONDON", "NY", "ASIA", None], n),
+            "x1": rng.normal(size=n),
+            "x2": np.where(rng.random(n) < 0.1, np.nan, rng.normal(size=n)),
+        }
+    )
+    score = df["x1"] + 0.8 * (df["session"] == "LONDON") + rng.normal(0, 1, n)
+    df["label"] = np.where(score > 0.3, "win", "loss")
+    return df
+
+
+def test_hgb_backend_keeps_artifact_interface(tmp_path):
+    df = _dataset()
+    art, metrics = train_probability_model(df, calibration="sigmoid", calibration_source="oof", backend="hgb", n_estimators=100)
+    assert art.backend == "hgb"
+    assert isinstance(art.raw_pipeline.named_steps["clf"], HistGradientBoostingClassifier)
+    assert metrics["backend"] == "hgb"
+    assert 0 < metrics["boosting_iterations"] <= 100
+    assert feature_importances(art) == []
+
+    X = df.drop(columns=["label"])
+    X.loc[0, "session"] = "SYDNEY"
+    p = np.asarray(predict_proba(art, X))
+    assert ((p > 0) & (p < 1)).all()
+
+    path = tmp_path / "hgb.joblib"
+    save_model(art, str(path))
+    scorer = load_compiled_cached(str(path))
+    assert isinstance(scorer, PipelineScorer)
+    got = scorer.predict_rows(X.to_dict("records"))
+    assert np.max(np.abs(got - p)) < 1e-12
+    assert scorer.predict_rows([]).shape == (0,)
+
+
+def test_benchmark_compares_backends():
+    results = benchmark_backends(_dataset(), n_estimators=30, latency_rows=5, repeats=1)
+    assert [r.backend for r in results] == ["rf", "hgb"]
+    for r in results:
+        assert r.train_seconds > 0 and r.artifact_bytes > 0
+        assert 0.0 <= r.roc_auc_oof <= 1.0
+        assert r.latency_ms_one_row > 0 and r.batch_rows == 5
+
+
+def _write_m15(path, n: int = 1500) -> None:
+    rng = np.random.default_rng(3)
+    close = 1.27 + np.cumsum(rng.normal(0, 5e-4, n))
+    open_ = np.r_[close[0], close[:-1]]
+    pd.DataFrame(
+        {
+            "time": pd.date_range("2024-01-01", periods=n, freq="15min").strftime("%Y-%m-%d %H:%M:%S"),
+            "open": open_,
+            "high": np.maximum(open_, close) + rng.uniform(0, 4e-4, n),
+            "low": np.minimum(open_, close) - rng.uniform(0, 4e-4, n),
+            "close": close,
+            "volume": 1,
+        }
+    ).to_csv(path, index=False)
+
+
+def test_benchmark_runs_on_train_out_dataset(tmp_path, capsys):
+    _write_m15(tmp_path / "m15.csv")
+    dataset = tmp_path / "dataset.csv"
+    common = ["--n-estimators", "20", "--calibration", "none"]
+    assert train.main(["--derive-htf", "--m15", str(tmp_path / "m15.csv"), "--out-model", str(tmp_path / "m.joblib"), "--out-dataset", str(dataset), *common]) == 0
+    assert "candidate_id" in pd.read_csv(dataset).columns
+    capsys.readouterr()
+
+    # The id column is a join key; training on it breaks both backends
+    assert benchmark.main(["--dataset", str(dataset), "--latency-rows", "5", *common]) == 0
+    results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [r["backend"] for r in results] == ["rf", "hgb"]
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from agent_trader.data.history_store import HistoryStore, store_for_snapshot
+
+
+def _write_snapshot(path, start: datetime, n: int, *, forming_close: float = 1.3000) -> None:
+    # Same layout as AgentTrader_Master: header, oldest first, last row is the forming bar
+    lines = ["time,open,high,low,close,tick_volume"]
+    for k in range(n):
+        t = start + timedelta(minutes=15 * k)
+        close = forming_close if k == n - 1 else 1.2000 + k * 0.0001
+        lines.append(f"{t:%Y.%m.%d %H:%M:%S},1.20000,1.21000,1.19000,{close:.5f},{k + 1}")
+    path.write_text("\r\n".join(lines) + "\r\n")
+
+
+def test_ingest_appends_only_new_closed_bars(tmp_path):
+    snap = tmp_path / "GBPUSD_M15.csv"
+    t0 = datetime(2024, 1, 2, 22, 0)
+    _write_snapshot(snap, t0, 300)
+    store = store_for_snapshot(tmp_path / "hist", snap)
+    assert (store.symbol, store.timeframe) == ("GBPUSD", "M15")
+
+    r1 = store.ingest_snapshot(snap)
+    assert r1.appended == 299
+    assert store.last_closed_time == t0 + timedelta(minutes=15 * 298)
+
+    # Same snapshot again: nothing new, only the tail is touched
+    r2 = store.ingest_snapshot(snap)
+    assert r2.appended == 0
+    assert not r2.forming_updated
+
+    # Window slides by 3 bars; forming bar of the first snapshot is now closed
+    _write_snapshot(snap, t0 + timedelta(minutes=45), 300, forming_close=1.3100)
+    r3 = store.ingest_snapshot(snap)
+    assert r3.appended == 3
+    assert r3.bytes_read < snap.stat().st_size
+
+    df = HistoryStore(tmp_path / "hist", "GBPUSD", "M15").load()
+    assert len(df) == 303
+    assert df["time"].is_monotonic_increasing
+    assert df["time"].is_unique
+    assert abs(float(df["close"].iloc[-1]) - 1.3100) < 1e-12
+
+
+def test_forming_bar_correction_and_day_index(tmp_path):
+    snap = tmp_path / "GBPUSD_M15.csv"
+    t0 = datetime(2024, 1, 2, 23, 0)
+    _write_snapshot(snap, t0, 8, forming_close=1.2500)
+    store = HistoryStore(tmp_path / "hist", "GBPUSD", "M15")
+    store.ingest_snapshot(snap)
+
+    _write_snapshot(snap, t0, 8, forming_close=1.2600)
+    r = store.ingest_snapshot(snap)
+    assert r.appended == 0
+    assert r.forming_updated
+
+    df = store.load(start=datetime(2024, 1, 3))
+    assert df["time"].min() >= datetime(2024, 1, 3)
+    assert abs(float(df["close"].iloc[-1]) - 1.2600) < 1e-12
+    closed = store.load(include_forming=False)
+    assert len(closed) == 7
+
+
+def test_lost_or_corrupt_index_is_rebuilt_from_data(tmp_path):
+    snap = tmp_path / "GBPUSD_M15.csv"
+    t0 = datetime(2024, 1, 2, 22, 0)
+    _write_snapshot(snap, t0, 100)
+    store = HistoryStore(tmp_path / "hist", "GBPUSD", "M15")
+    store.ingest_snapshot(snap)
+    days = dict(store._index["days"])
+
+    for damage in ("delete", "corrupt"):
+        if damage == "delete":
+            store.index_path.unlink()
+        else:
+            store.index_path.write_text("{not json")
+        reopened = HistoryStore(tmp_path / "hist", "GBPUSD", "M15")
+        assert reopened.rows == 99 and reopened._index["days"] == days
+        assert reopened.last_closed_time == t0 + timedelta(minutes=15 * 98)
+
+        # Same snapshot again: nothing is appended twice
+        assert reopened.ingest_snapshot(snap).appended == 0
+        df = reopened.load(start=datetime(2024, 1, 3))
+        assert df["time"].is_unique and df["time"].min() == datetime(2024, 1, 3)
+        assert len(reopened.load(include_forming=False)) == 99
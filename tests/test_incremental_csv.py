@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from agent_trader.data.csv_loader import load_ohlcv_csv
+from agent_trader.data.incremental_csv import IncrementalCSVReader
+
+
+def _write(path, start: datetime, n: int, *, forming_close: float = 1.25) -> None:
+    lines = ["time,open,high,low,close,volume"]
+    for k in range(n):
+        t = start + timedelta(minutes=15 * k)
+        # Closed bars depend only on their time, like a real re-export
+        seq = int(t.timestamp() // 900)
+        close = forming_close if k == n - 1 else 1.2 + (seq % 50) * 0.0001
+        lines.append(f"{t:%Y.%m.%d %H:%M:%S},1.20000,1.21000,1.19000,{close:.5f},{seq % 1000}")
+    path.write_text("\r\n".join(lines) + "\r\n")
+
+
+def _same(a: pd.DataFrame, b: pd.DataFrame) -> None:
+    pd.testing.assert_frame_equal(a.reset_index(drop=True), b.reset_index(drop=True))
+
+
+def test_incremental_reader_matches_full_loads(tmp_path):
+    p = tmp_path / "GBPUSD_M15.csv"
+    t0 = datetime(2024, 1, 2, 0, 0)
+    _write(p, t0, 1500)
+    reader = IncrementalCSVReader()
+
+    _same(reader.read(p), load_ohlcv_csv(p))
+    assert reader.last_stats[str(p)].mode == "full"
+
+    reader.read(p)
+    assert reader.last_stats[str(p)].mode == "unchanged"
+
+    # Forming bar updated in place
+    _write(p, t0, 1500, forming_close=1.26)
+    _same(reader.read(p), load_ohlcv_csv(p))
+    st = reader.last_stats[str(p)]
+    assert st.mode == "append"
+    assert st.bytes_read < 200
+
+    # EA re-exports a fixed window that slid forward by two bars
+    _write(p, t0 + timedelta(minutes=30), 1500, forming_close=1.27)
+    _same(reader.read(p), load_ohlcv_csv(p))
+    st = reader.last_stats[str(p)]
+    assert st.mode == "resync"
+    assert st.bytes_read <= 2048
+
+    # History rewritten entirely: falls back to a full reload
+    _write(p, datetime(2023, 6, 1), 1200)
+    _same(reader.read(p), load_ohlcv_csv(p))
+    assert reader.last_stats[str(p)].mode == "full"
+
+
+def test_incremental_reader_ignores_half_written_row(tmp_path):
+    p = tmp_path / "GBPUSD_H1.csv"
+    t0 = datetime(2024, 1, 2, 0, 0)
+    _write(p, t0, 100)
+    reader = IncrementalCSVReader()
+    before = reader.read(p)
+
+    with open(p, "ab") as f:
+        f.write(b"2024.01.06 04:00:00,1.2000")
+    after = reader.read(p)
+    assert len(after) == len(before)
+
+
+def test_incremental_reader_follows_a_resized_window(tmp_path):
+    p = tmp_path / "GBPUSD_M15.csv"
+    t0 = datetime(2024, 1, 2, 0, 0)
+    _write(p, t0, 500)
+    reader = IncrementalCSVReader()
+    reader.read(p)
+
+    # Window shrinks while sliding forward: served from the cache, trimmed to the new start
+    _write(p, t0 + timedelta(minutes=15 * 102), 400, forming_close=1.27)
+    _same(reader.read(p), load_ohlcv_csv(p))
+    assert reader.last_stats[str(p)].mode == "resync"
+
+    # Window grows past the cached rows: only a full load has them
+    _write(p, t0, 600, forming_close=1.28)
+    _same(reader.read(p), load_ohlcv_csv(p))
+    assert reader.last_stats[str(p)].mode == "full"
+
+    # Slides by one bar at the new size
+    _write(p, t0 + timedelta(minutes=15), 600, forming_close=1.29)
+    _same(reader.read(p), load_ohlcv_csv(p))
+    st = reader.last_stats[str(p)]
+    assert st.mode == "resync" and len(reader.read(p)) == 600
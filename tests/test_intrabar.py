@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from agent_trader.backtest.engine import BacktestConfig, simulate_trades
+from agent_trader.backtest.intrabar import IntrabarResolver
+from agent_trader.config import DEFAULT_CONFIG
+from agent_trader.data.history_store import HistoryStore
+from agent_trader.types import Side, TradeCandidate
+
+T0 = datetime(2024, 1, 2, 10, 0)
+BT = BacktestConfig(spread_pips=0.0, enforce_session=False, enforce_cutoff=False)
+
+
+def _m15() -> pd.DataFrame:
+    # Entry bar (10:15) is bullish and spans both TP (1.2520) and SL (1.2480)
+    return pd.DataFrame(
+        {
+            "time": [T0, T0 + timedelta(minutes=15), T0 + timedelta(minutes=30)],
+            "open": [1.2500, 1.2500, 1.2505],
+            "high": [1.2502, 1.2525, 1.2510],
+            "low": [1.2498, 1.2475, 1.2500],
+            "close": [1.2500, 1.2505, 1.2505],
+            "volume": 0,
+        }
+    )
+
+
+def _store(tmp_path, up_first: bool) -> HistoryStore:
+    path = tmp_path / "snap" / "GBPUSD_M1.csv"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    first, second = (1.2525, 1.2475) if up_first else (1.2475, 1.2525)
+    lines = ["time,open,high,low,close,volume"]
+    # A day of flat M1 bars either side of the entry bar, so the day has to be sliced
+    for k in range(24 * 60):
+        t = datetime(2024, 1, 2) + timedelta(minutes=k)
+        o = h = l = c = 1.2500
+        if t == T0 + timedelta(minutes=16):
+            h, l, c = max(first, o), min(first, o), first
+        elif t == T0 + timedelta(minutes=20):
+            h, l, c = max(second, o), min(second, o), second
+        lines.append(f"{t:%Y-%m-%d %H:%M:%S},{o},{h},{l},{c},1")
+    lines.append("2024-01-03 00:00:00,1.25,1.25,1.25,1.25,1")
+    path.write_text("\n".join(lines) + "\n")
+    store = HistoryStore(tmp_path / "hist" / ("up" if up_first else "down"), "GBPUSD", "M1")
+    store.ingest_snapshot(path, last_row_forming=False)
+    return store
+
+
+def _cand() -> TradeCandidate:
+    return TradeCandidate(
+        time=T0,
+        symbol="GBPUSD",
+        side=Side.BUY,
+        entry_price=1.2500,
+        sl_price=1.2480,
+        tp_price=1.2520,
+        reason="test",
+        confluence_score=3.0,
+        meta={"market_regime": "TREND", "risk_multiplier": 1.0},
+    )
+
+
+def test_ambiguous_bar_is_settled_from_m1(tmp_path):
+    assert [r.outcome for r in simulate_trades(_m15(), [_cand()], cfg=DEFAULT_CONFIG, bt=BT)] == ["loss"]
+
+    up = IntrabarResolver.from_store(_store(tmp_path, up_first=True))
+    assert [r.outcome for r in simulate_trades(_m15(), [_cand()], cfg=DEFAULT_CONFIG, bt=BT, intrabar=up)] == ["win"]
+    down = IntrabarResolver.from_store(_store(tmp_path, up_first=False))
+    assert [r.outcome for r in simulate_trades(_m15(), [_cand()], cfg=DEFAULT_CONFIG, bt=BT, intrabar=down)] == ["loss"]
+    assert (up.resolved, up.loads) == (1, 1)
+
+    simulate_trades(_m15(), [_cand()], cfg=DEFAULT_CONFIG, bt=BT, intrabar=up)
+    assert (up.loads, up.hits) == (1, 1)
+
+
+def test_missing_m1_falls_back_to_policy():
+    empty = IntrabarResolver(lambda start, end: pd.DataFrame(columns=["time", "open", "high", "low", "close"]))
+    assert [r.outcome for r in simulate_trades(_m15(), [_cand()], cfg=DEFAULT_CONFIG, bt=BT, intrabar=empty)] == ["loss"]
+    assert empty.unresolved == 1
+
+
+def test_history_store_load_stops_at_end_day(tmp_path):
+    store = _store(tmp_path, up_first=True)
+    day = store.load(start=datetime(2024, 1, 2), end=datetime(2024, 1, 2, 23, 59), include_forming=False)
+    assert len(day) == 24 * 60
+    assert day["time"].dt.date.nunique() == 1
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.calibration import CalibratedClassifierCV
+
+from agent_trader.ml.compiled import LEAN_MANIFEST, compile_model, load_compiled_cached, load_lean, save_lean
+from agent_trader.ml.model import ModelArtifacts, _make_pipeline, predict_proba
+
+
+def _dataset(n: int = 240) -> tuple[pd.DataFrame, pd.Series]:
+    rng = np.random.default_rng(3)
+    X = pd.DataFrame(
+        {
+            "side": pd.Series(rng.choice(["buy", "sell"], n), dtype=object),
+            "market_regime": pd.Series(rng.choice(["TREND", "RANGE", None], n), dtype=object),
+            "x1": rng.normal(size=n),
+            "x2": np.where(rng.random(n) < 0.2, np.nan, rng.normal(size=n)),
+            "x3": rng.integers(0, 5, n),
+        }
+    )
+    y = ((X["x1"] + 0.5 * (X["side"] == "buy") + rng.normal(0, 1, n)) > 0.3).astype(int)
+    return X, y
+
+
+def _model(method: str):
+    X, y = _dataset()
+    cat, num = ["side", "market_regime"], ["x1", "x2", "x3"]
+    raw = _make_pipeline(cat, num, n_estimators=20, n_jobs=1).fit(X, y)
+    cal = None
+    if method != "none":
+        cal = CalibratedClassifierCV(_make_pipeline(cat, num, n_estimators=20, n_jobs=1), method=method, cv=3).fit(X, y)
+    return ModelArtifacts(raw, cal, method, list(X.columns), "win")
+
+
+def test_lean_roundtrip_is_memory_mapped_and_exact(tmp_path):
+    X, _ = _dataset()
+    X.loc[0, "side"] = "unseen"
+    rows = X.to_dict("records")
+    for method in ("none", "sigmoid", "isotonic"):
+        art = _model(method)
+        out = save_lean(compile_model(art), tmp_path / method, metadata={"samples": 240})
+        manifest = json.loads((out / LEAN_MANIFEST).read_text())
+        assert manifest["metadata"] == {"samples": 240}
+        assert manifest["feature_columns"] == list(X.columns)
+
+        lean = load_lean(out)
+        assert isinstance(lean.members[0].forest.left, np.memmap)
+        got = lean.predict_rows(rows)
+        assert np.max(np.abs(got - np.asarray(predict_proba(art, X)))) < 1e-9, method
+
+
+def test_lean_resave_replaces_arrays_and_reloads(tmp_path):
+    out = tmp_path / "lean"
+    save_lean(compile_model(_model("sigmoid")), out)
+    first = load_compiled_cached(str(out))
+    assert load_compiled_cached(str(out)) is first
+
+    before = set(os.listdir(out)) - {LEAN_MANIFEST}
+    save_lean(compile_model(_model("isotonic")), out)
+    st = os.stat(out / LEAN_MANIFEST)
+    os.utime(out / LEAN_MANIFEST, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    second = load_compiled_cached(str(out))
+    assert second is not first and second.calibration_method == "isotonic"
+    # A reader that parsed the replaced manifest can still map its arrays
+    assert before <= set(os.listdir(out))
+
+    save_lean(compile_model(_model("none")), out)
+    # Two generations back nothing references them any more
+    assert not before & set(os.listdir(out))
+
+
+def test_lean_rejects_unknown_version(tmp_path):
+    out = save_lean(compile_model(_model("none")), tmp_path / "lean")
+    manifest = json.loads((out / LEAN_MANIFEST).read_text())
+    manifest["version"] = 99
+    (out / LEAN_MANIFEST).write_text(json.dumps(manifest))
+    with pytest.raises(ValueError):
+        load_lean(out)
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import numpy as np
+
+from agent_trader.backtest.engine import max_drawdown
+from agent_trader.backtest.monte_carlo import DEFAULT_MONTE_CARLO, run_monte_carlo
+
+
+def _r(n: int = 400) -> np.ndarray:
+    rng = np.random.default_rng(3)
+    return np.where(rng.random(n) < 0.45, 2.0, -1.0) * rng.choice([0.5, 1.0], n)
+
+
+def test_bootstrap_distributions_are_seeded():
+    r = _r()
+    rep = run_monte_carlo(r, th=replace(DEFAULT_MONTE_CARLO, paths=10_000))
+    assert rep.paths == 10_000 and rep.trades == 400
+    assert 0.0 <= rep.risk_of_ruin <= 1.0 and 0.0 <= rep.prob_negative <= 1.0
+    assert rep.max_drawdown_r["p5"] <= rep.max_drawdown_r["p50"] <= rep.max_drawdown_r["p95"]
+    assert rep.max_drawdown_r["p5"] > 0
+    assert abs(rep.final_r["p50"] - r.sum()) < 3 * r.std() * np.sqrt(len(r))
+
+    # Same seed and block size, any number of workers: same paths
+    th = replace(DEFAULT_MONTE_CARLO, paths=6_000, block_paths=1_500)
+    assert run_monte_carlo(r, th=th) == run_monte_carlo(r, th=th, jobs=2)
+
+
+def test_shuffle_keeps_the_total_and_bounds_drawdown():
+    r = np.array([1.0, -1.0, -1.0, 2.0, -0.5])
+    rep = run_monte_carlo(r, th=replace(DEFAULT_MONTE_CARLO, method="shuffle", paths=2_000, ruin_drawdown_r=2.0))
+    assert all(np.isclose(v, r.sum()) for v in rep.final_r.values())
+    # Every loss after the gains: 2.5R; the second -1R always falls from a peak, so 1R at least
+    assert 1.0 <= rep.max_drawdown_r["p5"] and rep.max_drawdown_r["p95"] <= 2.5
+    assert 0.0 < rep.risk_of_ruin < 1.0
+
+
+def test_no_trades_reports_zeros():
+    rep = run_monte_carlo([])
+    assert rep.paths == 0 and rep.risk_of_ruin == 0.0 and rep.final_r["p50"] == 0.0
+
+
+def test_drawdown_matches_backtest_summary_definition():
+    # Measured from the running peak of the trades, as `summarize` does, not from a zero start
+    r = np.array([-1.0, -1.0, -1.0])
+    rep = run_monte_carlo(r, th=replace(DEFAULT_MONTE_CARLO, method="shuffle", paths=100))
+    assert rep.max_drawdown_r["p50"] == float(max_drawdown(np.cumsum(r))) == 2.0
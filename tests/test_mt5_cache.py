@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from agent_trader.data.fake_mt5 import FakeMT5, rates_from_frame
+from agent_trader.data.mt5_cache import BarRing, CachedRatesFetcher, ring_frame
+from agent_trader.data.mt5_loader import MT5Connection, load_recent_multi_timeframe
+
+
+def _bars(n: int, *, forming_close: float | None = None) -> pd.DataFrame:
+    times = pd.date_range("2024-03-01", periods=n, freq="15min", tz="UTC")
+    close = 1.25 + np.arange(n) * 1e-5
+    if forming_close is not None:
+        close[-1] = forming_close
+    return pd.DataFrame({"time": times, "open": close, "high": close + 1e-4, "low": close - 1e-4, "close": close, "volume": np.arange(n)})
+
+
+def test_ring_window_is_contiguous_view():
+    ring = BarRing(4)
+    ring.extend(rates_from_frame(_bars(3)))
+    ring.extend(rates_from_frame(_bars(7)).copy()[3:])
+    w = ring.window()
+    assert w.stop - w.start == 4
+    assert list(ring.cols["tick_volume"][w]) == [3, 4, 5, 6]
+    df = ring_frame(ring)
+    assert list(df["volume"]) == [3, 4, 5, 6]
+    assert np.shares_memory(df["close"].to_numpy(), ring.cols["close"])
+
+
+def test_fetcher_matches_full_reload_and_reads_only_new_bars():
+    fake = FakeMT5()
+    conn = MT5Connection(module=fake)
+    fetcher = CachedRatesFetcher(conn=conn)
+
+    fake.set_rates("GBPUSD", fake.TIMEFRAME_M15, _bars(600))
+    first = fetcher.fetch(symbol="GBPUSD", timeframe="M15", bars=500)
+    assert len(first) == 500
+
+    # Forming bar moves, then two more bars appear
+    fake.set_rates("GBPUSD", fake.TIMEFRAME_M15, _bars(600, forming_close=1.3))
+    fetcher.fetch(symbol="GBPUSD", timeframe="M15", bars=500)
+    assert fetcher.last_rows_fetched[("GBPUSD", "M15")] == 1
+    fake.set_rates("GBPUSD", fake.TIMEFRAME_M15, _bars(602))
+    got = fetcher.fetch(symbol="GBPUSD", timeframe="M15", bars=500)
+    assert fetcher.last_rows_fetched[("GBPUSD", "M15")] == 3
+
+    want = load_recent_multi_timeframe(symbol="GBPUSD", timeframes={"M15": fake.TIMEFRAME_M15}, bars_by_tf={"M15": 500}, conn=conn)["M15"]
+    assert list(got["time"]) == list(want["time"])
+    for c in ("open", "high", "low", "close", "volume"):
+        assert np.array_equal(got[c].to_numpy(), want[c].to_numpy())
+    assert fake.calls["copy_rates_from_pos"] == 2
+    assert fake.calls["copy_rates_range"] == 2
+
+
+def test_fetcher_reseeds_when_history_changes():
+    fake = FakeMT5()
+    fetcher = CachedRatesFetcher(conn=MT5Connection(module=fake))
+    fake.set_rates("GBPUSD", fake.TIMEFRAME_H1, _bars(100))
+    fetcher.fetch(symbol="GBPUSD", timeframe="H1", bars=50)
+    shifted = _bars(100)
+    shifted["time"] = shifted["time"] + pd.Timedelta(minutes=5)
+    fake.set_rates("GBPUSD", fake.TIMEFRAME_H1, shifted)
+    got = fetcher.fetch(symbol="GBPUSD", timeframe="H1", bars=50)
+    assert got["time"].iloc[-1] == shifted["time"].iloc[-1]
+    assert fake.calls["copy_rates_from_pos"] == 2
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from agent_trader.data.fake_mt5 import FakeMT5
+from agent_trader.data.mt5_loader import MT5Connection, get_spread_pips, load_recent_multi_timeframe
+
+
+def _fake() -> FakeMT5:
+    fake = FakeMT5()
+    for name, tf, freq in (("M15", fake.TIMEFRAME_M15, "15min"), ("H1", fake.TIMEFRAME_H1, "1h"), ("H4", fake.TIMEFRAME_H4, "4h")):
+        times = pd.date_range("2024-01-01", periods=600, freq=freq, tz="UTC")
+        close = 1.25 + np.arange(600) * 1e-5
+        for sym in ("GBPUSD", "EURUSD"):
+            fake.set_rates(sym, tf, pd.DataFrame({"time": times, "open": close, "high": close, "low": close, "close": close, "volume": 1}))
+    fake.set_tick("GBPUSD", bid=1.25000, ask=1.25012)
+    return fake
+
+
+def test_one_session_serves_many_cycles():
+    fake = _fake()
+    conn = MT5Connection(module=fake)
+    for _ in range(5):
+        frames = load_recent_multi_timeframe(symbol="GBPUSD", bars_by_tf={"M15": 300, "H1": 200, "H4": 100}, conn=conn)
+        assert [len(frames[k]) for k in ("M15", "H1", "H4")] == [300, 200, 100]
+        assert abs(get_spread_pips(symbol="GBPUSD", pip_size=0.0001, conn=conn) - 1.2) < 1e-9
+    assert fake.calls["initialize"] == 1
+    assert fake.calls["shutdown"] == 0
+    conn.shutdown()
+    assert fake.calls["shutdown"] == 1
+
+
+def test_reconnects_with_backoff_after_terminal_drop():
+    fake = _fake()
+    sleeps: list[float] = []
+    conn = MT5Connection(module=fake, backoff_seconds=0.5, sleep=sleeps.append)
+    load_recent_multi_timeframe(symbol="GBPUSD", conn=conn)
+
+    fake.drop_terminal()
+    fake.fail_initialize = 2
+    try:
+        load_recent_multi_timeframe(symbol="GBPUSD", conn=conn)
+        raise AssertionError("expected failure while the terminal is down")
+    except RuntimeError:
+        pass
+    assert not conn.connected
+
+    frames = load_recent_multi_timeframe(symbol="GBPUSD", conn=conn)
+    assert len(frames["M15"]) == 600
+    assert sleeps == [0.5, 1.0]
+    assert fake.calls["initialize"] == 4
+
+
+def test_concurrent_symbol_fetches_are_serialized():
+    fake = _fake()
+    conn = MT5Connection(module=fake)
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        results = list(ex.map(lambda s: load_recent_multi_timeframe(symbol=s, conn=conn), ["GBPUSD", "EURUSD"] * 8))
+    assert all(len(r["H4"]) == 500 for r in results)
+    assert fake.max_active == 1
+    assert fake.calls["initialize"] == 1
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from agent_trader.data.fake_mt5 import FakeMT5
+from agent_trader.data.mt5_history import MT5HistoryDownloader, month_chunks, month_complete
+from agent_trader.data.mt5_loader import MT5Connection, load_rates
+
+
+def _fake() -> FakeMT5:
+    fake = FakeMT5()
+    times = pd.date_range("2023-10-01", "2024-03-10", freq="1h", tz="UTC")
+    close = 1.2 + np.arange(len(times)) * 1e-5
+    fake.set_rates("GBPUSD", fake.TIMEFRAME_H1, pd.DataFrame({"time": times, "open": close, "high": close, "low": close, "close": close, "volume": 1}))
+    return fake
+
+
+def test_month_chunks_cover_range():
+    chunks = month_chunks(datetime(2023, 11, 15), datetime(2024, 2, 3))
+    assert [c[0].strftime("%Y-%m") for c in chunks] == ["2023-11", "2023-12", "2024-01", "2024-02"]
+    assert chunks[1][1] == datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def test_chunked_download_matches_single_call_and_reuses_cache(tmp_path):
+    fake = _fake()
+    conn = MT5Connection(module=fake)
+    now = lambda: datetime(2024, 3, 10, 12, tzinfo=timezone.utc)  # noqa: E731
+    start = datetime(2023, 11, 15, 7, tzinfo=timezone.utc)
+    end = datetime(2024, 3, 9, tzinfo=timezone.utc)
+
+    dl = MT5HistoryDownloader(tmp_path, conn=conn, max_workers=3, now=now)
+    got = dl.load(symbol="GBPUSD", timeframe="H1", start=start, end=end)
+    want = load_rates(symbol="GBPUSD", timeframe=fake.TIMEFRAME_H1, start=start, end=end, conn=conn)
+    assert list(got["time"]) == list(want["time"])
+    assert np.array_equal(got["close"].to_numpy(), want["close"].to_numpy())
+    assert dl.fetched == 5
+    assert len(list(tmp_path.glob("GBPUSD/H1/*.npy"))) == 4
+
+    again = MT5HistoryDownloader(tmp_path, conn=conn, now=now)
+    got2 = again.load(symbol="GBPUSD", timeframe="H1", start=start, end=end)
+    assert (again.cache_hits, again.fetched) == (4, 1)
+    assert list(got2["time"]) == list(got["time"])
+
+
+def test_partial_month_is_not_cached_until_complete(tmp_path):
+    fake = _fake()
+    full = fake._rates[("GBPUSD", fake.TIMEFRAME_H1)]
+    # Terminal still syncing: January stops on the 20th
+    fake.set_rates("GBPUSD", fake.TIMEFRAME_H1, full[full["time"] < int(datetime(2024, 1, 20, tzinfo=timezone.utc).timestamp())])
+    conn = MT5Connection(module=fake)
+    now = lambda: datetime(2024, 3, 10, 12, tzinfo=timezone.utc)  # noqa: E731
+    start, end = datetime(2023, 12, 1, tzinfo=timezone.utc), datetime(2024, 1, 31, tzinfo=timezone.utc)
+
+    MT5HistoryDownloader(tmp_path, conn=conn, now=now).load(symbol="GBPUSD", timeframe="H1", start=start, end=end)
+    assert sorted(p.name for p in tmp_path.glob("GBPUSD/H1/*.npy")) == ["2023-12.npy"]
+
+    fake.set_rates("GBPUSD", fake.TIMEFRAME_H1, full)
+    dl = MT5HistoryDownloader(tmp_path, conn=conn, now=now)
+    got = dl.load(symbol="GBPUSD", timeframe="H1", start=start, end=end)
+    assert (dl.cache_hits, dl.fetched) == (1, 1)
+    assert got["time"].iloc[-1] == pd.Timestamp("2024-01-31", tz="UTC")
+    assert sorted(p.name for p in tmp_path.glob("GBPUSD/H1/*.npy")) == ["2023-12.npy", "2024-01.npy"]
+
+
+def test_month_complete_allows_for_weekend_close():
+    def bars(*times) -> np.ndarray:
+        out = np.zeros(len(times), dtype=[("time", "<i8")])
+        out["time"] = [int(t.replace(tzinfo=timezone.utc).timestamp()) for t in times]
+        return out
+
+    # August 2024 ends on a Saturday; the last bar is Friday evening
+    aug_end = datetime(2024, 9, 1, tzinfo=timezone.utc)
+    assert month_complete(bars(datetime(2024, 8, 30, 20, 45)), "M15", aug_end)
+    assert not month_complete(bars(datetime(2024, 8, 29, 12)), "M15", aug_end)
+    assert month_complete(bars(datetime(2024, 8, 30)), "D1", aug_end)
+    # June 2024 ends on a Sunday after the reopen, so Sunday evening bars are due
+    assert not month_complete(bars(datetime(2024, 6, 28, 20, 45)), "M15", datetime(2024, 7, 1, tzinfo=timezone.utc))
+    # January 2024 ends on a Wednesday: the final bar must be there
+    assert not month_complete(bars(datetime(2024, 1, 31, 22)), "H1", datetime(2024, 2, 1, tzinfo=timezone.utc))
+    assert not month_complete(bars()[:0], "H1", datetime(2024, 2, 1, tzinfo=timezone.utc))
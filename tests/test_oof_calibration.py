@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from joblib import parallel_config
+
+import agent_trader.ml.model as model_mod
+from agent_trader.ml.compiled import compile_model
+from agent_trader.ml.model import OOFCalibratedModel, predict_proba, save_model, train_probability_model
+
+
+def _small_forests(monkeypatch):
+    make = model_mod._make_pipeline
+    monkeypatch.setattr(model_mod, "_make_pipeline", lambda c, n, **kw: make(c, n, **kw).set_params(clf__n_estimators=30))
+
+
+def _dataset(n: int = 320) -> pd.DataFrame:
+    rng = np.random.default_rng(5)
+    df = pd.DataFrame(
+        {
+            "side": rng.choice(["buy", "sell"], n),
+            "market_regime": rng.choice(["TREND", "RANGE", "TRANSITION"], n),
+            "x1": rng.normal(size=n),
+            "x2": rng.normal(size=n),
+        }
+    )
+    score = df["x1"] + 0.7 * (df["side"] == "buy") + rng.normal(0, 1, n)
+    df["label"] = np.where(score > 0.3, "win", "loss")
+    return df
+
+
+def test_oof_calibration_reuses_fold_predictions(monkeypatch, tmp_path):
+    _small_forests(monkeypatch)
+    df = _dataset()
+    art, metrics = train_probability_model(df, calibration="sigmoid", calibration_source="oof")
+    assert isinstance(art.calibrated_model, OOFCalibratedModel)
+    assert metrics["calibration_source"] == "oof"
+    # TimeSeriesSplit(5) scores five test blocks of n // 6 rows; the head never gets an OOF value
+    assert metrics["calibration_samples"] == 5 * (len(df) // 6)
+
+    X = df.drop(columns=["label"])
+    p = np.asarray(predict_proba(art, X))
+    assert ((p > 0) & (p < 1)).all()
+    assert np.max(np.abs(compile_model(art).predict_rows(X.to_dict("records")) - p)) < 1e-9
+
+    cv_art, _ = train_probability_model(df, calibration="sigmoid", calibration_source="cv")
+    save_model(art, str(tmp_path / "oof.joblib"))
+    save_model(cv_art, str(tmp_path / "cv.joblib"))
+    assert (tmp_path / "oof.joblib").stat().st_size * 2 < (tmp_path / "cv.joblib").stat().st_size
+
+
+def test_parallel_folds_match_sequential(monkeypatch):
+    _small_forests(monkeypatch)
+    df = _dataset()
+    _, seq = train_probability_model(df, calibration="isotonic", calibration_source="oof")
+    with parallel_config(backend="threading"):
+        art, par = train_probability_model(df, calibration="isotonic", calibration_source="oof", fold_jobs=3)
+    assert par["roc_auc_oof"] == seq["roc_auc_oof"]
+    assert par["brier_oof"] == seq["brier_oof"]
+    assert art.calibrated_model.method == "isotonic"
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from agent_trader.config import DEFAULT_CONFIG
+from agent_trader.strategy.generator import CandidateInputs, generate_candidates, generate_candidates_parallel
+
+
+def _inputs(n: int) -> CandidateInputs:
+    rng = np.random.default_rng(21)
+    times = pd.date_range("2024-01-01", periods=n, freq="15min", tz="UTC")
+    close = 1.27 + np.cumsum(rng.normal(0, 5e-4, n))
+    open_ = np.r_[close[0], close[:-1]]
+    m15 = pd.DataFrame(
+        {
+            "time": times,
+            "open": open_,
+            "high": np.maximum(open_, close) + rng.uniform(0, 4e-4, n),
+            "low": np.minimum(open_, close) - rng.uniform(0, 4e-4, n),
+            "close": close,
+            "volume": 1,
+        }
+    )
+    return CandidateInputs.from_m15(m15)
+
+
+def _same(a, b) -> bool:
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b
+
+
+def _assert_identical(serial, parallel) -> None:
+    assert len(serial) == len(parallel)
+    for a, b in zip(serial, parallel):
+        assert (a.time, a.side, a.reason) == (b.time, b.side, b.reason)
+        assert (a.entry_price, a.sl_price, a.tp_price, a.confluence_score) == (b.entry_price, b.sl_price, b.tp_price, b.confluence_score)
+        assert a.meta.keys() == b.meta.keys()
+        assert all(_same(a.meta[k], b.meta[k]) for k in a.meta)
+
+
+def test_chunked_generation_matches_serial_run():
+    inputs = _inputs(800)
+    serial = generate_candidates(inputs, cfg=DEFAULT_CONFIG, training_mode=True)
+    assert serial
+    # Chunks far shorter than the warm-up overlap, so every boundary is exercised
+    _assert_identical(serial, generate_candidates_parallel(inputs, cfg=DEFAULT_CONFIG, chunk_bars=150, max_workers=2))
+    _assert_identical(serial, generate_candidates_parallel(inputs, cfg=DEFAULT_CONFIG, chunk_bars=300, max_workers=1))
+
+
+def test_short_history_yields_nothing():
+    assert generate_candidates_parallel(_inputs(200), cfg=DEFAULT_CONFIG, max_workers=2) == []
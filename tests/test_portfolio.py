@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from agent_trader.backtest.engine import BacktestConfig, simulate_trades
+from agent_trader.backtest.portfolio import PortfolioThresholds, SymbolBook, simulate_portfolio
+from agent_trader.config import DEFAULT_CONFIG
+from agent_trader.types import Side, TradeCandidate
+from agent_trader.utils import pips_to_price
+
+BT = BacktestConfig(enforce_session=False, enforce_cutoff=False, max_hold_bars=24)
+OPEN = PortfolioThresholds(max_open_positions=100, max_trades_per_day=1000, max_trades_per_week=1000)
+
+
+def _book(symbol: str, seed: int, n: int = 2000, n_cands: int = 300) -> SymbolBook:
+    rng = np.random.default_rng(seed)
+    times = pd.date_range("2024-01-01", periods=n, freq="15min")
+    close = 1.27 + np.cumsum(rng.normal(0, 5e-4, n))
+    open_ = np.r_[close[0], close[:-1]]
+    m15 = pd.DataFrame(
+        {
+            "time": times,
+            "open": open_,
+            "high": np.maximum(open_, close) + rng.uniform(0, 4e-4, n),
+            "low": np.minimum(open_, close) - rng.uniform(0, 4e-4, n),
+            "close": close,
+            "volume": 0,
+        }
+    )
+    cands = []
+    for i in sorted(rng.choice(n - 1, n_cands, replace=False)):
+        side = Side.BUY if rng.random() < 0.5 else Side.SELL
+        sgn = 1.0 if side == Side.BUY else -1.0
+        entry = float(close[i])
+        cands.append(
+            TradeCandidate(
+                time=times[i].to_pydatetime(),
+                symbol=symbol,
+                side=side,
+                entry_price=entry,
+                sl_price=entry - sgn * pips_to_price(symbol, 15.0),
+                tp_price=entry + sgn * pips_to_price(symbol, 20.0),
+                reason="test",
+                confluence_score=3.0,
+                meta={"market_regime": "TREND", "risk_multiplier": 1.0, "model_probability": float(rng.random())},
+            )
+        )
+    return SymbolBook(symbol=symbol, m15=m15, candidates=cands)
+
+
+def test_single_symbol_without_caps_matches_simulate_trades():
+    book = _book("GBPUSD", 1)
+    want = simulate_trades(book.m15, book.candidates, cfg=DEFAULT_CONFIG, bt=BT)
+    got = simulate_portfolio([book], cfg=DEFAULT_CONFIG, bt=BT, th=OPEN)
+    assert got.trades == want
+    assert np.isclose(got.equity["equity_r"].iloc[-1], sum(t.r_multiple_scaled for t in want))
+
+
+def test_shared_limits_apply_across_symbols():
+    books = [_book(s, k) for k, s in enumerate(["GBPUSD", "EURUSD", "USDCAD", "AUDUSD"])]
+    free = simulate_portfolio(books, cfg=DEFAULT_CONFIG, bt=BT, th=OPEN)
+    assert {t.candidate.symbol for t in free.trades} == {"GBPUSD", "EURUSD", "USDCAD", "AUDUSD"}
+
+    capped = simulate_portfolio(books, cfg=DEFAULT_CONFIG, bt=BT, th=PortfolioThresholds(max_open_positions=2, max_trades_per_day=5, max_trades_per_week=20))
+    assert 0 < len(capped.trades) < len(free.trades)
+    per_day = Counter(pd.Timestamp(t.entry_fill.time).date() for t in capped.trades)
+    per_week = Counter(pd.Timestamp(t.entry_fill.time).isocalendar()[:2] for t in capped.trades)
+    assert max(per_day.values()) <= 5 and max(per_week.values()) <= 20
+    assert capped.rejected["daily_cap"] > 0 and capped.rejected["max_open"] > 0
+
+    # Never more than two positions open: at most one other is still open at each entry
+    spans = [(pd.Timestamp(t.entry_fill.time), pd.Timestamp(t.exit_fill.time)) for t in capped.trades]
+    for k, (start, _) in enumerate(spans):
+        assert sum(1 for s, e in spans[:k] if e >= start - pd.Timedelta(minutes=15)) <= 1
+    assert capped.equity["time"].is_monotonic_increasing
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import numpy as np
+
+from agent_trader.ml.memo import PredictionCache, row_key
+
+
+class _Counting:
+    def __init__(self, offset: float = 0.0) -> None:
+        self.offset = offset
+        self.scored = 0
+
+    def predict_rows(self, rows):
+        self.scored += len(rows)
+        return np.array([r["x"] / 10.0 + self.offset for r in rows])
+
+
+def test_only_new_rows_reach_the_model():
+    cache = PredictionCache(max_entries=10)
+    model = _Counting()
+    rows = [{"x": 1.0, "side": "buy"}, {"x": 2.0, "side": "sell"}]
+    assert cache.predict_rows(model, rows).tolist() == [0.1, 0.2]
+    got = cache.predict_rows(model, rows + [{"x": 3.0, "side": "buy"}, {"x": 3.0, "side": "buy"}])
+    assert got.tolist() == [0.1, 0.2, 0.3, 0.3]
+    assert model.scored == 3
+    assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_eviction_and_invalidation_on_reload():
+    cache = PredictionCache(max_entries=2)
+    model = _Counting()
+    cache.predict_rows(model, [{"x": 1.0}, {"x": 2.0}, {"x": 3.0}])
+    assert len(cache) == 2 and cache.evictions == 1
+    cache.predict_rows(model, [{"x": 1.0}])
+    assert model.scored == 4
+
+    reloaded = _Counting(offset=0.5)
+    assert cache.predict_rows(reloaded, [{"x": 2.0}]).tolist() == [0.7]
+    assert cache.invalidations == 1 and reloaded.scored == 1
+
+
+def test_row_key_ignores_order_and_treats_nan_as_missing():
+    assert row_key({"a": 1.0, "b": "x"}) == row_key({"b": "x", "a": np.float64(1.0)})
+    assert row_key({"a": float("nan")}) == row_key({"a": None})
+    assert row_key({"a": 1.0}) != row_key({"a": 1.0000001})
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from agent_trader.data.resample import IncrementalResampler, resample_ohlcv
+from agent_trader.strategy.generator import CandidateInputs
+
+
+def _m15(n: int, start: str = "2024-01-01 21:00") -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    times = pd.date_range(start, periods=n, freq="15min", tz="UTC")
+    close = 1.25 + np.cumsum(rng.normal(0, 2e-4, n))
+    open_ = np.r_[close[0], close[:-1]]
+    return pd.DataFrame(
+        {
+            "time": times,
+            "open": open_,
+            "high": np.maximum(open_, close) + 1e-4,
+            "low": np.minimum(open_, close) - 1e-4,
+            "close": close,
+            "volume": np.arange(n) % 7 + 1,
+        }
+    )
+
+
+def test_h4_buckets_follow_broker_offset():
+    m15 = _m15(64)
+    h4 = resample_ohlcv(m15, "H4")
+    assert [t.hour for t in h4["time"]] == [20, 0, 4, 8, 12]
+    first = m15[m15["time"] < pd.Timestamp("2024-01-02 00:00", tz="UTC")]
+    assert h4["open"].iloc[0] == first["open"].iloc[0]
+    assert h4["high"].iloc[0] == first["high"].max()
+    assert h4["close"].iloc[0] == first["close"].iloc[-1]
+    assert h4["volume"].iloc[0] == first["volume"].sum()
+
+    gmt2 = resample_ohlcv(m15, "H4", offset_minutes=120)
+    assert [t.hour for t in gmt2["time"]][:3] == [18, 22, 2]
+
+
+def test_incremental_resampler_matches_full_resample():
+    full = _m15(900)
+    res = IncrementalResampler(max_bars={"H1": 400, "H4": 200})
+    for end in (600, 601, 605, 640, 900):
+        window = full.iloc[end - 600 : end].reset_index(drop=True)
+        got = res.update(window)
+        want = resample_ohlcv(full.iloc[:end], "H1")
+        n = len(got["H1"])
+        pd.testing.assert_frame_equal(got["H1"], want.iloc[len(want) - n :].reset_index(drop=True))
+    assert len(got["H4"]) == len(resample_ohlcv(full, "H4"))
+
+
+def test_candidate_inputs_from_m15():
+    inputs = CandidateInputs.from_m15(_m15(200))
+    assert len(inputs.h1) == 50
+    assert inputs.h4["time"].iloc[1] - inputs.h4["time"].iloc[0] == pd.Timedelta(hours=4)
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pandas as pd
+
+from agent_trader.data.snapshot import SnapshotReader, SnapshotWriter, slot_path
+
+
+def _bars(n: int, freq: str, close: float) -> pd.DataFrame:
+    times = pd.date_range(datetime(2024, 1, 2), periods=n, freq=freq)
+    return pd.DataFrame({"time": times, "open": 1.2, "high": 1.21, "low": 1.19, "close": close, "volume": 5})
+
+
+def _frames(close: float) -> dict[str, pd.DataFrame]:
+    return {"H4": _bars(20, "4h", close), "H1": _bars(40, "1h", close), "M15": _bars(80, "15min", close)}
+
+
+def test_reader_sees_published_snapshot(tmp_path):
+    writer = SnapshotWriter(tmp_path, "GBPUSD")
+    reader = SnapshotReader(tmp_path, "GBPUSD")
+    assert reader.read() is None
+
+    seq = writer.publish(_frames(1.2001))
+    snap = reader.read()
+    assert snap is not None and snap.seq == seq
+    assert set(snap.frames) == {"H4", "H1", "M15"}
+    assert len(snap.frames["M15"]) == 80
+    assert int(snap.frames["H1"]["volume"].iloc[0]) == 5
+    assert reader.read() is snap
+
+
+def test_unpublished_or_torn_slots_are_never_mixed(tmp_path):
+    writer = SnapshotWriter(tmp_path, "GBPUSD")
+    reader = SnapshotReader(tmp_path, "GBPUSD")
+    writer.publish(_frames(1.2001))
+    first = reader.read()
+
+    # Writer crashed after writing the slot files but before the manifest: still the old snapshot
+    writer.write_slot(_frames(1.3), writer.seq + 1)
+    assert reader.read() is first
+
+    # Manifest published but one file no longer matches it (overwritten mid-read)
+    writer.publish(_frames(1.2002))
+    p = slot_path(tmp_path, "GBPUSD", "H1", writer.seq % 2)
+    p.write_bytes(p.read_bytes()[:-20])
+    snap = reader.read()
+    assert snap is first
+    assert reader.rejected == 1
+    assert all(float(df["close"].iloc[-1]) == 1.2001 for df in snap.frames.values())
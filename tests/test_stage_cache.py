@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from agent_trader.config import DEFAULT_CONFIG
+from agent_trader.features.builder import build_feature_rows
+from agent_trader.labeling.labeler import label_candidates
+from agent_trader.pipelines.stage_cache import StageCache, _decode_columns, _encode_columns
+from agent_trader.strategy.generator import CandidateInputs, generate_candidates
+
+
+def _inputs(n: int = 700) -> CandidateInputs:
+    rng = np.random.default_rng(9)
+    times = pd.date_range("2024-01-01", periods=n, freq="15min", tz="UTC")
+    close = 1.27 + np.cumsum(rng.normal(0, 5e-4, n))
+    open_ = np.r_[close[0], close[:-1]]
+    m15 = pd.DataFrame(
+        {
+            "time": times,
+            "open": open_,
+            "high": np.maximum(open_, close) + rng.uniform(0, 4e-4, n),
+            "low": np.minimum(open_, close) - rng.uniform(0, 4e-4, n),
+            "close": close,
+            "volume": 1,
+        }
+    )
+    return CandidateInputs.from_m15(m15)
+
+
+def _same(a, b) -> bool:
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b and type(a) is type(b)
+
+
+def test_columns_roundtrip_types_none_and_absent_keys():
+    recs = [
+        {"f": 1.5, "i": 2, "s": "x", "b": True, "j": 1, "n": None},
+        {"f": float("nan"), "i": None, "s": None, "b": False, "j": 2.5},
+    ]
+    arrays, schema = _encode_columns(recs)
+    out = _decode_columns(arrays, schema, len(recs))
+    assert out[1].keys() == recs[1].keys()
+    for r, o in zip(recs, out):
+        assert all(_same(r[k], o[k]) for k in r)
+
+
+def test_cached_stages_match_fresh_run(tmp_path):
+    cfg = DEFAULT_CONFIG
+    inputs = _inputs()
+    fresh = generate_candidates(inputs, cfg=cfg, training_mode=True)
+    assert fresh
+    fresh_rows = build_feature_rows(cfg=cfg, h4=inputs.h4, h1=inputs.h1, m15=inputs.m15, candidates=fresh)
+    fresh_labels = label_candidates(cfg=cfg, m15=inputs.m15, candidates=fresh)
+
+    for run in range(2):
+        stages = StageCache(tmp_path)
+        cands, key = stages.candidates(inputs, cfg=cfg, training_mode=True)
+        rows = stages.feature_rows(inputs, cands, cfg=cfg, candidates_key=key)
+        labels = stages.labels(inputs.m15, cands, cfg=cfg, candidates_key=key)
+        assert (stages.hits, stages.misses) == ((0, 3) if run == 0 else (3, 0))
+
+        assert [(c.time, c.side, c.entry_price, c.reason) for c in cands] == [(c.time, c.side, c.entry_price, c.reason) for c in fresh]
+        assert all(all(_same(a.meta[k], b.meta[k]) for k in a.meta) for a, b in zip(fresh, cands))
+        assert [r.time for r in rows] == [r.time for r in fresh_rows]
+        assert all(all(_same(a.features[k], b.features[k]) for k in a.features) for a, b in zip(fresh_rows, rows))
+        assert [(lt.label, lt.mfe_pips) for lt in labels.labeled] == [(lt.label, lt.mfe_pips) for lt in fresh_labels.labeled]
+        assert labels.dropped == fresh_labels.dropped
+        assert all(any(lt.candidate is c for c in cands) for lt in labels.labeled)
+
+
+def test_changed_bars_miss_the_cache(tmp_path):
+    inputs = _inputs(400)
+    stages = StageCache(tmp_path)
+    _, key = stages.candidates(inputs, cfg=DEFAULT_CONFIG)
+    m15 = inputs.m15.copy()
+    m15.loc[len(m15) - 1, "close"] += 1e-4
+    _, key2 = stages.candidates(CandidateInputs.from_m15(m15), cfg=DEFAULT_CONFIG)
+    assert key != key2 and stages.misses == 2
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import copy
+import math
+
+import numpy as np
+import pandas as pd
+
+from agent_trader.backtest.engine import BacktestConfig, simulate_trades
+from agent_trader.backtest.sweep import evaluate, prepare_sweep, select_candidates, sweep
+from agent_trader.config import DEFAULT_CONFIG
+from agent_trader.policy.quality import QualityThresholds, decide_quality, decide_quality_array
+from agent_trader.strategy.generator import CandidateInputs, generate_candidates
+
+
+def _inputs(n: int = 700) -> CandidateInputs:
+    rng = np.random.default_rng(21)
+    times = pd.date_range("2024-03-04", periods=n, freq="15min", tz="UTC")
+    close = 1.27 + np.cumsum(rng.normal(0, 6e-4, n))
+    open_ = np.r_[close[0], close[:-1]]
+    m15 = pd.DataFrame(
+        {
+            "time": times,
+            "open": open_,
+            "high": np.maximum(open_, close) + rng.uniform(0, 5e-4, n),
+            "low": np.minimum(open_, close) - rng.uniform(0, 5e-4, n),
+            "close": close,
+            "volume": 1,
+        }
+    )
+    return CandidateInputs.from_m15(m15)
+
+
+def test_array_policy_matches_scalar_policy():
+    rng = np.random.default_rng(4)
+    n = 4000
+    p = rng.uniform(0.3, 0.8, n)
+    conf = rng.choice([1.0, 1.5, 2.5, 3.0, 3.5, 4.0, 5.0], n)
+    regime = rng.choice(["TREND", "RANGE", "TRANSITION"], n)
+    session = rng.choice(["PRIMARY", "SECONDARY", "BLOCKED"], n)
+    atr = np.where(rng.random(n) < 0.2, np.nan, rng.uniform(0, 1, n))
+    th = QualityThresholds(good_prob=0.55, average_alt_confluence=2.75)
+    got = decide_quality_array(probability=p, confluence_score=conf, market_regime=regime, session_state=session, atr_percentile=atr, th=th)
+    for k in range(n):
+        want = decide_quality(
+            probability=p[k],
+            confluence_score=conf[k],
+            market_regime=regime[k],
+            session_state=session[k],
+            atr_percentile=None if math.isnan(atr[k]) else atr[k],
+            th=th,
+        )
+        assert (got.quality[k], got.risk_multiplier[k]) == (want.quality, want.risk_multiplier)
+
+
+def test_sweep_reproduces_full_backtests():
+    cfg = DEFAULT_CONFIG
+    inputs = _inputs()
+    cands = generate_candidates(inputs, cfg=cfg)
+    assert len(cands) > 20
+    probs = np.random.default_rng(8).uniform(0.3, 0.9, len(cands))
+    sw = prepare_sweep(inputs.m15, cands, probs, cfg=cfg)
+    for min_prob in (0.3, 0.5, 0.7):
+        for th in (QualityThresholds(), QualityThresholds(good_confluence=3.0, average_prob_confluence=1.5)):
+            selected = select_candidates(copy.deepcopy(cands), probs, min_prob=min_prob, th=th)
+            want = simulate_trades(inputs.m15, selected, cfg=cfg, bt=BacktestConfig())
+            got = evaluate(sw, min_prob=min_prob, th=th)
+            assert [(r.entry_fill.time, r.outcome, r.r_multiple_scaled, r.risk_multiplier) for r in got] == [
+                (r.entry_fill.time, r.outcome, r.r_multiple_scaled, r.risk_multiplier) for r in want
+            ]
+
+    surface = sweep(sw, min_probs=[0.4, 0.6], grid={"good_confluence": [3.5, 4.0], "fallback_prob": [0.55, 0.65]})
+    assert len(surface) == 8
+    assert {tuple(p.params) for p in surface} == {("good_confluence", "fallback_prob")}
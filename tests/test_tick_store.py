@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from agent_trader.backtest.engine import BacktestConfig, simulate_trades
+from agent_trader.config import DEFAULT_CONFIG
+from agent_trader.data.fake_mt5 import FakeMT5
+from agent_trader.data.mt5_loader import MT5Connection, download_ticks
+from agent_trader.data.tick_store import TICK_DTYPE, TickStore
+from agent_trader.types import Side, TradeCandidate
+
+
+def _ticks() -> pd.DataFrame:
+    # Two days of ticks every 10 minutes, spread 1.0 pip on day one and 2.0 pips on day two
+    times = pd.date_range("2024-01-02 20:00", "2024-01-03 02:00", freq="10min")
+    spread = np.where(times.day == 2, 0.0001, 0.0002)
+    bid = 1.25 + np.arange(len(times)) * 1e-5
+    return pd.DataFrame({"time": times, "bid": bid, "ask": bid + spread})
+
+
+def test_mt5_ticks_ingest_into_daily_memory_mapped_partitions(tmp_path):
+    fake = FakeMT5()
+    fake.set_tick_history("GBPUSD", _ticks())
+    df = download_ticks(symbol="GBPUSD", start=datetime(2024, 1, 2), end=datetime(2024, 1, 4), conn=MT5Connection(module=fake))
+    store = TickStore(tmp_path, "GBPUSD")
+    res = store.ingest_frame(df)
+    assert (res.ticks, res.days) == (37, 2)
+    assert [d.isoformat() for d in store.days()] == ["2024-01-02", "2024-01-03"]
+    day = store.day(store.days()[0])
+    assert isinstance(day, np.memmap) and day.dtype == TICK_DTYPE
+
+    # Overlapping re-export does not duplicate ticks
+    store.ingest_frame(df.iloc[-5:])
+    assert sum(len(store.day(d)) for d in store.days()) == 37
+
+
+def test_asof_lookup_crosses_partitions_and_ages_out(tmp_path):
+    store = TickStore(tmp_path, "GBPUSD")
+    store.ingest_frame(_ticks())
+    q = pd.to_datetime(["2024-01-02 19:00", "2024-01-02 20:05", "2024-01-03 00:00", "2024-01-03 01:59", "2024-01-05 00:00"])
+    got = store.spread_pips(q)
+    assert np.isnan(got[0])
+    np.testing.assert_allclose(got[1:4], [1.0, 2.0, 2.0], atol=1e-3)
+    assert not np.isnan(got[4])
+    assert np.isnan(store.spread_pips(q, max_age_seconds=3600)[4])
+
+
+def test_query_before_first_tick_of_day_uses_previous_partition(tmp_path):
+    ticks = _ticks()
+    store = TickStore(tmp_path, "GBPUSD")
+    store.ingest_frame(ticks[(ticks["time"] < "2024-01-03") | (ticks["time"] >= "2024-01-03 00:30")])
+    got = store.spread_pips(pd.to_datetime(["2024-01-03 00:15", "2024-01-03 00:35"]))
+    np.testing.assert_allclose(got, [1.0, 2.0], atol=1e-3)
+
+
+def test_simulation_charges_recorded_spread():
+    t0 = datetime(2024, 1, 2, 10, 0)
+    m15 = pd.DataFrame(
+        {
+            "time": [t0 + timedelta(minutes=15 * k) for k in range(6)],
+            "open": [1.2500] * 6,
+            "high": [1.2505] * 6,
+            "low": [1.2495] * 6,
+            "close": [1.2500] * 6,
+            "volume": 0,
+        }
+    )
+    cand = TradeCandidate(
+        time=t0,
+        symbol="GBPUSD",
+        side=Side.BUY,
+        entry_price=1.25,
+        sl_price=1.2480,
+        tp_price=1.2540,
+        reason="test",
+        confluence_score=3.0,
+        meta={"market_regime": "TREND", "risk_multiplier": 1.0},
+    )
+    bt = BacktestConfig(spread_pips=1.2, max_hold_bars=3, enforce_session=False, enforce_cutoff=False)
+    flat = simulate_trades(m15, [cand], cfg=DEFAULT_CONFIG, bt=bt)
+    same = simulate_trades(m15, [cand], cfg=DEFAULT_CONFIG, bt=bt, spreads=np.full(len(m15), np.nan))
+    assert flat == same
+
+    wide = simulate_trades(m15, [cand], cfg=DEFAULT_CONFIG, bt=bt, spreads=np.array([1.0, 3.0, 1.0, 1.0, 1.0, 1.0]))
+    assert np.isclose(wide[0].entry_fill.price, 1.2500 + 0.00015)
+    assert np.isclose(flat[0].entry_fill.price, 1.2500 + 0.00006)
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agent_trader.ml.model import load_model
+from agent_trader.pipelines import train
+from agent_trader.pipelines.train import main
+
+
+def _write_m15(path, seed: int, n: int = 600) -> None:
+    rng = np.random.default_rng(seed)
+    close = 1.27 + np.cumsum(rng.normal(0, 5e-4, n))
+    open_ = np.r_[close[0], close[:-1]]
+    pd.DataFrame(
+        {
+            "time": pd.date_range("2024-01-01", periods=n, freq="15min").strftime("%Y-%m-%d %H:%M:%S"),
+            "open": open_,
+            "high": np.maximum(open_, close) + rng.uniform(0, 4e-4, n),
+            "low": np.minimum(open_, close) - rng.uniform(0, 4e-4, n),
+            "close": close,
+            "volume": 1,
+        }
+    ).to_csv(path, index=False)
+
+
+def test_symbols_mode_trains_each_symbol_in_the_pool(tmp_path, capsys):
+    _write_m15(tmp_path / "GBPUSD_M15.csv", 1)
+    _write_m15(tmp_path / "USDCAD_M15.csv", 2)
+    rc = main(
+        [
+            "--symbols", "GBPUSD,USDCAD",
+            "--derive-htf",
+            "--m15", str(tmp_path / "{symbol}_M15.csv"),
+            "--out-model", str(tmp_path / "{symbol}.joblib"),
+            "--n-estimators", "20",
+            "--calibration", "none",
+            "--max-cores", "2",
+        ]
+    )
+    assert rc == 0
+    for sym in ("GBPUSD", "USDCAD"):
+        assert load_model(str(tmp_path / f"{sym}.joblib")).raw_pipeline.named_steps["clf"].n_jobs == 1
+    out = capsys.readouterr().out
+    assert "2 at a time, 1 cores each" in out
+    assert "wall_seconds" in out
+
+
+def test_symbols_mode_requires_per_symbol_paths(tmp_path):
+    with pytest.raises(SystemExit, match="--out-model"):
+        main(["--symbols", "GBPUSD,USDCAD", "--m15", "{symbol}.csv", "--out-model", str(tmp_path / "model.joblib")])
+
+
+def test_symbols_mode_budget_respects_cores(tmp_path, monkeypatch):
+    _write_m15(tmp_path / "GBPUSD_M15.csv", 1)
+    _write_m15(tmp_path / "USDCAD_M15.csv", 2)
+    seen = {}
+    real = train.run_budget
+
+    def spy(df, **kw):
+        seen.setdefault("n_jobs", set()).add(kw["n_jobs"])
+        return real(df, **kw)
+
+    # Threads instead of processes so the spy is visible to the workers
+    monkeypatch.setattr(train, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(train, "run_budget", spy)
+    rc = main(
+        [
+            "--symbols", "GBPUSD,USDCAD",
+            "--derive-htf",
+            "--m15", str(tmp_path / "{symbol}_M15.csv"),
+            "--budget", "--budget-fractions", "1.0", "--budget-trees", "5", "--budget-depths", "3",
+            "--symbol-jobs", "1",
+            "--max-cores", "2",
+        ]
+    )
+    assert rc == 0
+    assert seen == {"n_jobs": {2}}
+
+
+def test_symbols_mode_checks_htf_inputs_before_training(tmp_path):
+    with pytest.raises(SystemExit, match="--h4/--h1"):
+        main(["--symbols", "GBPUSD,USDCAD", "--m15", "{symbol}.csv", "--out-model", str(tmp_path / "{symbol}.joblib")])
+
+
+def test_symbols_mode_reports_a_symbol_exit(tmp_path, monkeypatch, capsys):
+    def fail(args, *, n_jobs=-1):
+        if args.symbol == "USDCAD":
+            raise SystemExit("bad inputs")
+        return 0
+
+    monkeypatch.setattr(train, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(train, "_train", fail)
+    rc = main(["--symbols", "GBPUSD,USDCAD", "--derive-htf", "--m15", "{symbol}.csv", "--out-model", str(tmp_path / "{symbol}.joblib")])
+    assert rc == 1
+    out = capsys.readouterr().out
+    assert "USDCAD: error: SystemExit: bad inputs" in out
+    assert "GBPUSD: ok" in out
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from agent_trader.data.resample import resample_ohlcv
+from agent_trader.runtime.warmup import WarmupPlan, WarmupThresholds, ema_warmup_bars, plan_warmup, verify_plan
+
+
+def _frames(n: int = 12000):
+    rng = np.random.default_rng(3)
+    times = pd.date_range("2023-01-02", periods=n, freq="15min", tz="UTC")
+    close = 1.25 + np.cumsum(rng.normal(0, 4e-4, n))
+    open_ = np.r_[close[0], close[:-1]]
+    m15 = pd.DataFrame(
+        {
+            "time": times,
+            "open": open_,
+            "high": np.maximum(open_, close) + rng.uniform(0, 3e-4, n),
+            "low": np.minimum(open_, close) - rng.uniform(0, 3e-4, n),
+            "close": close,
+            "volume": 1,
+        }
+    )
+    return resample_ohlcv(m15, "H4"), resample_ohlcv(m15, "H1"), m15
+
+
+def test_plan_follows_indicator_dependencies():
+    plan = plan_warmup()
+    assert plan.m15 == 14 + 250 - 1 + 3
+    assert plan.h1 == max(ema_warmup_bars(200, 1e-3), 300) + 2
+    assert (1 - 2 / 201) ** ema_warmup_bars(200, 1e-3) <= 1e-3
+    assert plan.m15 < 1500
+
+
+def test_truncated_history_reproduces_live_outputs():
+    th = WarmupThresholds()
+    plan = plan_warmup(th)
+    h4, h1, m15 = _frames()
+    cut = m15.iloc[: len(m15) - 7]
+    last = cut["time"].iloc[-1]
+    check = verify_plan(h4=h4[h4["time"] <= last], h1=h1[h1["time"] <= last], m15=cut.tail(400), plan=plan, th=th, training_mode=True)
+    assert check.ok, check.mismatches
+    assert check.candidates_full == th.target_bars
+
+    too_short = WarmupPlan(m15=150, h1=plan.h1, h4=plan.h4)
+    check = verify_plan(h4=h4, h1=h1, m15=m15.tail(400), plan=too_short, th=th, training_mode=True)
+    assert not check.ok